@@ -1,6 +1,17 @@
+import os
+import tempfile
+
 # Terraform URLs
 TERRAFORM_URL = "https://releases.hashicorp.com/terraform"
 TERRAFORM_LATEST_URL = "https://checkpoint-api.hashicorp.com/v1/check/terraform"
+TERRAFORM_RELEASES_INDEX_URL = f"{TERRAFORM_URL}/index.json"
+
+# 'Terraform Version' attribute value that selects the version from the module 'required_version' constraints
+TF_VERSION_AUTO = "auto"
+
+# Terraform executable
+TERRAFORM_EXE_NAME = "terraform.exe"
+TF_LOCK_FILE_NAME = ".terraform.lock.hcl"
 
 # OS types defined by sys.platform
 OS_TYPES = {
@@ -30,10 +41,16 @@ PLAN = "PLAN"
 APPLY = "APPLY"
 OUTPUT = "OUTPUT"
 DESTROY = "DESTROY"
+MIRROR_PROVIDERS = "MIRROR_PROVIDERS"
 ALLOWED_LOGGING_CMDS = [INIT, PLAN, APPLY, DESTROY]
 
 # Sandbox data keys
 TF_WORKING_DIR = "TF_WORKING_DIR"
+TF_EXE_PATH = "TF_EXE_PATH"
+TF_VERSION = "TF_VERSION"
+TF_MODULE_SNAPSHOT_KEY = "TF_MODULE_SNAPSHOT_KEY"
+TF_MODULE_COMMIT_SHA = "TF_MODULE_COMMIT_SHA"
+TF_MODULE_PATH = "TF_MODULE_PATH"
 
 # CLP models
 AZURE1G_MODEL = "Microsoft Azure"
@@ -46,6 +63,74 @@ GCP2G_MODEL = "Google Cloud Provider"
 
 CLP_PROVIDER_MODELS = [AWS1G_MODEL, AWS2G_MODEL, AZURE1G_MODEL, AZURE2G_MODEL, GCP2G_MODEL]
 
+# Local cache
+DEFAULT_CACHE_ROOT_DIR = os.path.join(tempfile.gettempdir(), "cloudshell_iac_terraform_cache")
+TF_BINARY_STORE_DIR = "terraform"
+TF_LATEST_VERSION_FILE = "latest_version.json"
+DEFAULT_LATEST_VERSION_TTL = 3600  # seconds
+TF_PLUGIN_CACHE_DIR = "plugins"
+DEFAULT_PLUGIN_CACHE_MAX_SIZE_MB = 10240
+PLUGIN_CACHE_MIN_AGE = 24 * 3600  # seconds
+TF_PROVIDER_MIRROR_DIR = "provider_mirror"
+TF_MODULE_CACHE_DIR = "modules"
+TF_MODULE_REFS_DIR = "refs"
+DOWNLOADS_DIR = "downloads"
+GIT_MIRRORS_DIR = "git_mirrors"
+GITLAB_PROJECTS_FILE = "gitlab_projects.json"
+GITHUB_RATE_LIMIT_DIR = "github_rate_limit"
+WARM_WORKING_DIRS_FILE = "warm_working_dirs.json"
+DEFAULT_WARM_WORKING_DIRS_MAX_SIZE_MB = 5120
+DEFAULT_MODULE_CACHE_MAX_SIZE_MB = 5120
+MODULE_CACHE_MIN_AGE = 24 * 3600  # seconds
+# git mirrors, '.part' downloads and staging dirs of killed drivers that were not used for this long are deleted
+CACHE_STALE_ENTRY_AGE = 14 * 24 * 3600  # seconds
+
+# Nested module prefetch
+DEFAULT_TF_REGISTRY_HOST = "registry.terraform.io"
+TF_MODULES_MANIFEST = "modules.json"
+MODULE_PREFETCH_WORKERS = 8
+
+# Preparation, independent network bound steps run concurrently before init
+PREPARATION_WORKERS = 3
+
+# GitHub API rate limit
+GITHUB_RATE_LIMIT_RESERVE = 5  # requests left for other drivers when the budget is low
+GITHUB_RATE_LIMIT_MAX_WAIT = 60  # seconds
+
+# HTTP transport
+HTTP_POOL_SIZE = 10  # connections kept alive per host
+HTTP_CONNECT_TIMEOUT = 10  # seconds
+HTTP_READ_TIMEOUT = 120  # seconds
+HTTP_RETRIES = 3
+
+# Terraform process output, lines kept in memory for error messages
+PROCESS_OUTPUT_TAIL_LINES = 200
+
+# Terraform machine readable output (-json), supported by plan/apply/destroy since 0.15.3
+TF_JSON_OUTPUT_MIN_VERSION = (0, 15, 3)
+TF_EVENT_APPLY_START = "apply_start"
+TF_EVENT_APPLY_PROGRESS = "apply_progress"
+TF_EVENT_APPLY_COMPLETE = "apply_complete"
+TF_EVENT_APPLY_ERRORED = "apply_errored"
+TF_EVENT_CHANGE_SUMMARY = "change_summary"
+TF_EVENT_PLANNED_CHANGE = "planned_change"
+TF_EVENT_DIAGNOSTIC = "diagnostic"
+TF_EVENT_OUTPUTS = "outputs"
+TF_EVENT_UNPARSED = "unparsed"
+TF_EVENT_MAX_ERRORS = 20
+
+# Live status, resource progress updates are sent at most once per interval (seconds)
+DEFAULT_LIVE_STATUS_MIN_INTERVAL = 10
+
+# Init fingerprint, recorded in .terraform after a successful init
+TF_INIT_FINGERPRINT_FILE = "init-fingerprint.json"
+TF_MODULE_FILE_EXTENSIONS = (".tf", ".tf.json")
+
+# Working dir layout, the repo is extracted to <temp dir>/REPO
+REPO_DIR_NAME = "REPO"
+REPO_FILE_NAME = "repo.zip"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # bytes
+
 # Misc
 DIRTY_CHARS = r'''
                 \x1B  # ESC
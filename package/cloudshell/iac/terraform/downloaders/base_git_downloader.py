@@ -1,11 +1,27 @@
+import re
 from abc import ABC, abstractmethod
 from logging import Logger
 
+import os
+from typing import Callable
+
+from cloudshell.iac.terraform.constants import DEFAULT_CACHE_ROOT_DIR, DOWNLOADS_DIR
+from cloudshell.iac.terraform.services.module_cache import ModuleCache, ModuleSnapshot
+from cloudshell.iac.terraform.services.module_source_parser import ModuleSourceParser
+from cloudshell.iac.terraform.services.resumable_download import ResumableDownload
+
+COMMIT_SHA_PATTERN = re.compile(r"^[0-9a-fA-F]{40}$")
+
 
 class GitScriptDownloaderBase(ABC):
 
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, module_cache: ModuleCache = None, cache_root_dir: str = None):
         self.logger = logger
+        self.module_cache = module_cache
+        self.cache_root_dir = cache_root_dir or DEFAULT_CACHE_ROOT_DIR
+        self.resumable_download = ResumableDownload(os.path.join(self.cache_root_dir, DOWNLOADS_DIR), logger)
+        # the commit the working dir was created from, with its module cache snapshot key if the cache is used
+        self.module_snapshot = None
 
     @abstractmethod
     def download_repo(self, url: str, token: str, branch: str = "") -> str:
@@ -17,3 +33,53 @@ class GitScriptDownloaderBase(ABC):
         4. return full path of working dir as string
         """
         pass
+
+    def create_working_dir_from_snapshot(self, key: str, sha: str, path_in_repo: str) -> str:
+        self.module_snapshot = ModuleSnapshot(key, sha, path_in_repo)
+        return self.module_cache.create_working_dir(key, path_in_repo)
+
+    def record_commit(self, sha: str, path_in_repo: str) -> None:
+        """ the working dir was downloaded without the module cache, destroy downloads the same commit again """
+        self.module_snapshot = ModuleSnapshot("", sha, path_in_repo)
+
+    @staticmethod
+    def is_commit_sha(ref: str) -> bool:
+        """ a full commit sha does not need to be resolved """
+        return bool(COMMIT_SHA_PATTERN.match(ref or ""))
+
+    def extract_module(self, module_path: str, dest_dir: str, extract_dir: Callable[[str], None]) -> None:
+        """
+        extract the module dir and the local modules it calls ('../modules/x' sources, followed recursively).
+        the whole repo is extracted when one of these dirs reads files through '../' paths (file, templatefile),
+        the files it needs are not known.
+        extract_dir(dir_path) must extract the repo dir at dir_path (repo relative) to dest_dir, keeping the repo layout
+        """
+        extracted_paths = []
+        scanned_paths = set()
+        pending_paths = [module_path]
+        while pending_paths:
+            current_path = pending_paths.pop()
+            if current_path in scanned_paths:
+                continue
+            scanned_paths.add(current_path)
+
+            if not any(self._is_in_dir(current_path, x) for x in extracted_paths):
+                extract_dir(current_path)
+                extracted_paths.append(current_path)
+
+            current_dir = os.path.join(dest_dir, *[x for x in current_path.split("/") if x])
+            if not os.path.isdir(current_dir):
+                continue
+            if "" not in extracted_paths and ModuleSourceParser.refers_to_parent_dir(current_dir):
+                self.logger.info(f"Module '{current_path}' reads files through '../' paths, extracting the whole repo")
+                extract_dir("")
+                extracted_paths.append("")
+            for module_call in ModuleSourceParser.get_module_calls(current_dir, self.logger):
+                if ModuleSourceParser.is_local_source(module_call.source):
+                    source_path = ModuleSourceParser.get_local_source_path(current_path, module_call.source)
+                    if source_path is not None:
+                        pending_paths.append(source_path)
+
+    @staticmethod
+    def _is_in_dir(path: str, dir_path: str) -> bool:
+        return not dir_path or path == dir_path or path.startswith(f"{dir_path}/")
@@ -1,19 +1,39 @@
 import logging
 from typing import Type
 
-from cloudshell.iac.terraform.constants import ATTRIBUTE_NAMES
-from cloudshell.iac.terraform.downloaders.tf_exec_downloader import TfExecDownloader
+from cloudshell.iac.terraform.constants import ATTRIBUTE_NAMES, TF_VERSION_AUTO
+from cloudshell.iac.terraform.downloaders.tf_exec_downloader import TfExecDownloader, TerraformExecutable
+from cloudshell.iac.terraform.models.config import TerraformShellConfig
 from cloudshell.iac.terraform.models.shell_helper import ShellHelperObject
 from cloudshell.iac.terraform.downloaders.base_git_downloader import GitScriptDownloaderBase
+from cloudshell.iac.terraform.downloaders.git_downloader import GitProtocolScriptDownloader
 from cloudshell.iac.terraform.downloaders.github_downloader import GitHubScriptDownloader
 from cloudshell.iac.terraform.downloaders.gitlab_downloader import GitLabScriptDownloader
+from cloudshell.iac.terraform.services.module_cache import ModuleCache, ModuleSnapshot
+from cloudshell.iac.terraform.services.tf_version_selector import TfVersionSelector
 
 
 class Downloader(object):
-    def __init__(self, shell_helper: ShellHelperObject):
+    def __init__(self, shell_helper: ShellHelperObject, config: TerraformShellConfig = None):
         self._shell_helper = shell_helper
+        self._config = config or TerraformShellConfig()
+        # set when the working dir was created from the module cache
+        self.module_snapshot = None
+
+    def download_terraform_module(self, module_snapshot: ModuleSnapshot = None) -> str:
+        """
+        module_snapshot is a recorded commit that is downloaded instead of the head of the branch,
+        its module cache snapshot is used without downloading while it is still cached
+        """
+        if module_snapshot and module_snapshot.key and self._config.use_module_cache:
+            module_cache = self.create_module_cache(self._shell_helper.logger)
+            working_dir = module_cache.create_working_dir_if_cached(module_snapshot.key, module_snapshot.path)
+            if working_dir:
+                self._shell_helper.logger.info(f"Using cached Terraform module of commit '{module_snapshot.sha}'")
+                self.module_snapshot = module_snapshot
+                return working_dir
+            self._shell_helper.logger.info(f"Terraform module of commit '{module_snapshot.sha}' is not cached")
 
-    def download_terraform_module(self) -> str:
         url = self._shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.GIT_TERRAFORM_MODULE_URL)
         if not url:
             raise ValueError(f"Must populate attribute '{ATTRIBUTE_NAMES.GIT_TERRAFORM_MODULE_URL}'")
@@ -21,6 +41,10 @@ class Downloader(object):
         token_enc = self._shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.GIT_TOKEN)
         token = self._shell_helper.api.DecryptPassword(token_enc).Value
         branch = self._shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.BRANCH)
+        if module_snapshot and module_snapshot.sha:
+            # the branch may have moved on since the recorded commit was applied
+            branch = module_snapshot.sha
+            self._shell_helper.logger.info(f"Downloading recorded commit '{branch}' of the Terraform module")
 
         # get downloader mapped to git provider
         provider = self._shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.GIT_PROVIDER)
@@ -30,17 +54,46 @@ class Downloader(object):
         self._shell_helper.sandbox_messages.write_message("downloading Terraform module from repository...")
         self._shell_helper.logger.info(f"Downloading Terraform Repo from '{provider}'")
         self._shell_helper.logger.info(f"Download URL: '{url}'")
-        return downloader.download_repo(url, token, branch)
+        working_dir = downloader.download_repo(url, token, branch)
+        self.module_snapshot = downloader.module_snapshot
+        if downloader.module_cache:
+            self._evict_module_cache(downloader.module_cache)
+        return working_dir
 
-    def download_terraform_executable(self, tf_workingdir: str) -> None:
+    def _evict_module_cache(self, module_cache: ModuleCache) -> None:
+        try:
+            module_cache.evict()
+        except Exception as e:
+            # the deployment doesn't depend on the eviction, it runs again after the next download
+            self._shell_helper.logger.warning(f"Failed to evict module cache -> {str(e)}")
+
+    def is_executable_version_from_module(self) -> bool:
+        """ version 'auto' is selected by the module required_version, so the module is downloaded first """
+        return self._shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.TERRAFORM_VERSION) == TF_VERSION_AUTO
+
+    def download_terraform_executable(self, tf_working_dir: str = "") -> TerraformExecutable:
         try:
             self._shell_helper.logger.info("Downloading Terraform executable")
             self._shell_helper.sandbox_messages.write_message("downloading Terraform executable...")
 
-            TfExecDownloader.download_terraform_executable(
-                tf_workingdir,
-                self._shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.TERRAFORM_VERSION)
+            version = self._shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.TERRAFORM_VERSION)
+            version_constraints = None
+            if version == TF_VERSION_AUTO and tf_working_dir:
+                version_constraints = TfVersionSelector.get_required_version_constraints(tf_working_dir,
+                                                                                         self._shell_helper.logger)
+                self._shell_helper.logger.info(f"Module required_version constraints: {version_constraints}")
+
+            tf_executable = TfExecDownloader.download_terraform_executable(
+                version=version,
+                cache_root_dir=self._config.cache_root_dir,
+                latest_version_ttl=self._config.latest_version_ttl,
+                version_constraints=version_constraints,
+                logger=self._shell_helper.logger,
+                shared_cache_dir=self._config.shared_cache_dir,
+                shared_cache_read_only=self._config.shared_cache_read_only
             )
+            self._shell_helper.logger.info(f"Using Terraform {tf_executable.version} at '{tf_executable.path}'")
+            return tf_executable
         except Exception as e:
             self._shell_helper.logger.error(f"Failed downloading Terraform Repo from Github {str(e)}")
             raise
@@ -49,12 +102,18 @@ class Downloader(object):
         """ extend this dictionary with additional git provider downloaders """
         git_downloader_map = {
             "github": GitHubScriptDownloader,
-            "gitlab": GitLabScriptDownloader
+            "gitlab": GitLabScriptDownloader,
+            "git": GitProtocolScriptDownloader
         }
         if git_provider.lower() not in git_downloader_map:
             raise NotImplementedError(f"Git Provider '{git_provider}' not supported")
         return git_downloader_map[git_provider.lower()]
 
+    def create_module_cache(self, logger: logging.Logger) -> ModuleCache:
+        return ModuleCache(self._config.cache_root_dir, logger, self._config.shared_cache_dir,
+                           self._config.shared_cache_read_only, self._config.module_cache_max_size_mb)
+
     def _downloader_factory(self, git_provider: str, logger: logging.Logger) -> GitScriptDownloaderBase:
         downloader_class = self._get_downloader_class(git_provider)
-        return downloader_class(logger)
+        module_cache = self.create_module_cache(logger) if self._config.use_module_cache else None
+        return downloader_class(logger, module_cache, self._config.cache_root_dir)
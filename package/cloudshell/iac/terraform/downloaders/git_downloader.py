@@ -0,0 +1,195 @@
+import base64
+import hashlib
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+from dataclasses import dataclass
+from typing import List, Tuple
+from urllib.parse import parse_qs
+
+from cloudshell.iac.terraform.constants import GIT_MIRRORS_DIR, REPO_DIR_NAME
+from cloudshell.iac.terraform.downloaders.base_git_downloader import GitScriptDownloaderBase
+from cloudshell.iac.terraform.services.file_lock import FileLock
+
+
+class GitCommandError(Exception):
+    pass
+
+
+@dataclass
+class GitUrlData:
+    repo_url: str
+    path: str
+    ref: str
+
+
+def extract_data_from_git_url(url: str) -> GitUrlData:
+    """
+    terraform style git url, the module path follows '//' and the branch/tag/commit is the 'ref' query param
+    Sample url: "git::https://git.example.com/infra/modules.git//live/prod?ref=main"
+    """
+    url = url[len("git::"):] if url.startswith("git::") else url
+    url, _, query = url.partition("?")
+    ref = parse_qs(query).get("ref", [""])[0]
+
+    # the '//' of the scheme ('https://', 'file:///') is not the module path separator
+    scheme_end = url.find("://")
+    path_separator = url.find("//", scheme_end + 3 if scheme_end >= 0 else 0)
+    if path_separator >= 0:
+        repo_url, path = url[:path_separator], url[path_separator + 2:]
+    else:
+        repo_url, path = url, ""
+    if not repo_url:
+        raise ValueError(f"No repository found in git url '{url}'")
+    return GitUrlData(repo_url=repo_url, path=path.strip("/"), ref=ref)
+
+
+class GitProtocolScriptDownloader(GitScriptDownloaderBase):
+    """
+    Downloads modules from any git server with the git cli.
+    A bare mirror of every repository is kept in the cache (blobs are fetched on demand), so updating it only
+    transfers the commits since the last fetch. Only the module path is extracted from the requested commit.
+    """
+
+    def download_repo(self, url: str, token: str, branch: str = "") -> str:
+        url_data = extract_data_from_git_url(url)
+        # allow service branch attr to override the url defined ref
+        ref = branch or url_data.ref
+        env = self._get_git_env(token)
+        mirror_dir, sha = self._resolve_commit(url_data.repo_url, ref, env)
+
+        if self.module_cache:
+            key = self.module_cache.get_key(url_data.repo_url, sha, url_data.path)
+            self.module_cache.get_or_add_snapshot(
+                key, lambda dest_dir: self._extract_module_at_commit(mirror_dir, sha, url_data.path, dest_dir, env)
+            )
+            return self.create_working_dir_from_snapshot(key, sha, url_data.path)
+
+        repo_temp_dir = tempfile.mkdtemp()
+        repo_dir = os.path.join(repo_temp_dir, REPO_DIR_NAME)
+        self._extract_module_at_commit(mirror_dir, sha, url_data.path, repo_dir, env)
+        self.record_commit(sha, url_data.path)
+        working_dir = os.path.join(repo_dir, *[x for x in url_data.path.split("/") if x])
+        self.logger.info(f"Working dir = {working_dir}")
+        return working_dir
+
+    def get_package_snapshot(self, repo_url: str, ref: str, token: str = "") -> str:
+        """ returns the module cache key of a snapshot of the whole repo at ref (module cache must be set) """
+        env = self._get_git_env(token)
+        mirror_dir, sha = self._resolve_commit(repo_url, ref, env)
+        key = self.module_cache.get_key(repo_url, sha, "")
+        self.module_cache.get_or_add_snapshot(
+            key, lambda dest_dir: self._extract_module_at_commit(mirror_dir, sha, "", dest_dir, env)
+        )
+        return key
+
+    def _resolve_commit(self, repo_url: str, ref: str, env: dict) -> Tuple[str, str]:
+        """ update the mirror of the repo and resolve ref, returns the mirror dir and the commit sha """
+        mirror_dir = self._get_mirror_dir(repo_url)
+        with FileLock(f"{mirror_dir}.lock"):
+            self._update_mirror(repo_url, mirror_dir, ref, env)
+            # stale mirrors are deleted by the module cache eviction
+            os.utime(mirror_dir)
+            sha = self._run_git(["rev-parse", "--verify", f"{ref or 'HEAD'}^{{commit}}"], mirror_dir, env).strip()
+        self.logger.info(f"Resolved '{ref or 'HEAD'}' to commit '{sha}'")
+        return mirror_dir, sha
+
+    def _get_mirror_dir(self, repo_url: str) -> str:
+        return os.path.join(self.cache_root_dir, GIT_MIRRORS_DIR, f"{hashlib.sha256(repo_url.encode()).hexdigest()}.git")
+
+    def _update_mirror(self, repo_url: str, mirror_dir: str, ref: str, env: dict) -> None:
+        if not os.path.isdir(mirror_dir):
+            self.logger.info(f"Creating git mirror of '{repo_url}'")
+            os.makedirs(os.path.dirname(mirror_dir), exist_ok=True)
+            staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=os.path.dirname(mirror_dir))
+            try:
+                # blobs are fetched on demand, only for the paths that are extracted
+                self._run_git(["clone", "--mirror", "--filter=blob:none", "--quiet", repo_url, staging_dir],
+                              os.path.dirname(mirror_dir), env)
+                os.rename(staging_dir, mirror_dir)
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            return
+
+        if self.is_commit_sha(ref) and self._has_commit(mirror_dir, ref, env):
+            return
+        self.logger.info(f"Fetching updates of git mirror of '{repo_url}'")
+        self._run_git(["fetch", "--prune", "--quiet", "origin"], mirror_dir, env)
+
+    def _has_commit(self, mirror_dir: str, sha: str, env: dict) -> bool:
+        try:
+            self._run_git(["cat-file", "-e", f"{sha}^{{commit}}"], mirror_dir, env)
+            return True
+        except GitCommandError:
+            return False
+
+    def _extract_module_at_commit(self, mirror_dir: str, sha: str, module_path: str, dest_dir: str, env: dict) -> None:
+        if not self._is_dir_in_commit(mirror_dir, sha, module_path, env):
+            raise ValueError(f"Path '{module_path}' not found in commit '{sha}'")
+        os.makedirs(dest_dir, exist_ok=True)
+        self.extract_module(module_path, dest_dir,
+                            lambda dir_path: self._extract_dir(mirror_dir, sha, dir_path, dest_dir, env))
+
+    def _is_dir_in_commit(self, mirror_dir: str, sha: str, dir_path: str, env: dict) -> bool:
+        if not dir_path:
+            return True
+        return self._run_git(["cat-file", "-t", f"{sha}:{dir_path}"], mirror_dir, env, check=False).strip() == "tree"
+
+    def _extract_dir(self, mirror_dir: str, sha: str, dir_path: str, dest_dir: str, env: dict) -> None:
+        """ extract one dir of the commit with 'git archive', so only the blobs of that dir are fetched """
+        if not self._is_dir_in_commit(mirror_dir, sha, dir_path, env):
+            # a local module call to a missing dir, init reports it
+            return
+        self._prefetch_blobs(mirror_dir, sha, dir_path, env)
+        fd, tar_path = tempfile.mkstemp(suffix=".tar")
+        os.close(fd)
+        try:
+            archive_cmd = ["archive", "--format=tar", f"--output={tar_path}", sha]
+            if dir_path:
+                archive_cmd += ["--", dir_path]
+            self._run_git(archive_cmd, mirror_dir, env)
+            with tarfile.open(tar_path) as tar_file:
+                members = [x for x in tar_file.getmembers() if os.pardir not in x.name.split("/")]
+                tar_file.extractall(dest_dir, members)
+        finally:
+            os.remove(tar_path)
+
+    def _prefetch_blobs(self, mirror_dir: str, sha: str, dir_path: str, env: dict) -> None:
+        """
+        fetch the blobs of the dir in one request, otherwise a partial clone fetches every missing blob on its own.
+        servers without partial clone support (and local repos) produce a full mirror, which has all blobs already
+        """
+        is_partial_clone = self._run_git(["config", "--get", "remote.origin.promisor"], mirror_dir, env, check=False)
+        if is_partial_clone.strip() != "true":
+            return
+        ls_tree_cmd = ["ls-tree", "-r", sha] + (["--", dir_path] if dir_path else [])
+        # '<mode> <type> <object id>\t<path>' lines, submodules are 'commit' entries
+        tree_entries = [x.split("\t")[0].split() for x in self._run_git(ls_tree_cmd, mirror_dir, env).splitlines()]
+        blob_ids = "\n".join(x[2] for x in tree_entries if len(x) == 3 and x[1] == "blob")
+        if blob_ids:
+            self._run_git(["-c", "fetch.negotiationAlgorithm=noop", "fetch", "--quiet", "--no-tags",
+                           "--no-write-fetch-head", "--recurse-submodules=no", "--filter=blob:none", "--stdin",
+                           "origin"], mirror_dir, env, stdin=blob_ids)
+
+    @staticmethod
+    def _get_git_env(token: str) -> dict:
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        if token:
+            # passed as config in the environment, so the token is neither in the command line nor in the mirror
+            credentials = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+            env.update({
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}"
+            })
+        return env
+
+    @staticmethod
+    def _run_git(args: List[str], cwd: str, env: dict, check: bool = True, stdin: str = None) -> str:
+        result = subprocess.run(["git"] + args, cwd=cwd, env=env, input=stdin, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True)
+        if check and result.returncode != 0:
+            raise GitCommandError(f"git {args[0]} failed: {result.stderr.strip()}")
+        return result.stdout
@@ -1,44 +1,45 @@
 import collections
-import json
 import os
+import posixpath
 import re
+import shutil
 from zipfile import ZipFile
 import tempfile
 import requests
-from urllib.error import HTTPError, URLError
 
 from retry import retry
 
-from cloudshell.iac.terraform.constants import GITHUB_REPO_PATTERN
+from cloudshell.iac.terraform.constants import GITHUB_REPO_PATTERN, REPO_FILE_NAME, REPO_DIR_NAME, \
+    DOWNLOAD_CHUNK_SIZE
 from cloudshell.iac.terraform.downloaders.base_git_downloader import GitScriptDownloaderBase
+from cloudshell.iac.terraform.services.github_api_client import GitHubApiClient, GitHubRateLimitError
+from cloudshell.iac.terraform.services.resumable_download import ResumableDownload
 
 GitHubFileData = collections.namedtuple(
     'GitHubFileData', 'account_id repo_id branch_id path api_zip_dl_url api_tf_dl_url'
 )
-REPO_FILE_NAME = "repo.zip"
 
 
 class GitHubScriptDownloader(GitScriptDownloaderBase):
 
-    @retry((HTTPError, URLError), delay=1, backoff=2, tries=5)
+    @retry((requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError),
+           delay=1, backoff=2, tries=5)
     def download_repo(self, url: str, token: str, branch: str = "") -> str:
-        headers = {'Authorization': f'token {token}'} if token else None
+        github_client = GitHubApiClient(token, self.cache_root_dir, self.logger)
         self._validate_github_url(url)
         url_data = self._extract_data_from_url(url, branch)
         try:
+            if self.module_cache:
+                return self._download_repo_from_cache(url, url_data, github_client)
+
             # Downloading the path provided to check if it exists
-            tf_response = requests.get(url_data.api_tf_dl_url, headers=headers)
-            tf_response_json = json.loads(tf_response.text)
+            tf_response = github_client.get(url_data.api_tf_dl_url)
 
             if tf_response.status_code == 200:
-                path_in_repo = url_data.path
-                repo_response = requests.get(url_data.api_zip_dl_url, headers=headers)
-                # Downloading the Repo and checking it get downloaded
-                if repo_response.status_code == 200:
-                    working_dir = self._prepare_working_dir(path_in_repo, repo_response, tf_response_json, url_data)
-                    return working_dir
-                else:
-                    raise Exception(f'Error Downloading/Extracting: Download code for repo={repo_response.status_code}')
+                sha = self._resolve_commit_sha(url_data, github_client)
+                self.logger.info(f"Resolved '{url_data.branch_id}' to commit '{sha}'")
+                working_dir = self._prepare_working_dir(self._extract_data_from_url(url, sha), github_client)
+                return working_dir
             else:
                 raise Exception(f'Error Downloading/Extracting - Download code for module url (Check Token and URL)'
                                 f'{tf_response.status_code}')
@@ -46,27 +47,124 @@ class GitHubScriptDownloader(GitScriptDownloaderBase):
             self.logger.error(f'There was an error downloading and extracting the repo. {str(e)}')
             raise
 
-    def _prepare_working_dir(self, path_in_repo, repo_response, tf_response_json, url_data):
+    def _download_repo_from_cache(self, url: str, url_data: GitHubFileData, github_client: GitHubApiClient) -> str:
+        repo = f"github.com/{url_data.account_id}/{url_data.repo_id}"
+        try:
+            sha = self._resolve_commit_sha(url_data, github_client)
+            self.logger.info(f"Resolved '{url_data.branch_id}' to commit '{sha}'")
+        except GitHubRateLimitError as e:
+            # the last resolution of the branch is still a valid module, better than failing the deployment
+            sha = self.module_cache.get_cached_ref_sha(repo, url_data.branch_id)
+            if not sha or not self.module_cache.has_snapshot(self.module_cache.get_key(repo, sha, url_data.path)):
+                raise
+            self.logger.warning(f"{str(e)}. Using cached module of '{url_data.branch_id}' (commit '{sha}')")
+
+        url_data = self._extract_data_from_url(url, sha)
+        key = self.module_cache.get_key(repo, sha, url_data.path)
+        snapshot_dir = self.module_cache.get_or_add_snapshot(
+            key, lambda dest_dir: self._download_repo_to_dir(url_data, github_client, dest_dir)
+        )
+
         # Removing the file from the path as we are interested in the Folder that contains it
-        if not isinstance(tf_response_json, list):
-            path_in_repo = os.sep.join(url_data.path.split("/")[:-1])
+        path_in_repo = url_data.path
+        if os.path.isfile(os.path.join(snapshot_dir, *path_in_repo.split("/"))):
+            path_in_repo = "/".join(path_in_repo.split("/")[:-1])
+        return self.create_working_dir_from_snapshot(key, sha, path_in_repo)
+
+    def _resolve_commit_sha(self, url_data: GitHubFileData, github_client: GitHubApiClient) -> str:
+        if self.is_commit_sha(url_data.branch_id):
+            return url_data.branch_id.lower()
+
+        # the sha media type returns the commit sha as plain text, without the commit data
+        sha_url = f'https://api.github.com/repos/{url_data.account_id}/{url_data.repo_id}/commits/{url_data.branch_id}'
+        if not self.module_cache:
+            return self._get_sha_from_response(
+                github_client.get(sha_url, headers={"Accept": "application/vnd.github.sha"})
+            )
+        return self.module_cache.resolve_ref(
+            f"github.com/{url_data.account_id}/{url_data.repo_id}",
+            url_data.branch_id,
+            lambda conditional_headers: github_client.get(
+                sha_url, headers=dict(conditional_headers, Accept="application/vnd.github.sha")
+            ),
+            self._get_sha_from_response
+        )
+
+    @staticmethod
+    def _get_sha_from_response(sha_response: requests.Response) -> str:
+        if sha_response.status_code != 200:
+            raise Exception(f'Error resolving commit of branch/ref (Check Token and URL) {sha_response.status_code}')
+        return sha_response.text.strip()
+
+    def _download_repo_to_dir(self, url_data: GitHubFileData, github_client: GitHubApiClient, dest_dir: str) -> None:
+        repo_temp_dir = tempfile.mkdtemp()
+        try:
+            repo_zip_path = os.path.join(repo_temp_dir, REPO_FILE_NAME)
+            self._download_repo_zip(url_data, github_client, repo_zip_path)
+            self._extract_repo(repo_zip_path, dest_dir, url_data.path)
+        finally:
+            shutil.rmtree(repo_temp_dir, ignore_errors=True)
+
+    def _prepare_working_dir(self, url_data: GitHubFileData, github_client: GitHubApiClient) -> str:
+        """ url_data.branch_id must be the resolved commit sha """
         repo_temp_dir = tempfile.mkdtemp()
         self.logger.info(f"Temp repo dir = {repo_temp_dir}")
         repo_zip_path = os.path.join(repo_temp_dir, REPO_FILE_NAME)
-        with open(os.path.join(repo_temp_dir, REPO_FILE_NAME), 'wb+') as file:
-            file.write(repo_response.content)
-        self._extract_repo(repo_zip_path, repo_temp_dir)
-        commit_folder_in_zip = ZipFile(repo_zip_path, 'r').namelist()[0][:-1]
-        os.rename(os.path.join(repo_temp_dir, commit_folder_in_zip), os.path.join(repo_temp_dir, "REPO"))
-        working_dir = os.path.join(repo_temp_dir, "REPO")
-        for path_in_repo_dir in path_in_repo.split("/"):
-            working_dir = os.path.join(working_dir, path_in_repo_dir)
+        self._download_repo_zip(url_data, github_client, repo_zip_path)
+        repo_dir = os.path.join(repo_temp_dir, REPO_DIR_NAME)
+        module_path = self._extract_repo(repo_zip_path, repo_dir, url_data.path)
+        os.remove(repo_zip_path)
+        self.record_commit(url_data.branch_id, module_path)
+        working_dir = os.path.join(repo_dir, *[x for x in module_path.split("/") if x])
         self.logger.info(f"Working dir = {working_dir}")
         return working_dir
 
-    def _extract_repo(self, source: str, destination: str) -> None:
-        self.logger.info(f"Extracting {REPO_FILE_NAME}")
-        ZipFile(source, 'r').extractall(destination)
+    def _download_repo_zip(self, url_data: GitHubFileData, github_client: GitHubApiClient, repo_zip_path: str) -> None:
+        # streamed to disk in chunks, so memory use does not depend on the repo size. a failed download is resumed
+        self.resumable_download.download(url_data.api_zip_dl_url, repo_zip_path, ResumableDownload.verify_zip,
+                                         github_client.get)
+
+    def _extract_repo(self, repo_zip_path: str, dest_dir: str, path: str) -> str:
+        """
+        extract only the module dir at path (the dir of the file when path is a file) to dest_dir,
+        together with the local modules it calls ('../modules/x' sources), keeping the repo layout.
+        returns the module dir path in the repo
+        """
+        self.logger.info(f"Extracting '{path}' from {REPO_FILE_NAME}")
+        with ZipFile(repo_zip_path, 'r') as zip_file:
+            members = zip_file.infolist()
+            # the zipball has a single '<account>-<repo>-<sha>/' root folder
+            root_folder = members[0].filename.split("/")[0]
+            member_paths = {x.filename[len(root_folder) + 1:]: x for x in members}
+
+            module_path = path.strip("/")
+            if module_path in member_paths and not member_paths[module_path].is_dir():
+                # Removing the file from the path as we are interested in the Folder that contains it
+                module_path = posixpath.dirname(module_path)
+            if module_path and not any(x.startswith(f"{module_path}/") for x in member_paths):
+                raise Exception(f"Error Downloading/Extracting - path '{path}' not found in repo (Check URL)")
+
+            self.extract_module(module_path, dest_dir,
+                                lambda dir_path: self._extract_dir(zip_file, member_paths, dir_path, dest_dir))
+        return module_path
+
+    @staticmethod
+    def _extract_dir(zip_file: ZipFile, member_paths: dict, dir_path: str, dest_dir: str) -> None:
+        os.makedirs(dest_dir, exist_ok=True)
+        prefix = f"{dir_path}/" if dir_path else ""
+        for member_path, member in member_paths.items():
+            if not member_path or not member_path.startswith(prefix):
+                continue
+            parts = member_path.rstrip("/").split("/")
+            if os.pardir in parts:
+                continue
+            target_path = os.path.join(dest_dir, *parts)
+            if member.is_dir():
+                os.makedirs(target_path, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            with zip_file.open(member) as source, open(target_path, 'wb') as target:
+                shutil.copyfileobj(source, target, DOWNLOAD_CHUNK_SIZE)
 
     def _validate_github_url(self, url: str) -> None:
         matching = re.match(GITHUB_REPO_PATTERN, url)
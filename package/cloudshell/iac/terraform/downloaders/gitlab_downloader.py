@@ -1,10 +1,11 @@
 import re
+import requests
 from dataclasses import dataclass
-from typing import List
-from urllib.error import HTTPError, URLError
+from typing import List, Tuple
 from retry import retry
 from cloudshell.iac.terraform.downloaders.base_git_downloader import GitScriptDownloaderBase
-from cloudshell.iac.terraform.services.gitlab_api_handler import GitlabApiHandler
+from cloudshell.iac.terraform.services.gitlab_api_handler import GitlabApiHandler, GitlabApiHttpError
+from cloudshell.iac.terraform.services.gitlab_project_cache import GitlabProjectCache
 from urllib.parse import unquote
 
 
@@ -129,7 +130,8 @@ def is_gitlab_api_url(url: str) -> bool:
 
 class GitLabScriptDownloader(GitScriptDownloaderBase):
 
-    @retry((HTTPError, URLError), delay=1, backoff=2, tries=5)
+    @retry((requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError),
+           delay=1, backoff=2, tries=5)
     def download_repo(self, url: str, token: str, branch: str = "") -> str:
 
         # extract data from browser "raw style url" or "gitlab api" style
@@ -144,8 +146,67 @@ class GitLabScriptDownloader(GitScriptDownloaderBase):
         is_https = True if url_data.protocol == "https" else False
         api_handler = GitlabApiHandler(host=url_data.domain, token=token, is_https=is_https)
 
-        # if using raw style url, do lookup for project id from project name
-        project_id = url_data.project_id if is_api_url else api_handler.get_project_id_from_name(url_data.project_name)
-        working_dir = api_handler.download_archive_to_temp_dir(project_id=project_id, path=url_data.path, sha=sha)
+        if is_api_url:
+            working_dir = self._download_repo(api_handler, url_data, url_data.project_id, sha)
+        else:
+            # if using raw style url, do lookup for project id from project path
+            project_id, is_cached_id = self._get_project_id(api_handler, url_data)
+            try:
+                working_dir = self._download_repo(api_handler, url_data, project_id, sha)
+            except GitlabApiHttpError:
+                if not is_cached_id:
+                    raise
+                # the project may have been deleted and its path reused, look it up again
+                self.logger.info(f"Request with cached project id {project_id} failed, looking up project again")
+                GitlabProjectCache(self.cache_root_dir).remove_project_id(url_data.domain, self._get_project_path(url_data))
+                project_id, _ = self._get_project_id(api_handler, url_data)
+                working_dir = self._download_repo(api_handler, url_data, project_id, sha)
         self.logger.info(f"Temp Working Dir: {working_dir}")
         return working_dir
+
+    def _download_repo(self, api_handler: GitlabApiHandler, url_data: CommonGitLabUrlData, project_id: int,
+                       sha: str) -> str:
+        if self.module_cache:
+            return self._download_repo_from_cache(api_handler, url_data, project_id, sha)
+        if not self.is_commit_sha(sha):
+            ref = sha
+            sha = api_handler.get_commit_sha(project_id, ref)
+            self.logger.info(f"Resolved '{ref or 'default branch'}' to commit '{sha}'")
+        working_dir = api_handler.download_archive_to_temp_dir(project_id=project_id, path=url_data.path, sha=sha)
+        self.record_commit(sha.lower(), url_data.path)
+        return working_dir
+
+    def _get_project_id(self, api_handler: GitlabApiHandler, url_data: GitLabBrowserUrlData) -> Tuple[int, bool]:
+        """ returns the project id and whether it was cached by an earlier run """
+        project_cache = GitlabProjectCache(self.cache_root_dir)
+        project_path = self._get_project_path(url_data)
+        project_id = project_cache.get_project_id(url_data.domain, project_path)
+        if project_id:
+            return project_id, True
+
+        project_id = api_handler.get_project_id_from_path(project_path)
+        project_cache.set_project_id(url_data.domain, project_path, project_id)
+        return project_id, False
+
+    @staticmethod
+    def _get_project_path(url_data: GitLabBrowserUrlData) -> str:
+        return f"{url_data.gitlab_user}/{url_data.project_name}"
+
+    def _download_repo_from_cache(self, api_handler: GitlabApiHandler, url_data: CommonGitLabUrlData,
+                                  project_id: int, sha: str) -> str:
+        if not self.is_commit_sha(sha):
+            ref = sha
+            sha = self.module_cache.resolve_ref(
+                f"{url_data.domain}/projects/{project_id}",
+                ref,
+                lambda conditional_headers: api_handler.get_commits_response(project_id, ref, conditional_headers),
+                lambda response: api_handler.get_commit_sha_from_response(response, project_id, ref)
+            )
+            self.logger.info(f"Resolved '{ref or 'default branch'}' to commit '{sha}'")
+
+        key = self.module_cache.get_key(f"{url_data.domain}/projects/{project_id}", sha.lower(), url_data.path)
+        self.module_cache.get_or_add_snapshot(
+            key, lambda dest_dir: api_handler.download_archive_to_dir(project_id, url_data.path, sha, dest_dir,
+                                                                      self.resumable_download)
+        )
+        return self.create_working_dir_from_snapshot(key, sha.lower(), url_data.path)
@@ -1,17 +1,24 @@
-import json
 import os
 import re
+import shutil
 import sys
-import ssl
-from io import BytesIO
+import tempfile
+import warnings
+from collections import namedtuple
 from logging import Logger
-from urllib.request import Request, urlopen
-from zipfile import ZipFile
+from typing import List
 
+import requests
 from retry import retry
-from urllib.error import HTTPError, URLError
 
-from cloudshell.iac.terraform.constants import TERRAFORM_LATEST_URL, OS_TYPES, TERRAFORM_URL
+from cloudshell.iac.terraform.constants import TERRAFORM_LATEST_URL, OS_TYPES, TERRAFORM_URL, TERRAFORM_EXE_NAME, \
+    DEFAULT_CACHE_ROOT_DIR, DEFAULT_LATEST_VERSION_TTL, TF_VERSION_AUTO, TERRAFORM_RELEASES_INDEX_URL, DOWNLOADS_DIR
+from cloudshell.iac.terraform.services.http_transport import HttpTransport
+from cloudshell.iac.terraform.services.resumable_download import ResumableDownload
+from cloudshell.iac.terraform.services.tf_binary_store import TfBinaryStore
+from cloudshell.iac.terraform.services.tf_version_selector import TfVersionSelector
+
+TerraformExecutable = namedtuple('TerraformExecutable', 'path version')
 
 
 class TfExecDownloader(object):
@@ -19,43 +26,117 @@ class TfExecDownloader(object):
         self.logger = logger
 
     @staticmethod
-    @retry((HTTPError, URLError), delay=1, backoff=2, tries=5)
-    def download_terraform_executable(tf_workingdir: str, version='latest'):
-        # Used to prevent missing certificates in python 3 from failing to download terraform exe
-        ssl._create_default_https_context = ssl._create_unverified_context
-
+    @retry((requests.ConnectionError, requests.Timeout, requests.HTTPError, requests.exceptions.ChunkedEncodingError),
+           delay=1, backoff=2, tries=5)
+    def download_terraform_executable(tf_workingdir: str = None, version='latest',
+                                      cache_root_dir: str = DEFAULT_CACHE_ROOT_DIR, *,
+                                      latest_version_ttl: int = DEFAULT_LATEST_VERSION_TTL,
+                                      version_constraints: List[str] = None, logger: Logger = None,
+                                      shared_cache_dir: str = None,
+                                      shared_cache_read_only: bool = False) -> TerraformExecutable:
+        """
+        make sure the requested version exists in the binary store and return the shared executable.
+        the executable is run in place and must not be modified.
+        version 'auto' selects the newest version allowed by version_constraints, preferring versions already in store.
+        tf_workingdir is deprecated, when it is passed the executable is also copied to it (the behavior of 1.3.0)
+        """
         # Must be in format of d.dd.dd and cannot have 0 in front of a number like 0.05.05, this is valid 0.5.0
         valid_version_regex = re.compile('^([0-9]{1})\.([1-9]{0,1}[0-9]{1})\.([1-9]{0,1}[0-9]{1})$')
 
+        if sys.platform not in OS_TYPES:
+            raise ValueError('Could not find OS type. Must be 64 bit and Windows, Ubuntu, or CentOS/Redhat.')
+        os_type = OS_TYPES[sys.platform]
+        store = TfBinaryStore(cache_root_dir, shared_cache_dir, shared_cache_read_only)
+
+        if version == TF_VERSION_AUTO:
+            if version_constraints:
+                version = TfExecDownloader._select_version(store, os_type, version_constraints)
+            else:
+                version = 'latest'
         if not version:
             version = 'latest'
-        # Grabs the latest version of terraform from the hashicorp site
         if version == 'latest':
-            tfurl = TERRAFORM_LATEST_URL
-            req = Request(tfurl)
-            tfresponse = urlopen(req).read()
-            cont = json.loads(tfresponse.decode('utf-8'))
-            if 'current_version' in cont.keys():
-                version = cont['current_version']
-            else:
-                raise ValueError('Could not find latest TF version from hashicorp site')
+            version = TfExecDownloader._resolve_latest_version(store, latest_version_ttl)
 
         # Verifying values
-        if not os.path.exists(tf_workingdir):
-            raise ValueError(f'Target path: {tf_workingdir} does not exist. Cannot be sym link.')
         if valid_version_regex.match(version) is None:
             raise ValueError(f'Version {version} is not a valid format. examples 1.0.0, 0.15.2, 0.12.15')
-        if sys.platform not in OS_TYPES:
-            raise ValueError('Could not find OS type. Must be 64 bit and Windows, Ubuntu, or CentOS/Redhat.')
 
-        os_type = OS_TYPES[sys.platform]
-        # Downloads and unzips files in memory, then outputs exe to path
-        zipurl = f'{TERRAFORM_URL}/{version}/terraform_{version}_{os_type}.zip'
-        with urlopen(zipurl) as zipresp:
-            with ZipFile(BytesIO(zipresp.read())) as zfile:
-                zfile.extractall(tf_workingdir)
-
-        # Linux systems do not add .exe but windows does, adding .exe so commands will be the same on all OS's
-        if os.path.exists(f'{tf_workingdir}/terraform'):
-            os.rename(f'{tf_workingdir}/terraform', f'{tf_workingdir}/terraform.exe')
-        os.chmod(f'{tf_workingdir}/terraform.exe', 0o755)
+        if not store.has_binary(version, os_type):
+            downloads_dir = os.path.join(cache_root_dir, DOWNLOADS_DIR)
+            TfExecDownloader._download_to_store(store, version, os_type, ResumableDownload(downloads_dir, logger))
+        if tf_workingdir:
+            return TerraformExecutable(TfExecDownloader._copy_to_working_dir(store.get_binary_path(version, os_type),
+                                                                             tf_workingdir), version)
+        return TerraformExecutable(store.get_binary_path(version, os_type), version)
+
+    @staticmethod
+    def _copy_to_working_dir(exe_path: str, tf_workingdir: str) -> str:
+        warnings.warn("tf_workingdir is deprecated, the executable is run in place from the binary store",
+                      DeprecationWarning, stacklevel=3)
+        if not os.path.exists(tf_workingdir):
+            raise ValueError(f'Target path: {tf_workingdir} does not exist. Cannot be sym link.')
+        working_dir_exe_path = os.path.join(tf_workingdir, TERRAFORM_EXE_NAME)
+        shutil.copy(exe_path, working_dir_exe_path)
+        os.chmod(working_dir_exe_path, 0o755)
+        return working_dir_exe_path
+
+    @staticmethod
+    def _select_version(store: TfBinaryStore, os_type: str, version_constraints: List[str]) -> str:
+        version = TfVersionSelector.select_newest_version(store.list_versions(os_type), version_constraints)
+        if version:
+            return version
+
+        # nothing in store matches - pick the newest released version that does
+        index_resp = HttpTransport.get(TERRAFORM_RELEASES_INDEX_URL)
+        index_resp.raise_for_status()
+        releases = index_resp.json()
+        version = TfVersionSelector.select_newest_version(releases.get('versions', {}).keys(), version_constraints)
+        if not version:
+            raise ValueError(f'No terraform release matches the required version {", ".join(version_constraints)}')
+        return version
+
+    @staticmethod
+    def _resolve_latest_version(store: TfBinaryStore, latest_version_ttl: int) -> str:
+        # Resolved versions are shared by all drivers, the hashicorp site is queried only once the ttl expired
+        version = store.get_cached_latest_version(latest_version_ttl)
+        if version:
+            return version
+
+        # Grabs the latest version of terraform from the hashicorp site
+        tfresponse = HttpTransport.get(TERRAFORM_LATEST_URL)
+        tfresponse.raise_for_status()
+        cont = tfresponse.json()
+        if 'current_version' in cont.keys():
+            version = cont['current_version']
+        else:
+            raise ValueError('Could not find latest TF version from hashicorp site')
+
+        store.set_cached_latest_version(version)
+        return version
+
+    @staticmethod
+    def _download_to_store(store: TfBinaryStore, version: str, os_type: str, resumable_download: ResumableDownload) -> str:
+        zip_name = f'terraform_{version}_{os_type}.zip'
+        sums_resp = HttpTransport.get(f'{TERRAFORM_URL}/{version}/terraform_{version}_SHA256SUMS')
+        sums_resp.raise_for_status()
+        expected_sha256 = TfExecDownloader.get_expected_sha256(sums_resp.text, zip_name)
+
+        # Streams the zip to disk (resuming a failed attempt) and verifies it before publishing
+        download_dir = tempfile.mkdtemp()
+        try:
+            zip_path = os.path.join(download_dir, zip_name)
+            resumable_download.download(f'{TERRAFORM_URL}/{version}/{zip_name}', zip_path,
+                                        ResumableDownload.verify_sha256(expected_sha256))
+            return store.add_binary_from_zip(version, os_type, zip_path)
+        finally:
+            shutil.rmtree(download_dir, ignore_errors=True)
+
+    @staticmethod
+    def get_expected_sha256(sha256sums: str, file_name: str) -> str:
+        """ SHA256SUMS has one '<sha256>  <file name>' line per released file """
+        for line in sha256sums.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[1] == file_name:
+                return parts[0].lower()
+        raise ValueError(f'No checksum found for {file_name}')
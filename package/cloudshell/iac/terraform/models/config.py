@@ -1,10 +1,41 @@
 from typing import Dict
 
+from cloudshell.iac.terraform.constants import DEFAULT_CACHE_ROOT_DIR, DEFAULT_LATEST_VERSION_TTL, \
+    DEFAULT_PLUGIN_CACHE_MAX_SIZE_MB, DEFAULT_WARM_WORKING_DIRS_MAX_SIZE_MB, DEFAULT_LIVE_STATUS_MIN_INTERVAL, \
+    DEFAULT_MODULE_CACHE_MAX_SIZE_MB
+
 
 class TerraformShellConfig:
     def __init__(self, write_sandbox_messages: bool = False, update_live_status: bool = False,
-                 inputs_map: Dict = None, outputs_map: Dict = None):
+                 inputs_map: Dict = None, outputs_map: Dict = None, cache_root_dir: str = None,
+                 latest_version_ttl: int = DEFAULT_LATEST_VERSION_TTL, use_plugin_cache: bool = True,
+                 plugin_cache_max_size_mb: int = DEFAULT_PLUGIN_CACHE_MAX_SIZE_MB, use_provider_mirror: bool = False,
+                 provider_mirror_dir: str = None, provider_mirror_offline: bool = False,
+                 use_module_cache: bool = True, prefetch_modules: bool = False, keep_warm_working_dir: bool = False,
+                 warm_working_dirs_max_size_mb: int = DEFAULT_WARM_WORKING_DIRS_MAX_SIZE_MB,
+                 shared_cache_dir: str = None, shared_cache_read_only: bool = False, use_json_output: bool = False,
+                 live_status_min_interval: int = DEFAULT_LIVE_STATUS_MIN_INTERVAL, skip_unchanged_init: bool = True,
+                 plugin_cache_may_break_lock_file: bool = False,
+                 module_cache_max_size_mb: int = DEFAULT_MODULE_CACHE_MAX_SIZE_MB):
         self.write_sandbox_messages = write_sandbox_messages
         self.update_live_status = update_live_status
         self.inputs_map = inputs_map
         self.outputs_map = outputs_map
+        self.cache_root_dir = cache_root_dir or DEFAULT_CACHE_ROOT_DIR
+        self.latest_version_ttl = latest_version_ttl
+        self.use_plugin_cache = use_plugin_cache
+        self.plugin_cache_max_size_mb = plugin_cache_max_size_mb
+        self.use_provider_mirror = use_provider_mirror
+        self.provider_mirror_dir = provider_mirror_dir
+        self.provider_mirror_offline = provider_mirror_offline
+        self.use_module_cache = use_module_cache
+        self.prefetch_modules = prefetch_modules
+        self.keep_warm_working_dir = keep_warm_working_dir
+        self.warm_working_dirs_max_size_mb = warm_working_dirs_max_size_mb
+        self.shared_cache_dir = shared_cache_dir
+        self.shared_cache_read_only = shared_cache_read_only
+        self.use_json_output = use_json_output
+        self.live_status_min_interval = live_status_min_interval
+        self.skip_unchanged_init = skip_unchanged_init
+        self.plugin_cache_may_break_lock_file = plugin_cache_may_break_lock_file
+        self.module_cache_max_size_mb = module_cache_max_size_mb
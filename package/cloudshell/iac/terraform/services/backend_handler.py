@@ -23,6 +23,7 @@ class BackendHandler(object):
             self._reservation_id = shell_helper.sandbox_id
             self._backend_resource = backend_resource
             self._uuid = uuid
+            self._backend_data = None
             self._backend_secret_vars = {}
             self.backend_exists = bool(backend_resource)
             # If the resource was referenced but not exists it would yield an Exception
@@ -34,28 +35,36 @@ class BackendHandler(object):
             shell_helper.logger.exception(msg)
             raise ValueError(msg)
 
-    def generate_backend_cfg_file(self):
-        if self.backend_exists:
-            params = [InputNameValue("tf_state_unique_name", f"{self._reservation_id}_{self._uuid}.tf.state")]
-            try:
-                backend_data = self._shell_helper.api.ExecuteCommand(
-                    self._reservation_id,
-                    self._backend_resource,
-                    "Resource",
-                    GET_BACKEND_DATA_COMMAND,
-                    params,
-                    False
-                )
-            except Exception as e:
-                msg = f"Was not able to generate remote tf state file : {str(e)}"
-                self._shell_helper.logger.exception(msg)
-                raise ValueError(msg)
+    def set_working_dir(self, working_dir: str) -> None:
+        self._working_dir = working_dir
 
-            backend_data_json = json.loads(backend_data.Output)
+    def fetch_backend_data(self) -> None:
+        """ get the backend data from the backend resource, can run before the working dir is ready """
+        if not self.backend_exists or self._backend_data is not None:
+            return
+        params = [InputNameValue("tf_state_unique_name", f"{self._reservation_id}_{self._uuid}.tf.state")]
+        try:
+            backend_data = self._shell_helper.api.ExecuteCommand(
+                self._reservation_id,
+                self._backend_resource,
+                "Resource",
+                GET_BACKEND_DATA_COMMAND,
+                params,
+                False
+            )
+        except Exception as e:
+            msg = f"Was not able to generate remote tf state file : {str(e)}"
+            self._shell_helper.logger.exception(msg)
+            raise ValueError(msg)
 
+        self._backend_data = json.loads(backend_data.Output)
+
+    def generate_backend_cfg_file(self):
+        if self.backend_exists:
+            self.fetch_backend_data()
             with open(os.path.join(self._working_dir, "backend.tf"), "w") as backend_file:
-                backend_file.write(backend_data_json['backend_data']['tf_state_file_string'])
-            self._backend_secret_vars = backend_data_json["backend_secret_vars"]
+                backend_file.write(self._backend_data['backend_data']['tf_state_file_string'])
+            self._backend_secret_vars = self._backend_data["backend_secret_vars"]
 
     def delete_backend_tf_state_file(self):
         if self.backend_exists:
@@ -1,5 +1,7 @@
 import os
 from abc import ABCMeta
+from typing import Dict
+
 from cloudshell.iac.terraform.models.shell_helper import ShellHelperObject
 
 
@@ -7,9 +9,13 @@ class BaseCloudProviderEnvVarHandler(metaclass=ABCMeta):
     def __init__(self):
         pass
 
-    def set_env_vars_based_on_clp(self):
+    def get_env_vars_based_on_clp(self) -> Dict[str, str]:
+        """ only reads the cloud provider, so it can run in a worker thread """
         raise NotImplementedError()
 
+    def set_env_vars_based_on_clp(self):
+        os.environ.update(self.get_env_vars_based_on_clp())
+
     @staticmethod
     def does_attribute_match(clp_res_model, clp_attribute, attr_name_to_check) -> bool:
         if f"{clp_res_model}.{clp_attribute.Name}" == attr_name_to_check or clp_attribute.Name == attr_name_to_check \
@@ -25,7 +31,8 @@ class AWSCloudProviderEnvVarHandler(BaseCloudProviderEnvVarHandler):
         self._clp_resource_attributes = clp_resource_attributes
         self._shell_helper = shell_helper
 
-    def set_env_vars_based_on_clp(self):
+    def get_env_vars_based_on_clp(self) -> Dict[str, str]:
+        env_vars = {}
         dec_access_key = ""
         dec_secret_key = ""
         region_flag = False
@@ -36,15 +43,16 @@ class AWSCloudProviderEnvVarHandler(BaseCloudProviderEnvVarHandler):
             if self.does_attribute_match(self._clp_res_model, attr, "AWS Secret Access Key"):
                 dec_secret_key = self._shell_helper.api.DecryptPassword(attr.Value).Value
             if self.does_attribute_match(self._clp_res_model, attr, "Region"):
-                os.environ["AWS_DEFAULT_REGION"] = attr.Value
+                env_vars["AWS_DEFAULT_REGION"] = attr.Value
                 region_flag = True
         if not region_flag:
             raise ValueError("Region was not found on AWS Cloud Provider")
 
         # We must check both keys exist...if not then the EC2 Execution Server profile would be used (Role)
         if dec_access_key and dec_secret_key:
-            os.environ["AWS_ACCESS_KEY_ID"] = dec_access_key
-            os.environ["AWS_SECRET_ACCESS_KEY"] = dec_secret_key
+            env_vars["AWS_ACCESS_KEY_ID"] = dec_access_key
+            env_vars["AWS_SECRET_ACCESS_KEY"] = dec_secret_key
+        return env_vars
 
 
 class AzureCloudProviderEnvVarHandler(BaseCloudProviderEnvVarHandler):
@@ -54,16 +62,18 @@ class AzureCloudProviderEnvVarHandler(BaseCloudProviderEnvVarHandler):
         self._clp_resource_attributes = clp_resource_attributes
         self._shell_helper = shell_helper
 
-    def set_env_vars_based_on_clp(self):
+    def get_env_vars_based_on_clp(self) -> Dict[str, str]:
+        env_vars = {}
         for attr in self._clp_resource_attributes:
             if self.does_attribute_match(self._clp_res_model, attr, "Azure Subscription ID"):
-                os.environ["ARM_SUBSCRIPTION_ID"] = attr.Value
+                env_vars["ARM_SUBSCRIPTION_ID"] = attr.Value
             if self.does_attribute_match(self._clp_res_model, attr, "Azure Tenant ID"):
-                os.environ["ARM_TENANT_ID"] = attr.Value
+                env_vars["ARM_TENANT_ID"] = attr.Value
             if self.does_attribute_match(self._clp_res_model, attr, "Azure Application ID"):
-                os.environ["ARM_CLIENT_ID"] = attr.Value
+                env_vars["ARM_CLIENT_ID"] = attr.Value
             if self.does_attribute_match(self._clp_res_model, attr, "Azure Application Key"):
-                os.environ["ARM_CLIENT_SECRET"] = self._shell_helper.api.DecryptPassword(attr.Value).Value
+                env_vars["ARM_CLIENT_SECRET"] = self._shell_helper.api.DecryptPassword(attr.Value).Value
+        return env_vars
 
 
 class GCPCloudProviderEnvVarHandler(BaseCloudProviderEnvVarHandler):
@@ -73,15 +83,17 @@ class GCPCloudProviderEnvVarHandler(BaseCloudProviderEnvVarHandler):
         self._clp_resource_attributes = clp_resource_attributes
         self._shell_helper = shell_helper
 
-    def set_env_vars_based_on_clp(self):
+    def get_env_vars_based_on_clp(self) -> Dict[str, str]:
+        env_vars = {}
         project_flag = False
         cred_flag = False
         for attr in self._clp_resource_attributes:
             if self.does_attribute_match(self._clp_res_model, attr, "Google Cloud Provider.Credentials Json Path"):
-                os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = attr.Value
+                env_vars["GOOGLE_APPLICATION_CREDENTIALS"] = attr.Value
                 cred_flag = True
             if self.does_attribute_match(self._clp_res_model, attr, "Google Cloud Provider.project"):
-                os.environ["GOOGLE_PROJECT"] = attr.Value
+                env_vars["GOOGLE_PROJECT"] = attr.Value
                 project_flag = True
         if not cred_flag and not project_flag:
             self._shell_helper.sandbox_messages.write_message("Project ID was not found on GCP Cloud Provider")
+        return env_vars
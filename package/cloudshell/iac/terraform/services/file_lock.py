@@ -0,0 +1,68 @@
+import os
+import threading
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _get_thread_lock(lock_file_path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(os.path.abspath(lock_file_path), threading.Lock())
+
+
+class FileLock(object):
+    """
+    Advisory lock on a lock file, shared by all driver processes on the execution server.
+    OS file locks are held per process, so threads of the same process are serialized with a thread lock as well.
+    Shared locks are only supported on POSIX, on Windows every lock is exclusive.
+    """
+    def __init__(self, lock_file_path: str, shared: bool = False):
+        self._lock_file_path = lock_file_path
+        self._shared = shared
+        self._thread_lock = _get_thread_lock(lock_file_path)
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            os.makedirs(os.path.dirname(self._lock_file_path), exist_ok=True)
+            self._file = open(self._lock_file_path, "a+")
+            if os.name == "nt":
+                self._lock_windows()
+            else:
+                fcntl.lockf(self._file, fcntl.LOCK_SH if self._shared else fcntl.LOCK_EX)
+        except Exception:
+            self._close()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if os.name == "nt":
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.lockf(self._file, fcntl.LOCK_UN)
+        finally:
+            self._close()
+
+    def _lock_windows(self):
+        self._file.seek(0)
+        while True:
+            try:
+                # LK_LOCK retries for 10 seconds before raising
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
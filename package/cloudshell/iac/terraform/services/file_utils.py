@@ -0,0 +1,44 @@
+import json
+import os
+import tempfile
+
+
+def read_json(file_path: str) -> dict:
+    """ the json object of the file, empty when the file is missing or not valid """
+    try:
+        with open(file_path) as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def atomic_write(file_path: str, content: str) -> None:
+    """ write to a temp file and replace, so other drivers never read a partial file """
+    dir_path = os.path.dirname(file_path)
+    os.makedirs(dir_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}-", dir=dir_path)
+    try:
+        with os.fdopen(fd, "w") as tmp_file:
+            tmp_file.write(content)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(file_path: str, data) -> None:
+    atomic_write(file_path, json.dumps(data))
+
+
+def get_dir_size(dir_path: str) -> int:
+    """ total size of the files in the dir, symlinks are not followed """
+    size = 0
+    for root, _, file_names in os.walk(dir_path):
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            if not os.path.islink(file_path):
+                size += os.path.getsize(file_path)
+    return size
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import time
+from logging import Logger
+
+import requests
+
+from cloudshell.iac.terraform.constants import GITHUB_RATE_LIMIT_DIR, GITHUB_RATE_LIMIT_RESERVE, \
+    GITHUB_RATE_LIMIT_MAX_WAIT
+from cloudshell.iac.terraform.services.file_lock import FileLock
+from cloudshell.iac.terraform.services.file_utils import read_json, atomic_write_json
+from cloudshell.iac.terraform.services.http_transport import HttpTransport
+
+
+class GitHubRateLimitError(Exception):
+    pass
+
+
+class GitHubApiClient(object):
+    """
+    GitHub API requests that respect the rate limit of the token.
+    The X-RateLimit-Remaining/Reset values of the last response are shared by all driver processes on the
+    execution server (per token), so concurrent deployments throttle together instead of exhausting the budget.
+    When the budget is used up and resets within max_wait seconds the request waits for the reset,
+    otherwise GitHubRateLimitError is raised.
+    """
+    def __init__(self, token: str, cache_root_dir: str, logger: Logger, max_wait: int = GITHUB_RATE_LIMIT_MAX_WAIT):
+        self._headers = {'Authorization': f'token {token}'} if token else {}
+        token_id = hashlib.sha256(token.encode()).hexdigest() if token else "anonymous"
+        self._state_path = os.path.join(cache_root_dir, GITHUB_RATE_LIMIT_DIR, f"{token_id}.json")
+        self._logger = logger
+        self._max_wait = max_wait
+
+    def get(self, url: str, headers: dict = None, **kwargs) -> requests.Response:
+        self._wait_for_budget()
+        response = HttpTransport.get(url, headers=dict(self._headers, **(headers or {})), **kwargs)
+        self._update_budget(response)
+
+        if response.status_code in (403, 429) and self._is_rate_limited(response):
+            retry_after = self._get_retry_after(response)
+            if retry_after > self._max_wait:
+                response.close()
+                raise GitHubRateLimitError(f"GitHub API rate limit exceeded, resets in {int(retry_after)} seconds")
+            self._logger.warning(f"GitHub API rate limit exceeded, retrying in {int(retry_after)} seconds")
+            response.close()
+            time.sleep(retry_after)
+            response = HttpTransport.get(url, headers=dict(self._headers, **(headers or {})), **kwargs)
+            self._update_budget(response)
+        return response
+
+    def get_remaining_budget(self) -> int:
+        """ remaining requests of the token, -1 when unknown or reset already """
+        state = self._read_state()
+        if not state or state.get("reset", 0) <= time.time():
+            return -1
+        return state.get("remaining", -1)
+
+    def _wait_for_budget(self) -> None:
+        with FileLock(f"{self._state_path}.lock"):
+            state = self._read_state()
+            remaining = state.get("remaining")
+            wait_time = state.get("reset", 0) - time.time()
+            if remaining is None or remaining > GITHUB_RATE_LIMIT_RESERVE or wait_time <= 0:
+                if remaining is not None and wait_time > 0:
+                    # reserve the request, so concurrent drivers see the budget shrinking before they get a response
+                    self._write_state(dict(state, remaining=remaining - 1))
+                return
+
+        if wait_time > self._max_wait:
+            raise GitHubRateLimitError(f"GitHub API rate limit budget used up ({remaining} requests left), "
+                                       f"resets in {int(wait_time)} seconds")
+        self._logger.warning(f"GitHub API rate limit budget low ({remaining} requests left), "
+                             f"waiting {int(wait_time)} seconds for reset")
+        time.sleep(wait_time)
+
+    def _update_budget(self, response: requests.Response) -> None:
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        with FileLock(f"{self._state_path}.lock"):
+            self._write_state({"remaining": int(remaining), "reset": int(reset)})
+
+    @staticmethod
+    def _is_rate_limited(response: requests.Response) -> bool:
+        return response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers
+
+    @staticmethod
+    def _get_retry_after(response: requests.Response) -> float:
+        if "Retry-After" in response.headers:
+            return float(response.headers["Retry-After"])
+        return max(float(response.headers.get("X-RateLimit-Reset", 0)) - time.time(), 0)
+
+    def _read_state(self) -> dict:
+        return read_json(self._state_path)
+
+    def _write_state(self, state: dict) -> None:
+        atomic_write_json(self._state_path, state)
@@ -1,9 +1,14 @@
 import os
+import shutil
 import tempfile
 from typing import Dict, List
+from urllib.parse import quote
 from zipfile import ZipFile
 import requests
 
+from cloudshell.iac.terraform.services.http_transport import HttpTransport
+from cloudshell.iac.terraform.services.resumable_download import ResumableDownload
+
 
 class GitlabApiHttpError(Exception):
     pass
@@ -15,12 +20,11 @@ class GitlabApiHandler:
         self.host = host
         self.token = token
         self.base_url = f"{self.protocol}://{self.host}/api/v4"
-        self.session = requests.Session()
-        if self.token:
-            self._add_auth_header()
+        # auth is sent per request, the pooled session is shared with other hosts and tokens
+        self._headers = {"PRIVATE-TOKEN": self.token} if self.token else {}
 
-    def _add_auth_header(self):
-        self.session.headers.update({"PRIVATE-TOKEN": self.token})
+    def _get(self, url: str, params: dict = None, headers: Dict[str, str] = None, **kwargs) -> requests.Response:
+        return HttpTransport.get(url, params=params, headers=dict(self._headers, **(headers or {})), **kwargs)
 
     @staticmethod
     def _validate_response(response: requests.Response):
@@ -29,10 +33,9 @@ class GitlabApiHandler:
 
     def get_project_data(self, project_name: str) -> dict:
         url = f"{self.base_url}/projects"
-        with self.session as session:
-            response = session.get(url=url, params={"search": project_name})
-            self._validate_response(response)
-            projects_list = response.json()
+        response = self._get(url, params={"search": project_name})
+        self._validate_response(response)
+        projects_list = response.json()
         if not projects_list:
             raise ValueError(f"No Project found with name '{project_name}'")
         return projects_list[0]
@@ -41,20 +44,52 @@ class GitlabApiHandler:
         project_data = self.get_project_data(project_name)
         return project_data["id"]
 
+    def get_project_id_from_path(self, project_path: str) -> int:
+        """
+        exact lookup by the full project path ("namespace/project"), unlike the fuzzy search of get_project_data
+        https://docs.gitlab.com/ee/api/projects.html#get-single-project
+        """
+        url = f"{self.base_url}/projects/{quote(project_path, safe='')}"
+        response = self._get(url)
+        self._validate_response(response)
+        return response.json()["id"]
+
     def get_project_directory_info(self, project_id: int, path: str, branch: str = "main") -> List[Dict]:
         """
         get a list of data on files inside directory
         list of dicts. ex: {id, name, type, path, mode}
         """
         url = f"{self.base_url}/projects/{project_id}/repository/tree"
-        with self.session as session:
-            response = session.get(url=url, params={"path": path, "ref": branch})
-            self._validate_response(response)
-            directory_info = response.json()
+        response = self._get(url, params={"path": path, "ref": branch})
+        self._validate_response(response)
+        directory_info = response.json()
         if not directory_info:
             raise ValueError(f"No data found at repo path '{path}' for branch '{branch}'")
         return directory_info
 
+    def get_commit_sha(self, project_id: int, ref: str = "") -> str:
+        """
+        resolve a branch, tag or commit to the full commit sha
+        empty ref resolves to the head of the default branch
+        """
+        response = self.get_commits_response(project_id, ref)
+        return self.get_commit_sha_from_response(response, project_id, ref)
+
+    def get_commits_response(self, project_id: int, ref: str = "", headers: Dict[str, str] = None) -> requests.Response:
+        """ latest commit of the ref, headers can make the request conditional (response may be '304 Not Modified') """
+        url = f"{self.base_url}/projects/{project_id}/repository/commits"
+        params = {"per_page": 1}
+        if ref:
+            params["ref_name"] = ref
+        return self._get(url, params=params, headers=headers)
+
+    def get_commit_sha_from_response(self, response: requests.Response, project_id: int, ref: str = "") -> str:
+        self._validate_response(response)
+        commits = response.json()
+        if not commits:
+            raise ValueError(f"No commit found. Project ID: {project_id}. Ref: '{ref}'")
+        return commits[0]["id"]
+
     def get_directory_zip_bytes(self, project_id: int, path="", sha="") -> bytes:
         """
         nested path does not have to be url encoded
@@ -71,10 +106,9 @@ class GitlabApiHandler:
             params["path"] = path
         if sha:
             params["sha"] = sha
-        with self.session as session:
-            response = session.get(url=url, params=params)
-            self._validate_response(response)
-            archive_bytes = response.content
+        response = self._get(url, params=params)
+        self._validate_response(response)
+        archive_bytes = response.content
         if not archive_bytes:
             raise ValueError(f"No archive data found. Project ID: {project_id}. Path: '{path}'. SHA: '{sha}'")
         return archive_bytes
@@ -97,6 +131,27 @@ class GitlabApiHandler:
                                                 repo_dir_name=repo_dir_name)
         return working_dir
 
+    def download_archive_to_dir(self, project_id: int, path: str, sha: str, dest_dir: str,
+                                resumable_download: ResumableDownload, zip_name="repo.zip"):
+        """
+        stream the archive to disk and extract it to dest_dir, dest_dir will contain <path>
+        (the archive folder is renamed to it). a failed download is resumed by the next attempt
+        """
+        url = f"{self.base_url}/projects/{project_id}/repository/archive.zip"
+        params = {"sha": sha}
+        if path:
+            params["path"] = path
+        repo_temp_dir = tempfile.mkdtemp()
+        try:
+            repo_zip_path = os.path.join(repo_temp_dir, zip_name)
+            resumable_download.download(url, repo_zip_path, ResumableDownload.verify_zip, self._get, params=params)
+            with ZipFile(repo_zip_path, 'r') as zip_file:
+                zip_file.extractall(repo_temp_dir)
+                first_folder_in_zip = zip_file.namelist()[0][:-1]
+            os.rename(os.path.join(repo_temp_dir, first_folder_in_zip), dest_dir)
+        finally:
+            shutil.rmtree(repo_temp_dir, ignore_errors=True)
+
     @staticmethod
     def _prepare_working_dir(repo_zip_file_name: str, path_in_repo: str, zip_bytes: bytes, repo_dir_name: str):
         """
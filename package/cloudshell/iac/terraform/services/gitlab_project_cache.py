@@ -0,0 +1,33 @@
+import os
+from typing import Optional
+
+from cloudshell.iac.terraform.constants import GITLAB_PROJECTS_FILE
+from cloudshell.iac.terraform.services.file_lock import FileLock
+from cloudshell.iac.terraform.services.file_utils import read_json, atomic_write_json
+
+
+class GitlabProjectCache(object):
+    """ Project path (namespace/project) to project id of every GitLab host, shared by all runs on the server """
+    def __init__(self, cache_root_dir: str):
+        self._cache_path = os.path.join(cache_root_dir, GITLAB_PROJECTS_FILE)
+
+    def get_project_id(self, host: str, project_path: str) -> Optional[int]:
+        return self._read().get(f"{host}/{project_path}")
+
+    def set_project_id(self, host: str, project_path: str, project_id: int) -> None:
+        with FileLock(f"{self._cache_path}.lock"):
+            projects = self._read()
+            projects[f"{host}/{project_path}"] = project_id
+            self._write(projects)
+
+    def remove_project_id(self, host: str, project_path: str) -> None:
+        with FileLock(f"{self._cache_path}.lock"):
+            projects = self._read()
+            if projects.pop(f"{host}/{project_path}", None) is not None:
+                self._write(projects)
+
+    def _read(self) -> dict:
+        return read_json(self._cache_path)
+
+    def _write(self, projects: dict) -> None:
+        atomic_write_json(self._cache_path, projects)
@@ -0,0 +1,47 @@
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from cloudshell.iac.terraform.constants import HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, \
+    HTTP_RETRIES
+
+# transient server errors are retried by the transport, rate limits (403/429) are handled by the callers
+RETRY_STATUS_CODES = [500, 502, 503, 504]
+
+
+class HttpTransport(object):
+    """
+    One pooled, keep-alive HTTP session shared by all downloaders and api handlers of the driver process,
+    so connections (and TLS handshakes) to the same hosts are reused during a deployment and across runs.
+    Requests get a default timeout and idempotent requests are retried on connection errors and 5xx responses.
+    """
+    _session = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        with cls._session_lock:
+            if cls._session is None:
+                cls._session = cls._create_session()
+            return cls._session
+
+    @classmethod
+    def get(cls, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        return cls.get_session().get(url, **kwargs)
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        # only idempotent methods are retried (urllib3 default)
+        retries = Retry(total=HTTP_RETRIES, backoff_factor=1, status_forcelist=RETRY_STATUS_CODES,
+                        raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retries)
+        session = requests.Session()
+        # the session is shared by all hosts and tokens, cookies must not carry state between requests
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
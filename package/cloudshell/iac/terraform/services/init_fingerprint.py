@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Tuple
+
+from cloudshell.iac.terraform.constants import TF_LOCK_FILE_NAME, TF_INIT_FINGERPRINT_FILE, TF_MODULE_FILE_EXTENSIONS
+
+
+class InitFingerprint(object):
+    """
+    Fingerprint of everything terraform init depends on, recorded in .terraform after a successful init.
+    The dependencies part covers the module files, the terraform version and executable (path, size and mtime, the
+    version of a local executable is unknown) and the lock file (modules and providers),
+    the backend part covers backend.tf and the backend config (values are hashed, never stored).
+    A working dir reused from an earlier run needs no init when both parts match, and only the part that changed
+    has to be initialized otherwise.
+    """
+    def __init__(self, tf_working_dir: str, tf_version: str, backend_config_vars: Dict[str, str],
+                 tf_exe_path: str = ""):
+        self._tf_working_dir = tf_working_dir
+        self._tf_version = tf_version
+        self._tf_exe_path = tf_exe_path
+        self._backend_config_vars = backend_config_vars or {}
+        self._fingerprint_path = os.path.join(tf_working_dir, ".terraform", TF_INIT_FINGERPRINT_FILE)
+
+    def compare(self) -> Tuple[bool, bool]:
+        """ returns whether the dependencies and the backend match the recorded fingerprint """
+        try:
+            with open(self._fingerprint_path) as fingerprint_file:
+                recorded = json.load(fingerprint_file)
+        except (OSError, ValueError):
+            return False, False
+        # the plugin cache may have evicted providers the working dir links to
+        dependencies_match = recorded.get("dependencies") == self._get_dependencies_digest() and \
+            self._are_providers_installed()
+        return dependencies_match, recorded.get("backend") == self._get_backend_digest()
+
+    def record(self) -> None:
+        # init of a module without providers, modules and backend does not create .terraform
+        os.makedirs(os.path.dirname(self._fingerprint_path), exist_ok=True)
+        with open(self._fingerprint_path, "w") as fingerprint_file:
+            json.dump({"dependencies": self._get_dependencies_digest(), "backend": self._get_backend_digest()},
+                      fingerprint_file)
+
+    def clear(self) -> None:
+        """ an interrupted init leaves .terraform partially updated, the fingerprint must not match it """
+        if os.path.exists(self._fingerprint_path):
+            os.remove(self._fingerprint_path)
+
+    def _get_dependencies_digest(self) -> str:
+        digest = hashlib.sha256(f"terraform {self._tf_version}\n{self._get_executable_id()}\n".encode())
+        for rel_path in self._get_module_files() + [TF_LOCK_FILE_NAME]:
+            self._update_with_file(digest, rel_path)
+        return digest.hexdigest()
+
+    def _get_executable_id(self) -> str:
+        try:
+            exe_stat = os.stat(self._tf_exe_path)
+        except OSError:
+            return f"{self._tf_exe_path} missing"
+        return f"{self._tf_exe_path} {exe_stat.st_size} {exe_stat.st_mtime_ns}"
+
+    def _get_backend_digest(self) -> str:
+        digest = hashlib.sha256()
+        self._update_with_file(digest, "backend.tf")
+        for key in sorted(self._backend_config_vars):
+            digest.update(f"{key}={self._backend_config_vars[key]}\n".encode())
+        return digest.hexdigest()
+
+    def _get_module_files(self) -> List[str]:
+        module_files = []
+        for root, dir_names, file_names in os.walk(self._tf_working_dir):
+            dir_names[:] = [dir_name for dir_name in dir_names if dir_name != ".terraform"]
+            for file_name in file_names:
+                # tagging generates the *_override.tf files after init, they only change tags
+                if file_name.endswith(TF_MODULE_FILE_EXTENSIONS) and not file_name.endswith("_override.tf") \
+                        and file_name != "backend.tf":
+                    module_files.append(os.path.relpath(os.path.join(root, file_name), self._tf_working_dir))
+        return sorted(module_files)
+
+    def _update_with_file(self, digest, rel_path: str) -> None:
+        digest.update(f"{rel_path}\n".encode())
+        try:
+            with open(os.path.join(self._tf_working_dir, rel_path), "rb") as module_file:
+                digest.update(hashlib.sha256(module_file.read()).digest())
+        except FileNotFoundError:
+            digest.update(b"missing")
+
+    def _are_providers_installed(self) -> bool:
+        for providers_dir in [os.path.join(self._tf_working_dir, ".terraform", "providers"),
+                              os.path.join(self._tf_working_dir, ".terraform", "plugins")]:
+            for root, dir_names, file_names in os.walk(providers_dir):
+                for name in dir_names + file_names:
+                    if not os.path.exists(os.path.join(root, name)):
+                        return False
+        return True
@@ -1,17 +1,51 @@
+import time
+
 from cloudshell.api.cloudshell_api import CloudShellAPISession
 
+from cloudshell.iac.terraform.constants import DEFAULT_LIVE_STATUS_MIN_INTERVAL
+
 
 class LiveStatusUpdater:
-    def __init__(self, api: CloudShellAPISession, sandbox_id: str, update_live_status: bool):
+    def __init__(self, api: CloudShellAPISession, sandbox_id: str, update_live_status: bool,
+                 min_interval: int = DEFAULT_LIVE_STATUS_MIN_INTERVAL):
         self._api = api
         self._sandbox_id = sandbox_id
         self._update_live_status = update_live_status
+        self._min_interval = min_interval
+        self._last_update_time = None
+        self._pending_status = None
+
+    def set_service_live_status(self, service_name: str, status: str, description: str,
+                                throttle: bool = False) -> None:
+        """
+        throttled updates (e.g. resource progress) are coalesced: only the newest one is kept and it is sent once
+        min_interval seconds passed since the last update, by the next throttled update or flush().
+        other updates are sent right away, after the pending throttled update
+        """
+        if not self._update_live_status:
+            return
+        if throttle:
+            self._pending_status = (service_name, status, description)
+            self.flush()
+        else:
+            self.flush(force=True)
+            self._send(service_name, status, description)
+
+    def flush(self, force: bool = False) -> None:
+        """ send the pending throttled update if min_interval passed since the last update, or right away if forced """
+        if self._pending_status is None:
+            return
+        now = time.monotonic()
+        if not force and self._last_update_time is not None and now - self._last_update_time < self._min_interval:
+            return
+        pending_status, self._pending_status = self._pending_status, None
+        self._send(*pending_status)
 
-    def set_service_live_status(self, service_name: str, status: str, description: str) -> None:
-        if self._update_live_status:
-            self._api.SetServiceLiveStatus(
-                self._sandbox_id,
-                service_name,
-                status,
-                description
-            )
+    def _send(self, service_name: str, status: str, description: str) -> None:
+        self._last_update_time = time.monotonic()
+        self._api.SetServiceLiveStatus(
+            self._sandbox_id,
+            service_name,
+            status,
+            description
+        )
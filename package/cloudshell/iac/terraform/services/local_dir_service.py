@@ -1,12 +1,15 @@
 import logging
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from cloudshell.iac.terraform.downloaders.downloader import Downloader
+from cloudshell.iac.terraform.models.config import TerraformShellConfig
 from cloudshell.iac.terraform.models.shell_helper import ShellHelperObject
+from cloudshell.iac.terraform.services.module_prefetcher import ModulePrefetcher
 from cloudshell.iac.terraform.services.sandox_data import SandboxDataHandler
-from cloudshell.iac.terraform.constants import ATTRIBUTE_NAMES
+from cloudshell.iac.terraform.constants import ATTRIBUTE_NAMES, REPO_DIR_NAME, REPO_FILE_NAME
 
 
 def handle_remove_readonly(func, path, exc_info):
@@ -37,17 +40,21 @@ def validate_tf_exe(exe_path: str):
 class LocalDir:
     @staticmethod
     def delete_local_temp_dir(sandbox_data_handler: SandboxDataHandler, tf_working_dir: str):
+        shutil.rmtree(LocalDir.get_local_temp_dir(tf_working_dir), onerror=handle_remove_readonly)
+        sandbox_data_handler.set_tf_working_dir("")
+
+    @staticmethod
+    def get_local_temp_dir(tf_working_dir: str) -> str:
+        """ the temp dir the working dir was created in """
         tf_path = Path(tf_working_dir)
         tmp_folder_found = False
         while not tmp_folder_found:
             objects_in_folder = os.listdir(tf_path.parent.absolute())
-            if len(objects_in_folder) == 2:
-                if 'REPO' in objects_in_folder and 'repo.zip' in objects_in_folder:
-                    tmp_folder_found = True
+            # temp dir contains the repo dir, and the repo zip when the repo was not copied from the module cache
+            if REPO_DIR_NAME in objects_in_folder and set(objects_in_folder) <= {REPO_DIR_NAME, REPO_FILE_NAME}:
+                tmp_folder_found = True
             tf_path = Path(tf_path.parent.absolute())
-        tf_path_str = str(tf_path)
-        shutil.rmtree(tf_path_str, onerror=handle_remove_readonly)
-        sandbox_data_handler.set_tf_working_dir("")
+        return str(tf_path)
 
     @staticmethod
     def does_working_dir_exists(working_dir: str) -> bool:
@@ -55,25 +62,50 @@ class LocalDir:
 
     @staticmethod
     def prepare_tf_working_dir(logger: logging.Logger, sandbox_data_handler: SandboxDataHandler,
-                               shell_helper: ShellHelperObject):
+                               shell_helper: ShellHelperObject, config: TerraformShellConfig = None,
+                               reuse_module_snapshot: bool = False):
+        """
+        reuse_module_snapshot - rebuild the working dir from the module snapshot and executable recorded when
+        the working dir was created (the commit that was applied), if they are still cached
+        """
         tf_working_dir = sandbox_data_handler.get_tf_working_dir()
 
         if not (tf_working_dir and os.path.isdir(tf_working_dir)):
             # working dir doesnt exist - need to download repo and tf exec
-            downloader = Downloader(shell_helper)
-            tf_working_dir = downloader.download_terraform_module()
-
+            downloader = Downloader(shell_helper, config)
             local_tf_exe = shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.LOCAL_TERRAFORM)
-
-            # if offline, can copy local terraform exe (must exist already on ES)
-            if local_tf_exe:
-                validate_tf_exe(local_tf_exe)
-                logger.info(f"Copying Local TF exe: '{local_tf_exe}'")
-                shutil.copy(local_tf_exe, tf_working_dir)
-            else:
-                downloader.download_terraform_executable(tf_working_dir)
+            module_snapshot = sandbox_data_handler.get_module_snapshot() if reuse_module_snapshot else None
+            recorded_tf_exe = sandbox_data_handler.get_tf_exe_path() if reuse_module_snapshot else ""
+            if recorded_tf_exe and not os.path.isfile(recorded_tf_exe):
+                recorded_tf_exe = ""
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                # unless the version is selected by the module, the executable is downloaded with the module
+                tf_exe_future = None
+                if not local_tf_exe and not recorded_tf_exe and not downloader.is_executable_version_from_module():
+                    tf_exe_future = executor.submit(downloader.download_terraform_executable)
+
+                tf_working_dir = downloader.download_terraform_module(module_snapshot)
+                if config and config.prefetch_modules:
+                    ModulePrefetcher(config.cache_root_dir, logger,
+                                     downloader.create_module_cache(logger)).prefetch(tf_working_dir)
+
+                # if offline, can use local terraform exe (must exist already on ES), it is run in place
+                if local_tf_exe:
+                    validate_tf_exe(local_tf_exe)
+                    logger.info(f"Using Local TF exe: '{local_tf_exe}'")
+                    tf_exe_path, tf_version = local_tf_exe, ""
+                elif recorded_tf_exe:
+                    logger.info(f"Using recorded TF exe: '{recorded_tf_exe}'")
+                    tf_exe_path, tf_version = recorded_tf_exe, sandbox_data_handler.get_tf_version()
+                elif tf_exe_future:
+                    tf_exe_path, tf_version = tf_exe_future.result()
+                else:
+                    tf_exe_path, tf_version = downloader.download_terraform_executable(tf_working_dir)
 
             sandbox_data_handler.set_tf_working_dir(tf_working_dir)
+            sandbox_data_handler.set_tf_executable(tf_exe_path, tf_version)
+            sandbox_data_handler.set_module_snapshot(downloader.module_snapshot)
         else:
             logger.info(f"Using existing working dir = {tf_working_dir}")
         return tf_working_dir
@@ -0,0 +1,263 @@
+import collections
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+import time
+from logging import Logger
+from typing import Callable, Dict, List, Tuple
+
+import requests
+
+from cloudshell.iac.terraform.constants import TF_MODULE_CACHE_DIR, REPO_DIR_NAME, TF_MODULE_REFS_DIR, \
+    DEFAULT_MODULE_CACHE_MAX_SIZE_MB, MODULE_CACHE_MIN_AGE, CACHE_STALE_ENTRY_AGE, GIT_MIRRORS_DIR, DOWNLOADS_DIR
+from cloudshell.iac.terraform.services.file_lock import FileLock
+from cloudshell.iac.terraform.services.file_utils import read_json, atomic_write_json, get_dir_size
+from cloudshell.iac.terraform.services.working_dir_materializer import WorkingDirMaterializer
+
+WRITE_PERMISSIONS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+# the snapshot a working dir was created from, path is the module dir in the snapshot
+ModuleSnapshot = collections.namedtuple('ModuleSnapshot', 'key sha path')
+
+
+class ModuleCache(object):
+    """
+    Content addressed cache of extracted terraform modules shared by all services and sandboxes on the
+    execution server. A snapshot is keyed by (repo, commit sha, path in repo), so it never changes once published.
+    Snapshots are read-only, every service gets a private working dir materialized from the snapshot.
+    Concurrent requests for the same key (threads or driver processes) are coalesced into one download.
+    The last resolution of every branch/ref is kept with its ETag/Last-Modified for conditional requests.
+    With a shared cache dir (network mount shared by execution servers) snapshots are published to the shared dir,
+    or only read from it when it is read-only for this server, in which case missing snapshots are added locally.
+    Branch resolutions are always kept locally.
+    Snapshots are evicted least recently used first once the cache is bigger than max_size_mb, eviction also deletes
+    the git mirrors, '.part' downloads and staging dirs that were not used for CACHE_STALE_ENTRY_AGE.
+    """
+    def __init__(self, cache_root_dir: str, logger: Logger, shared_cache_dir: str = None,
+                 shared_cache_read_only: bool = False, max_size_mb: int = DEFAULT_MODULE_CACHE_MAX_SIZE_MB):
+        publish_root_dir = shared_cache_dir if shared_cache_dir and not shared_cache_read_only else cache_root_dir
+        self._cache_dir = os.path.join(publish_root_dir, TF_MODULE_CACHE_DIR)
+        self._read_only_cache_dir = os.path.join(shared_cache_dir, TF_MODULE_CACHE_DIR) \
+            if shared_cache_dir and shared_cache_read_only else ""
+        self._refs_dir = os.path.join(cache_root_dir, TF_MODULE_CACHE_DIR, TF_MODULE_REFS_DIR)
+        self._git_mirrors_dir = os.path.join(cache_root_dir, GIT_MIRRORS_DIR)
+        self._downloads_dir = os.path.join(cache_root_dir, DOWNLOADS_DIR)
+        self._max_size = max_size_mb * 1024 * 1024
+        self._logger = logger
+        self._materializer = WorkingDirMaterializer(logger)
+
+    @staticmethod
+    def get_key(repo: str, sha: str, path: str) -> str:
+        return hashlib.sha256(f"{repo}\n{sha}\n{path.strip('/')}".encode()).hexdigest()
+
+    def get_snapshot_dir(self, key: str) -> str:
+        if self._read_only_cache_dir and os.path.isdir(os.path.join(self._read_only_cache_dir, key)):
+            return os.path.join(self._read_only_cache_dir, key)
+        return os.path.join(self._cache_dir, key)
+
+    def has_snapshot(self, key: str) -> bool:
+        return os.path.isdir(self.get_snapshot_dir(key))
+
+    def resolve_ref(self, repo: str, ref: str, request: Callable[[Dict[str, str]], requests.Response],
+                    get_sha: Callable[[requests.Response], str]) -> str:
+        """
+        resolve a branch/ref to a commit sha. request(headers) is sent with If-None-Match/If-Modified-Since
+        of the last resolution, a '304 Not Modified' response returns the commit sha of the last resolution.
+        get_sha(response) returns the commit sha of any other response (and raises on errors)
+        """
+        ref_path = self._get_ref_path(repo, ref)
+        ref_data = read_json(ref_path)
+
+        headers = {}
+        if ref_data.get("etag"):
+            headers["If-None-Match"] = ref_data["etag"]
+        if ref_data.get("last_modified"):
+            headers["If-Modified-Since"] = ref_data["last_modified"]
+
+        response = request(headers)
+        if response.status_code == 304 and ref_data.get("sha"):
+            self._logger.info(f"'{ref}' not modified since the last resolution")
+            return ref_data["sha"]
+
+        sha = get_sha(response)
+        etag = response.headers.get("ETag", "")
+        last_modified = response.headers.get("Last-Modified", "")
+        if etag or last_modified:
+            atomic_write_json(ref_path, {"sha": sha, "etag": etag, "last_modified": last_modified})
+        return sha
+
+    def get_cached_ref_sha(self, repo: str, ref: str) -> str:
+        """ commit sha of the last resolution of the branch/ref, empty when it was never resolved """
+        return read_json(self._get_ref_path(repo, ref)).get("sha", "")
+
+    def get_or_add_snapshot(self, key: str, fetch: Callable[[str], None]) -> str:
+        """
+        return the snapshot dir of the key, calling fetch(dest_dir) to create it when it is not cached yet.
+        fetch must create dest_dir with the repo contents.
+        """
+        snapshot_dir = self.get_snapshot_dir(key)
+        if self.has_snapshot(key):
+            self._logger.info(f"Module cache hit: '{snapshot_dir}'")
+            return snapshot_dir
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        with FileLock(f"{snapshot_dir}.lock"):
+            # another thread or driver may have published the snapshot while we waited for the lock
+            if self.has_snapshot(key):
+                self._logger.info(f"Module cache hit: '{snapshot_dir}'")
+                return snapshot_dir
+
+            self._logger.info(f"Module cache miss, downloading module to '{snapshot_dir}'")
+            staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=self._cache_dir)
+            try:
+                staging_repo_dir = os.path.join(staging_dir, REPO_DIR_NAME)
+                fetch(staging_repo_dir)
+                self._set_read_only(staging_repo_dir)
+                # publish with a single rename, so a snapshot is never seen partially written
+                try:
+                    os.rename(staging_repo_dir, snapshot_dir)
+                except OSError:
+                    # published by another server, whose lock was not visible (or the dir listing was stale)
+                    if not self.has_snapshot(key):
+                        raise
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+        return snapshot_dir
+
+    def create_working_dir(self, key: str, path_in_repo: str) -> str:
+        """
+        materialize the snapshot in a private temp dir, returns <temp dir>/REPO/<path_in_repo>
+        this method will NOT delete the temp directory, whoever instantiates should clean up
+        """
+        repo_temp_dir = tempfile.mkdtemp()
+        repo_dir = os.path.join(repo_temp_dir, REPO_DIR_NAME)
+        self.materialize_snapshot(key, repo_dir)
+        working_dir = os.path.join(repo_dir, *[x for x in path_in_repo.split("/") if x])
+        self._logger.info(f"Working dir = {working_dir}")
+        return working_dir
+
+    def create_working_dir_if_cached(self, key: str, path_in_repo: str) -> str:
+        """
+        create_working_dir under the snapshot lock, so the snapshot is not evicted while it is materialized.
+        returns an empty string when the snapshot is not cached
+        """
+        os.makedirs(self._cache_dir, exist_ok=True)
+        with FileLock(f"{os.path.join(self._cache_dir, key)}.lock"):
+            if not self.has_snapshot(key):
+                return ""
+            return self.create_working_dir(key, path_in_repo)
+
+    def _get_ref_path(self, repo: str, ref: str) -> str:
+        return os.path.join(self._refs_dir, f"{self.get_key(repo, ref, '')}.json")
+
+    def materialize_snapshot(self, key: str, dest_dir: str) -> None:
+        """ materialize the snapshot at dest_dir, which must not exist yet """
+        snapshot_dir = self.get_snapshot_dir(key)
+        self._mark_used(snapshot_dir)
+        self._materializer.materialize(snapshot_dir, dest_dir)
+
+    def evict(self) -> None:
+        """
+        delete least recently used snapshots until the cache fits max size, snapshots used in the last
+        MODULE_CACHE_MIN_AGE are never evicted (they may be materialized right now). then delete stale git mirrors,
+        downloads and staging dirs
+        """
+        if not os.path.isdir(self._cache_dir):
+            return
+        with FileLock(f"{self._cache_dir}.evict.lock"):
+            entries = self._get_snapshot_entries()
+            total_size = sum(size for _, _, size in entries)
+            now = time.time()
+            for snapshot_dir, last_used, size in sorted(entries, key=lambda x: x[1]):
+                if total_size <= self._max_size or now - last_used < MODULE_CACHE_MIN_AGE:
+                    break
+                self._logger.info(f"Evicting module snapshot: '{snapshot_dir}'")
+                with FileLock(f"{snapshot_dir}.lock"):
+                    self._remove_dir(snapshot_dir)
+                    self._remove_file(f"{snapshot_dir}.lock")
+                total_size -= size
+            self._evict_stale_entries(now)
+
+    def _evict_stale_entries(self, now: float) -> None:
+        for stale_path in self._get_stale_paths(now):
+            self._logger.info(f"Deleting stale cache entry: '{stale_path}'")
+            if stale_path.endswith(".part"):
+                with FileLock(f"{stale_path}.lock"):
+                    self._remove_file(stale_path)
+                    self._remove_file(f"{stale_path}.json")
+                    self._remove_file(f"{stale_path}.lock")
+            elif stale_path.endswith(".git"):
+                with FileLock(f"{stale_path}.lock"):
+                    self._remove_dir(stale_path)
+                    self._remove_file(f"{stale_path}.lock")
+            else:
+                self._remove_dir(stale_path)
+
+    def _get_stale_paths(self, now: float) -> List[str]:
+        stale_paths = []
+        for dir_path, is_stale_entry in [(self._git_mirrors_dir, lambda name: name.endswith(".git")),
+                                         (self._downloads_dir, lambda name: name.endswith(".part")),
+                                         (self._cache_dir, lambda name: name.endswith(".evicted"))]:
+            if not os.path.isdir(dir_path):
+                continue
+            for name in os.listdir(dir_path):
+                path = os.path.join(dir_path, name)
+                if (is_stale_entry(name) or name.startswith(".staging-")) and \
+                        now - os.path.getmtime(path) > CACHE_STALE_ENTRY_AGE:
+                    stale_paths.append(path)
+        return stale_paths
+
+    def _get_snapshot_entries(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        for name in os.listdir(self._cache_dir):
+            snapshot_dir = os.path.join(self._cache_dir, name)
+            if name.startswith(".") or name.endswith(".evicted") or name == TF_MODULE_REFS_DIR or \
+                    not os.path.isdir(snapshot_dir):
+                continue
+            entries.append((snapshot_dir, os.path.getmtime(snapshot_dir), get_dir_size(snapshot_dir)))
+        return entries
+
+    @staticmethod
+    def _mark_used(snapshot_dir: str) -> None:
+        try:
+            os.utime(snapshot_dir)
+        except OSError:
+            # snapshot of a shared cache published by another server
+            pass
+
+    @classmethod
+    def _remove_dir(cls, dir_path: str) -> None:
+        """ snapshots are read-only, they are made writable (top down) before they are deleted """
+        evicted_dir = f"{dir_path}.evicted"
+        try:
+            os.rename(dir_path, evicted_dir)
+        except OSError:
+            # deleted by someone else
+            return
+        for root, dir_names, file_names in os.walk(evicted_dir):
+            for name in [root] + [os.path.join(root, file_name) for file_name in file_names]:
+                cls._chmod(name, lambda mode: mode | stat.S_IWUSR)
+        shutil.rmtree(evicted_dir, ignore_errors=True)
+
+    @staticmethod
+    def _remove_file(file_path: str) -> None:
+        try:
+            os.remove(file_path)
+        except OSError:
+            # deleted by someone else, or still open on Windows
+            pass
+
+    @classmethod
+    def _set_read_only(cls, dir_path: str) -> None:
+        # dirs are changed last (bottom up), otherwise their contents can not be changed anymore
+        for root, dir_names, file_names in os.walk(dir_path, topdown=False):
+            for name in file_names + dir_names:
+                cls._chmod(os.path.join(root, name), lambda mode: mode & ~WRITE_PERMISSIONS)
+        cls._chmod(dir_path, lambda mode: mode & ~WRITE_PERMISSIONS)
+
+    @staticmethod
+    def _chmod(path: str, change_mode: Callable[[int], int]) -> None:
+        if not os.path.islink(path):
+            os.chmod(path, change_mode(stat.S_IMODE(os.stat(path).st_mode)))
@@ -0,0 +1,231 @@
+import json
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logging import Logger
+from typing import Dict, Match, Optional, Tuple
+from urllib.parse import urljoin, urlparse, parse_qs
+from zipfile import ZipFile
+
+from cloudshell.iac.terraform.constants import DEFAULT_TF_REGISTRY_HOST, TF_MODULES_MANIFEST, \
+    MODULE_PREFETCH_WORKERS, DOWNLOADS_DIR
+from cloudshell.iac.terraform.downloaders.git_downloader import GitProtocolScriptDownloader, \
+    extract_data_from_git_url
+from cloudshell.iac.terraform.services.http_transport import HttpTransport
+from cloudshell.iac.terraform.services.module_cache import ModuleCache
+from cloudshell.iac.terraform.services.module_source_parser import ModuleSourceParser, ModuleCall
+from cloudshell.iac.terraform.services.resumable_download import ResumableDownload
+from cloudshell.iac.terraform.services.tf_version_selector import TfVersionSelector
+
+# <namespace>/<name>/<provider> with an optional registry host and '//subdir'
+REGISTRY_SOURCE_PATTERN = re.compile(r"^(?:(?P<host>[^/]+\.[^/]+)/)?(?P<namespace>[0-9A-Za-z-_]{1,64})/"
+                                     r"(?P<name>[0-9A-Za-z-_]{1,64})/(?P<provider>[0-9a-z]{1,64})"
+                                     r"(?://(?P<subdir>.*))?$")
+# hosts that terraform detects as git shorthand, never as a registry
+GIT_SHORTHAND_HOSTS = ["github.com", "bitbucket.org"]
+ARCHIVE_EXTENSIONS = [".tar.gz", ".tgz", ".zip"]
+
+
+class ModulePrefetcher(object):
+    """
+    Installs the remote modules called by a root module (recursively) from the local module cache before init.
+    Git sources and registry modules are fetched in parallel into the content addressed module cache, materialized
+    under .terraform/modules and recorded in the modules manifest, which init reuses instead of downloading them.
+    Sources of other types, and modules that fail to prefetch, are left to init.
+    """
+    def __init__(self, cache_root_dir: str, logger: Logger, module_cache: ModuleCache = None,
+                 max_workers: int = MODULE_PREFETCH_WORKERS):
+        self._logger = logger
+        self._max_workers = max_workers
+        self._module_cache = module_cache or ModuleCache(cache_root_dir, logger)
+        self._git_downloader = GitProtocolScriptDownloader(logger, self._module_cache, cache_root_dir)
+        self._resumable_download = ResumableDownload(os.path.join(cache_root_dir, DOWNLOADS_DIR), logger)
+
+    def prefetch(self, tf_working_dir: str) -> None:
+        modules_dir = os.path.join(tf_working_dir, ".terraform", "modules")
+        manifest_path = os.path.join(modules_dir, TF_MODULES_MANIFEST)
+        if os.path.isfile(manifest_path):
+            self._logger.info("Modules are installed already, skipping prefetch")
+            return
+
+        records = [{"Key": "", "Source": "", "Dir": "."}]
+        pending_modules = [("", tf_working_dir)]
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            # one level of the module tree at a time, the calls of a level are fetched in parallel
+            while pending_modules:
+                next_modules = []
+                futures = {}
+                for parent_key, module_dir in pending_modules:
+                    for module_call in ModuleSourceParser.get_module_calls(module_dir, self._logger):
+                        key = f"{parent_key}.{module_call.name}" if parent_key else module_call.name
+                        if ModuleSourceParser.is_local_source(module_call.source):
+                            local_dir = os.path.normpath(os.path.join(module_dir, module_call.source))
+                            if os.path.isdir(local_dir):
+                                records.append({"Key": key, "Source": module_call.source,
+                                                "Dir": os.path.relpath(local_dir, tf_working_dir)})
+                                next_modules.append((key, local_dir))
+                            continue
+                        future = executor.submit(self._install_module, key, module_call, modules_dir, tf_working_dir)
+                        futures[future] = module_call
+
+                for future in as_completed(futures):
+                    module_call = futures[future]
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        self._logger.warning(f"Failed to prefetch module '{module_call.name}' "
+                                             f"({module_call.source}), init will install it: {str(e)}")
+                        continue
+                    if record:
+                        records.append(record)
+                        next_modules.append((record["Key"], os.path.join(tf_working_dir, record["Dir"])))
+                pending_modules = next_modules
+
+        if len(records) == 1:
+            return
+        os.makedirs(modules_dir, exist_ok=True)
+        with open(manifest_path, "w") as manifest_file:
+            json.dump({"Modules": records}, manifest_file)
+        self._logger.info(f"Prefetched {len(records) - 1} module calls")
+
+    def _install_module(self, key: str, module_call: ModuleCall, modules_dir: str,
+                        tf_working_dir: str) -> Optional[Dict[str, str]]:
+        version = ""
+        registry_match = self.get_registry_source_match(module_call.source)
+        if registry_match:
+            source = self.get_registry_source_address(registry_match)
+            package_source, version = self._resolve_registry_module(registry_match, module_call.version or "")
+            package_source, package_subdir = self.split_subdir(package_source)
+            subdir = "/".join(x for x in [package_subdir, registry_match.group("subdir")] if x)
+        else:
+            source = self.normalize_git_source(module_call.source)
+            if not source:
+                self._logger.info(f"Module '{key}' source type is not prefetched: {module_call.source}")
+                return None
+            package_source, subdir = self.split_subdir(source)
+
+        snapshot_key = self._get_package_snapshot(package_source)
+        package_dir = os.path.join(modules_dir, key)
+        self._module_cache.materialize_snapshot(snapshot_key, package_dir)
+        module_dir = os.path.join(package_dir, *[x for x in subdir.split("/") if x])
+        self._logger.info(f"Prefetched module '{key}' ({module_call.source})")
+
+        record = {"Key": key, "Source": source, "Dir": os.path.relpath(module_dir, tf_working_dir)}
+        if version:
+            record["Version"] = version
+        return record
+
+    def _get_package_snapshot(self, package_source: str) -> str:
+        """ returns the module cache key of the package """
+        if package_source.startswith("git::"):
+            url_data = extract_data_from_git_url(package_source)
+            return self._git_downloader.get_package_snapshot(url_data.repo_url, url_data.ref)
+
+        # http archive, the url is versioned (registry download urls)
+        key = self._module_cache.get_key(package_source, "", "")
+        self._module_cache.get_or_add_snapshot(key, lambda dest_dir: self._download_archive(package_source, dest_dir))
+        return key
+
+    def _download_archive(self, url: str, dest_dir: str) -> None:
+        download_dir = tempfile.mkdtemp()
+        try:
+            archive_path = os.path.join(download_dir, "module_archive")
+            self._resumable_download.download(url, archive_path)
+            if self._get_archive_type(url) == ".zip":
+                with ZipFile(archive_path) as zip_file:
+                    zip_file.extractall(dest_dir)
+            else:
+                with tarfile.open(archive_path) as tar_file:
+                    members = [x for x in tar_file.getmembers() if os.pardir not in x.name.split("/")]
+                    tar_file.extractall(dest_dir, members)
+        finally:
+            shutil.rmtree(download_dir, ignore_errors=True)
+
+    def _resolve_registry_module(self, registry_match: Match, version_constraint: str) -> Tuple[str, str]:
+        """ returns the package source of the newest module version allowed by the constraint, and the version """
+        host = registry_match.group("host") or DEFAULT_TF_REGISTRY_HOST
+        discovery_response = HttpTransport.get(f"https://{host}/.well-known/terraform.json")
+        discovery_response.raise_for_status()
+        modules_url = urljoin(f"https://{host}/", discovery_response.json()["modules.v1"])
+        module_url = urljoin(modules_url, "/".join(registry_match.group("namespace", "name", "provider")))
+
+        versions_response = HttpTransport.get(f"{module_url}/versions")
+        versions_response.raise_for_status()
+        versions = [x["version"] for module in versions_response.json()["modules"] for x in module["versions"]]
+        constraints = [x.strip() for x in version_constraint.split(",") if x.strip()]
+        version = TfVersionSelector.select_newest_version(versions, constraints)
+        if not version:
+            raise ValueError(f"No module version matches '{version_constraint}'")
+
+        download_url = f"{module_url}/{version}/download"
+        download_response = HttpTransport.get(download_url)
+        download_response.raise_for_status()
+        package_source = download_response.headers.get("X-Terraform-Get", "")
+        if not package_source:
+            raise ValueError(f"Registry returned no download location for {download_url}")
+        if package_source.startswith("./") or package_source.startswith("/"):
+            package_source = urljoin(download_url, package_source)
+
+        git_source = self.normalize_git_source(package_source)
+        if git_source:
+            return git_source, version
+        if self._get_archive_type(package_source):
+            return package_source, version
+        raise ValueError(f"Module package source type is not supported: {package_source}")
+
+    @staticmethod
+    def get_registry_source_match(source: str) -> Optional[Match]:
+        match = REGISTRY_SOURCE_PATTERN.match(source)
+        if not match or (match.group("host") or "") in GIT_SHORTHAND_HOSTS:
+            return None
+        return match
+
+    @staticmethod
+    def get_registry_source_address(registry_match: Match) -> str:
+        """ the source address as terraform records it in the modules manifest """
+        host = registry_match.group("host") or DEFAULT_TF_REGISTRY_HOST
+        address = "/".join([host.lower()] + list(registry_match.group("namespace", "name", "provider")))
+        return f"{address}//{registry_match.group('subdir')}" if registry_match.group("subdir") else address
+
+    @staticmethod
+    def normalize_git_source(source: str) -> str:
+        """
+        the git source address as terraform records it in the modules manifest ('git::' prefixed),
+        empty string for sources that are not git
+        """
+        if source.startswith("git::"):
+            return source
+        for host in GIT_SHORTHAND_HOSTS:
+            if source.startswith(f"{host}/"):
+                address, _, query = source.partition("?")
+                package, separator, subdir = address[len(host) + 1:].partition("//")
+                package = package if package.endswith(".git") else f"{package}.git"
+                normalized = f"git::https://{host}/{package}"
+                normalized += f"//{subdir}" if separator else ""
+                return f"{normalized}?{query}" if query else normalized
+        scp_match = re.match(r"^(?P<user>[^@/]+)@(?P<host>[^:/]+):(?P<path>[^/].*)$", source)
+        if scp_match:
+            return f"git::ssh://{scp_match.group('user')}@{scp_match.group('host')}/{scp_match.group('path')}"
+        return ""
+
+    @staticmethod
+    def split_subdir(source: str) -> Tuple[str, str]:
+        """ split 'package//subdir?query' to 'package?query' and 'subdir' """
+        address, _, query = source.partition("?")
+        scheme_end = address.find("://")
+        separator = address.find("//", scheme_end + 3 if scheme_end >= 0 else 0)
+        if separator < 0:
+            return source, ""
+        package, subdir = address[:separator], address[separator + 2:]
+        return (f"{package}?{query}" if query else package), subdir.strip("/")
+
+    @staticmethod
+    def _get_archive_type(url: str) -> str:
+        parsed_url = urlparse(url)
+        archive_param = parse_qs(parsed_url.query).get("archive", [""])[0]
+        if archive_param:
+            return f".{archive_param}"
+        return next((x for x in ARCHIVE_EXTENSIONS if parsed_url.path.endswith(x)), "")
@@ -0,0 +1,64 @@
+import collections
+import os
+import posixpath
+import re
+from logging import Logger
+from typing import List, Optional
+
+from cloudshell.iac.terraform.tagging.tag_terraform_resources import Hcl2Parser, LoggerHelper
+
+ModuleCall = collections.namedtuple('ModuleCall', 'name source version')
+# files read relative to the module from a parent dir, like file("${path.module}/../x") or templatefile("../x.tpl", {})
+PARENT_DIR_REFERENCE_PATTERN = re.compile(
+    r'\$\{path\.(?:module|root|cwd)\}/\.\.(?:/|")|\b(?:file\w*|templatefile)\(\s*"\.\./'
+)
+
+
+class ModuleSourceParser(object):
+    """ Reads the module calls ('module' blocks) of a terraform module """
+
+    @staticmethod
+    def get_module_calls(module_dir: str, logger: Logger) -> List[ModuleCall]:
+        """ collect the module blocks from all tf files in the module dir, files that fail to parse are skipped """
+        LoggerHelper.init_logging(logger)
+        module_calls = []
+        for file_name in sorted(os.listdir(module_dir)):
+            if not file_name.endswith(".tf"):
+                continue
+            try:
+                tf_as_dict = Hcl2Parser.get_tf_file_as_dict(os.path.join(module_dir, file_name))
+            except Exception as e:
+                logger.warning(f"Skipping module calls of '{file_name}': {str(e)}")
+                continue
+            for module_block in tf_as_dict.get("module", []):
+                for module_name, module_data in module_block.items():
+                    source = module_data.get("source")
+                    if source:
+                        module_calls.append(ModuleCall(module_name, source, module_data.get("version", "")))
+        return module_calls
+
+    @staticmethod
+    def refers_to_parent_dir(module_dir: str) -> bool:
+        """ whether a tf file of the module dir reads files from outside of it ('../' paths) """
+        for file_name in sorted(os.listdir(module_dir)):
+            if not file_name.endswith(".tf"):
+                continue
+            with open(os.path.join(module_dir, file_name), errors="replace") as tf_file:
+                if PARENT_DIR_REFERENCE_PATTERN.search(tf_file.read()):
+                    return True
+        return False
+
+    @staticmethod
+    def is_local_source(source: str) -> bool:
+        return source.startswith("./") or source.startswith("../")
+
+    @staticmethod
+    def get_local_source_path(module_path: str, source: str) -> Optional[str]:
+        """
+        return the repo relative path of a local module source called from the module at module_path (repo relative,
+        empty string is the repo root). returns None when the source is outside of the repo
+        """
+        source_path = posixpath.normpath(posixpath.join(module_path, source))
+        if source_path == posixpath.pardir or source_path.startswith(f"{posixpath.pardir}/"):
+            return None
+        return "" if source_path == posixpath.curdir else source_path
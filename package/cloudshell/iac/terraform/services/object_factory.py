@@ -9,6 +9,8 @@ from cloudshell.iac.terraform.models.tf_service import TerraformServiceObject
 from cloudshell.iac.terraform.services.backend_handler import BackendHandler
 from cloudshell.iac.terraform.services.input_output_service import InputOutputService
 from cloudshell.iac.terraform.services.live_status_updater import LiveStatusUpdater
+from cloudshell.iac.terraform.services.plugin_cache import PluginCache
+from cloudshell.iac.terraform.services.provider_mirror import ProviderMirror
 from cloudshell.iac.terraform.services.sandbox_messages import SandboxMessagesService
 from cloudshell.iac.terraform.services.sandox_data import SandboxDataHandler
 from cloudshell.iac.terraform.services.svc_attribute_handler import ServiceAttrHandler
@@ -22,12 +24,33 @@ class ObjectFactory:
     def create_tf_proc_executer(config: TerraformShellConfig,
                                 sandbox_data_handler: SandboxDataHandler,
                                 shell_helper: ShellHelperObject,
-                                tf_working_dir: str) -> TfProcExec:
-        backend_handler = BackendHandler(shell_helper, tf_working_dir, sandbox_data_handler.get_tf_uuid())
+                                tf_working_dir: str,
+                                backend_handler: BackendHandler = None) -> TfProcExec:
+        if backend_handler:
+            backend_handler.set_working_dir(tf_working_dir)
+        else:
+            backend_handler = ObjectFactory.create_backend_handler(shell_helper, sandbox_data_handler, tf_working_dir)
         input_output_service = InputOutputService(shell_helper, config.inputs_map, config.outputs_map)
-        tf_proc_executer = TfProcExec(shell_helper, sandbox_data_handler, backend_handler, input_output_service)
+        plugin_cache = PluginCache(config.cache_root_dir, config.plugin_cache_max_size_mb, shell_helper.logger,
+                                   config.plugin_cache_may_break_lock_file) if config.use_plugin_cache else None
+        provider_mirror = None
+        if config.use_provider_mirror:
+            mirror_dir = config.provider_mirror_dir or \
+                ProviderMirror.get_default_mirror_dir(config.shared_cache_dir or config.cache_root_dir)
+            read_only = bool(config.shared_cache_dir) and config.shared_cache_read_only
+            provider_mirror = ProviderMirror(mirror_dir, config.provider_mirror_offline, shell_helper.logger,
+                                             read_only, config.cache_root_dir)
+        tf_proc_executer = TfProcExec(shell_helper, sandbox_data_handler, backend_handler, input_output_service,
+                                      plugin_cache, provider_mirror, config.use_json_output,
+                                      config.skip_unchanged_init)
         return tf_proc_executer
 
+    @staticmethod
+    def create_backend_handler(shell_helper: ShellHelperObject,
+                               sandbox_data_handler: SandboxDataHandler,
+                               tf_working_dir: str = "") -> BackendHandler:
+        return BackendHandler(shell_helper, tf_working_dir, sandbox_data_handler.get_tf_uuid())
+
     @staticmethod
     def create_shell_helper(tf_service: TerraformServiceObject,
                             context: ResourceCommandContext,
@@ -37,7 +60,8 @@ class ObjectFactory:
         sandbox_id = context.reservation.reservation_id
         sandbox_message_service = SandboxMessagesService(api, sandbox_id, tf_service.name,
                                                          config.write_sandbox_messages)
-        live_status_updater = LiveStatusUpdater(api, sandbox_id, config.update_live_status)
+        live_status_updater = LiveStatusUpdater(api, sandbox_id, config.update_live_status,
+                                                config.live_status_min_interval)
         default_tags = TagsManager(context.reservation)
         attr_handler = ServiceAttrHandler(tf_service)
 
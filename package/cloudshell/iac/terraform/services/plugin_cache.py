@@ -0,0 +1,94 @@
+import os
+import shutil
+import time
+from logging import Logger
+from typing import Dict, List, Tuple
+
+from cloudshell.iac.terraform.constants import TF_PLUGIN_CACHE_DIR, PLUGIN_CACHE_MIN_AGE
+from cloudshell.iac.terraform.services.file_lock import FileLock
+from cloudshell.iac.terraform.services.file_utils import get_dir_size
+
+# depth of provider version dirs: <cache>/<hostname>/<namespace>/<type>/<version>
+PROVIDER_VERSION_DEPTH = 4
+
+
+class PluginCache(object):
+    """
+    Provider plugin cache (TF_PLUGIN_CACHE_DIR) shared by all terraform runs on the execution server.
+    Terraform does not guarantee the plugin cache is safe for concurrent use, so 'init' must run under lock(), which
+    makes the inits on the execution server run one at a time.
+    Providers are evicted least recently used first once the cache is bigger than max_size_mb.
+    """
+    def __init__(self, cache_root_dir: str, max_size_mb: int, logger: Logger,
+                 may_break_dependency_lock_file: bool = False):
+        self._cache_dir = os.path.join(cache_root_dir, TF_PLUGIN_CACHE_DIR)
+        self._may_break_dependency_lock_file = may_break_dependency_lock_file
+        self._lock_file_path = os.path.join(cache_root_dir, f"{TF_PLUGIN_CACHE_DIR}.lock")
+        self._max_size = max_size_mb * 1024 * 1024
+        self._logger = logger
+
+    def get_env(self) -> Dict[str, str]:
+        os.makedirs(self._cache_dir, exist_ok=True)
+        env = {"TF_PLUGIN_CACHE_DIR": self._cache_dir}
+        if self._may_break_dependency_lock_file:
+            # since terraform 1.4 the cache is ignored for modules without a lock file. with this setting the lock
+            # file created by init only has the checksum of the cached package (this platform), not the registry
+            # checksums of all platforms. the working dir is a temp copy of the module and its lock file is never
+            # committed back, and modules that have a lock file are still verified against it
+            env["TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE"] = "true"
+        return env
+
+    def lock(self) -> FileLock:
+        return FileLock(self._lock_file_path)
+
+    def mark_used(self, tf_working_dir: str) -> None:
+        """ refresh the timestamp of the cached providers the working dir links to, must be called under lock() """
+        for providers_dir in [os.path.join(tf_working_dir, ".terraform", "providers"),
+                              os.path.join(tf_working_dir, ".terraform", "plugins")]:
+            for root, dir_names, file_names in os.walk(providers_dir):
+                for name in dir_names + file_names:
+                    cached_path = os.path.realpath(os.path.join(root, name))
+                    version_dir = self._get_version_dir(cached_path)
+                    if version_dir:
+                        os.utime(version_dir)
+
+    def evict(self) -> None:
+        """ delete least recently used providers until the cache fits max size, must be called under lock() """
+        entries = self._get_entries()
+        total_size = sum(size for _, _, size in entries)
+        now = time.time()
+        for entry_path, last_used, size in sorted(entries, key=lambda x: x[1]):
+            if total_size <= self._max_size:
+                break
+            # recently used providers may be linked from working dirs that are still running plan/apply
+            if now - last_used < PLUGIN_CACHE_MIN_AGE:
+                break
+            self._logger.info(f"Evicting provider from plugin cache: '{entry_path}'")
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= size
+
+    def _get_version_dir(self, path: str) -> str:
+        try:
+            rel_path = os.path.relpath(path, self._cache_dir)
+        except ValueError:
+            # path is on a different drive
+            return ""
+        parts = rel_path.split(os.sep)
+        if rel_path.startswith(os.pardir) or len(parts) < PROVIDER_VERSION_DEPTH:
+            return ""
+        return os.path.join(self._cache_dir, *parts[:PROVIDER_VERSION_DEPTH])
+
+    def _get_entries(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        if not os.path.isdir(self._cache_dir):
+            return entries
+        for root, dir_names, _ in os.walk(self._cache_dir):
+            rel_root = os.path.relpath(root, self._cache_dir)
+            depth = 0 if rel_root == os.curdir else len(rel_root.split(os.sep))
+            if depth != PROVIDER_VERSION_DEPTH - 1:
+                continue
+            for dir_name in dir_names:
+                entry_path = os.path.join(root, dir_name)
+                entries.append((entry_path, os.path.getmtime(entry_path), get_dir_size(entry_path)))
+            dir_names.clear()
+        return entries
@@ -1,4 +1,6 @@
+import os
 from logging import Logger
+from typing import Dict
 
 from cloudshell.api.cloudshell_api import ResourceInfo
 
@@ -14,9 +16,16 @@ class ProviderHandler(object):
         self.logger = logger
 
     def initialize_provider(self, shell_helper: ShellHelperObject):
+        os.environ.update(self.get_provider_env_vars(shell_helper))
+
+    def get_provider_env_vars(self, shell_helper: ShellHelperObject) -> Dict[str, str]:
+        """
+        the env vars of the cloud provider, without setting them. os.environ must not change while other threads
+        read it, so the lookup can run in a worker thread and the caller sets the env vars
+        """
         clp_resource_name = shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.CLOUD_PROVIDER)
         if not clp_resource_name:
-            return
+            return {}
         clp_details = shell_helper.api.GetResourceDetails(clp_resource_name)
         clp_res_model = clp_details.ResourceModelName
 
@@ -27,7 +36,7 @@ class ProviderHandler(object):
 
         try:
             if clp_res_model in CLP_PROVIDER_MODELS:
-                self._set_cloud_env_vars(clp_details, clp_res_model, shell_helper)
+                return self._get_cloud_env_vars(clp_details, clp_res_model, shell_helper)
             else:
                 shell_helper.logger.error(f"{clp_res_model} currently not supported")
                 raise ValueError(f"{clp_res_model} currently not supported")
@@ -36,12 +45,12 @@ class ProviderHandler(object):
             shell_helper.logger.error(f"Error Setting environment variables -> {str(e)}")
             raise
 
-    def _set_cloud_env_vars(
+    def _get_cloud_env_vars(
             self,
             clp_details: ResourceInfo,
             clp_res_model: str,
             shell_helper: ShellHelperObject,
-    ):
+    ) -> Dict[str, str]:
         shell_helper.sandbox_messages.write_message("initializing provider...")
         shell_helper.logger.info("Initializing Environment variables with CloudProvider details")
         clp_resource_attributes = clp_details.ResourceAttributes
@@ -57,7 +66,7 @@ class ProviderHandler(object):
             clp_handler = GCPCloudProviderEnvVarHandler(clp_res_model, clp_resource_attributes, shell_helper)
 
         if clp_handler:
-            clp_handler.set_env_vars_based_on_clp()
+            return clp_handler.get_env_vars_based_on_clp()
         else:
             self.logger.error(f"Was not able to initialize provider as {clp_res_model} is not a supported model")
             raise ValueError(f"Was not able to initialize provider as {clp_res_model} is not a supported model")
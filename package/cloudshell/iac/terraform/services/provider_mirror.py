@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from contextlib import nullcontext
+from logging import Logger
+from typing import ContextManager, Dict, List
+
+from cloudshell.iac.terraform.constants import OS_TYPES, TF_PROVIDER_MIRROR_DIR, TF_LOCK_FILE_NAME
+from cloudshell.iac.terraform.services.file_lock import FileLock
+from cloudshell.iac.terraform.services.file_utils import atomic_write
+from cloudshell.iac.terraform.tagging.tag_terraform_resources import Hcl2Parser, LoggerHelper
+
+CLI_CONFIG_TEMPLATE = """provider_installation {{
+  filesystem_mirror {{
+    path = "{mirror_dir}"
+  }}
+{direct_block}}}
+"""
+PROVIDER_INSTALLATION_PATTERN = re.compile(r'^\s*"?provider_installation"?\s*\{', re.MULTILINE)
+
+
+class ProviderMirror(object):
+    """
+    Local filesystem mirror of terraform providers (as built by 'terraform providers mirror').
+    'init' is pointed at the mirror with a generated CLI config file (TF_CLI_CONFIG_FILE), a copy of the CLI config
+    of the execution server (credentials, hosts) with the provider_installation block of the mirror added.
+    When online, providers missing from the mirror are still installed from their registry and are added
+    to the mirror after init. When offline, init installs providers from the mirror only.
+    A read-only mirror (shared by execution servers, and read-only for this server) is never written or locked,
+    its CLI config file is written to local_dir instead.
+    """
+    def __init__(self, mirror_dir: str, offline: bool, logger: Logger, read_only: bool = False,
+                 local_dir: str = None):
+        self.mirror_dir = os.path.abspath(mirror_dir)
+        self.offline = offline
+        self.read_only = read_only
+        self._logger = logger
+        self._lock_file_path = f"{self.mirror_dir}.lock"
+        self._cli_config_path = f"{self.mirror_dir}{'.offline' if offline else ''}.tfrc"
+        if read_only:
+            mirror_id = hashlib.sha256(self.mirror_dir.encode()).hexdigest()[:16]
+            self._cli_config_path = os.path.join(os.path.abspath(local_dir or tempfile.gettempdir()),
+                                                 f"provider_mirror_{mirror_id}{'.offline' if offline else ''}.tfrc")
+
+    @staticmethod
+    def get_default_mirror_dir(cache_root_dir: str) -> str:
+        return os.path.join(cache_root_dir, TF_PROVIDER_MIRROR_DIR)
+
+    def get_env(self) -> Dict[str, str]:
+        if not self.read_only:
+            os.makedirs(self.mirror_dir, exist_ok=True)
+        atomic_write(self._cli_config_path, self._get_cli_config())
+        return {"TF_CLI_CONFIG_FILE": self._cli_config_path}
+
+    def _get_cli_config(self) -> str:
+        user_cli_config_path = self._get_user_cli_config_path()
+        user_cli_config = ""
+        if os.path.isfile(user_cli_config_path) and os.path.abspath(user_cli_config_path) != self._cli_config_path:
+            with open(user_cli_config_path) as user_cli_config_file:
+                user_cli_config = user_cli_config_file.read()
+
+        # terraform reads json CLI config files too, they are recognized by the content
+        if user_cli_config.lstrip().startswith("{"):
+            cli_config = json.loads(user_cli_config)
+            if "provider_installation" in cli_config:
+                self._raise_provider_installation_error(user_cli_config_path)
+            cli_config["provider_installation"] = {"filesystem_mirror": {"path": self.mirror_dir}}
+            if not self.offline:
+                cli_config["provider_installation"]["direct"] = {}
+            return json.dumps(cli_config, indent=2)
+
+        if PROVIDER_INSTALLATION_PATTERN.search(user_cli_config):
+            self._raise_provider_installation_error(user_cli_config_path)
+        # HCL strings need forward slashes (windows paths)
+        mirror_cli_config = CLI_CONFIG_TEMPLATE.format(mirror_dir=self.mirror_dir.replace("\\", "/"),
+                                                       direct_block="" if self.offline else "  direct {}\n")
+        return f"{user_cli_config}\n{mirror_cli_config}" if user_cli_config else mirror_cli_config
+
+    @staticmethod
+    def _get_user_cli_config_path() -> str:
+        """ the CLI config terraform reads when TF_CLI_CONFIG_FILE is not set by the mirror """
+        if os.environ.get("TF_CLI_CONFIG_FILE"):
+            return os.environ["TF_CLI_CONFIG_FILE"]
+        if sys.platform == "win32":
+            return os.path.join(os.environ.get("APPDATA", ""), "terraform.rc")
+        return os.path.expanduser(os.path.join("~", ".terraformrc"))
+
+    @staticmethod
+    def _raise_provider_installation_error(user_cli_config_path: str) -> None:
+        raise ValueError(f"The terraform CLI config '{user_cli_config_path}' has a provider_installation block, "
+                         f"it can not be combined with the provider mirror. Add the mirror to its "
+                         f"provider_installation block and turn off use_provider_mirror")
+
+    def lock(self, shared: bool = False) -> ContextManager:
+        """ init reads the mirror under a shared lock, updating the mirror requires an exclusive lock """
+        if self.read_only:
+            # the lock file can not be created in a read-only mount
+            return nullcontext()
+        return FileLock(self._lock_file_path, shared)
+
+    def get_missing_providers(self, tf_working_dir: str) -> List[str]:
+        """ return the providers selected in the working dir lock file that are not in the mirror yet """
+        lock_file_path = os.path.join(tf_working_dir, TF_LOCK_FILE_NAME)
+        if not os.path.isfile(lock_file_path):
+            return []
+
+        LoggerHelper.init_logging(self._logger)
+        os_type = OS_TYPES[sys.platform]
+        missing_providers = []
+        for provider in Hcl2Parser.get_tf_file_as_dict(lock_file_path).get("provider", []):
+            for provider_address, provider_data in provider.items():
+                provider_type = provider_address.split("/")[-1]
+                package_path = os.path.join(
+                    self.mirror_dir, *provider_address.split("/"),
+                    f"terraform-provider-{provider_type}_{provider_data.get('version')}_{os_type}.zip"
+                )
+                if not os.path.isfile(package_path):
+                    missing_providers.append(provider_address)
+        return missing_providers
@@ -0,0 +1,48 @@
+from typing import Callable
+
+from cloudshell.iac.terraform.constants import TF_EVENT_PLANNED_CHANGE, TF_EVENT_CHANGE_SUMMARY, \
+    TF_EVENT_APPLY_COMPLETE, TF_EVENT_APPLY_ERRORED, TF_EVENT_APPLY_PROGRESS
+from cloudshell.iac.terraform.services.tf_event_stream import TfEventStream
+
+
+class ResourceProgress(object):
+    """
+    Progress of apply/destroy computed from its -json events: completed resources out of the planned resource
+    changes. on_progress(completed, planned) is called every time a resource change completes or fails, and again
+    on the 'still creating' events of long running changes, so a throttled update of the last count is sent.
+    The planned changes are given by the plan (apply of a plan file), otherwise they are taken from the plan the
+    command runs itself (destroy).
+    """
+    def __init__(self, on_progress: Callable[[int, int], None], planned_changes: int = 0):
+        self._on_progress = on_progress
+        self._planned_changes = planned_changes
+        self._counted_changes = 0
+        self._completed = 0
+
+    def subscribe(self, event_stream: TfEventStream) -> None:
+        event_stream.subscribe(self._on_planned_change, TF_EVENT_PLANNED_CHANGE)
+        event_stream.subscribe(self._on_change_summary, TF_EVENT_CHANGE_SUMMARY)
+        event_stream.subscribe(self._on_change_done, TF_EVENT_APPLY_COMPLETE)
+        event_stream.subscribe(self._on_change_done, TF_EVENT_APPLY_ERRORED)
+        event_stream.subscribe(self._on_change_in_progress, TF_EVENT_APPLY_PROGRESS)
+
+    def _on_planned_change(self, event: dict) -> None:
+        self._counted_changes += 1
+
+    def _on_change_summary(self, event: dict) -> None:
+        # the summaries printed at the end of apply and destroy have operation 'apply'/'destroy'
+        if event.get("changes", {}).get("operation") == "plan":
+            changes = event["changes"]
+            self._planned_changes = changes.get("add", 0) + changes.get("change", 0) + changes.get("remove", 0)
+
+    def _on_change_done(self, event: dict) -> None:
+        self._completed += 1
+        self._report_progress()
+
+    def _on_change_in_progress(self, event: dict) -> None:
+        if self._completed:
+            self._report_progress()
+
+    def _report_progress(self) -> None:
+        planned = max(self._planned_changes or self._counted_changes, self._completed)
+        self._on_progress(self._completed, planned)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from logging import Logger
+from typing import Callable
+from zipfile import ZipFile, BadZipFile
+
+import requests
+
+from cloudshell.iac.terraform.constants import DOWNLOAD_CHUNK_SIZE
+from cloudshell.iac.terraform.services.file_lock import FileLock
+from cloudshell.iac.terraform.services.file_utils import read_json
+from cloudshell.iac.terraform.services.http_transport import HttpTransport
+
+
+class DownloadVerificationError(Exception):
+    pass
+
+
+class ResumableDownload(object):
+    """
+    Downloads to a '.part' file in the downloads dir that outlives failed attempts. When the download is retried
+    the '.part' file is resumed with a Range request (If-Range makes sure the content did not change meanwhile).
+    The complete file is verified before it is moved to its destination, a file that fails verification is deleted.
+    """
+    def __init__(self, downloads_dir: str, logger: Logger = None):
+        self._downloads_dir = downloads_dir
+        self._logger = logger or logging.getLogger(__name__)
+
+    def download(self, url: str, file_path: str, verify: Callable[[str], None] = None,
+                 get: Callable[..., requests.Response] = None, **kwargs) -> None:
+        """
+        download url to file_path, kwargs (params, headers) are passed to get.
+        verify(path) must raise DownloadVerificationError when the downloaded file is invalid
+        """
+        os.makedirs(self._downloads_dir, exist_ok=True)
+        download_id = hashlib.sha256(f"{url}\n{json.dumps(kwargs.get('params'), sort_keys=True)}".encode()).hexdigest()
+        part_path = os.path.join(self._downloads_dir, f"{download_id}.part")
+
+        with FileLock(f"{part_path}.lock"):
+            self._download_part(url, part_path, get or HttpTransport.get, **kwargs)
+            if verify:
+                try:
+                    verify(part_path)
+                except DownloadVerificationError:
+                    self._remove_part(part_path)
+                    raise
+            shutil.move(part_path, file_path)
+            self._remove_file(f"{part_path}.json")
+
+    def _download_part(self, url: str, part_path: str, get: Callable[..., requests.Response], **kwargs) -> None:
+        headers = dict(kwargs.pop("headers", None) or {})
+        offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+        validator = self._read_validator(part_path)
+        if offset and validator:
+            self._logger.info(f"Resuming download of '{url}' from byte {offset}")
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+        with get(url, headers=headers, stream=True, **kwargs) as response:
+            if response.status_code == 416:
+                # the part is complete already (or invalid, which verification finds out)
+                return
+            if response.status_code not in (200, 206):
+                raise Exception(f"Error downloading '{url}': status code {response.status_code}")
+
+            # 200 means the server ignored the range or the content changed, start over
+            mode = "ab" if response.status_code == 206 else "wb"
+            if mode == "wb":
+                self._write_validator(part_path, response)
+            with open(part_path, mode) as part_file:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    part_file.write(chunk)
+
+    @staticmethod
+    def _read_validator(part_path: str) -> str:
+        return read_json(f"{part_path}.json").get("validator", "")
+
+    @staticmethod
+    def _write_validator(part_path: str, response: requests.Response) -> None:
+        # weak etags can not be used with If-Range, resuming without a validator is not safe
+        etag = response.headers.get("ETag", "")
+        validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified", "")
+        with open(f"{part_path}.json", "w") as validator_file:
+            json.dump({"validator": validator}, validator_file)
+
+    def _remove_part(self, part_path: str) -> None:
+        self._remove_file(part_path)
+        self._remove_file(f"{part_path}.json")
+
+    @staticmethod
+    def _remove_file(file_path: str) -> None:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    @staticmethod
+    def verify_sha256(expected_sha256: str) -> Callable[[str], None]:
+        def verify(file_path: str) -> None:
+            sha256 = hashlib.sha256()
+            with open(file_path, 'rb') as file:
+                for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b''):
+                    sha256.update(chunk)
+            if sha256.hexdigest() != expected_sha256:
+                raise DownloadVerificationError(f"Checksum mismatch: expected {expected_sha256}, "
+                                                f"got {sha256.hexdigest()}")
+        return verify
+
+    @staticmethod
+    def verify_zip(file_path: str) -> None:
+        """
+        archives have no published checksum, a truncated download has no central directory and fails to open.
+        the archive is not decompressed here, the crc of a member is checked when it is extracted
+        """
+        try:
+            with ZipFile(file_path):
+                pass
+        except BadZipFile as e:
+            raise DownloadVerificationError(f"Invalid zip archive: {str(e)}")
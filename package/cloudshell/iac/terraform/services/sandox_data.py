@@ -1,9 +1,12 @@
 import json
+from typing import Optional
 
 from cloudshell.api.cloudshell_api import SandboxDataKeyValue, GetSandboxDataInfo
 
-from cloudshell.iac.terraform.constants import EXECUTE_STATUS, DESTROY_STATUS, NONE, TF_WORKING_DIR, ATTRIBUTE_NAMES
+from cloudshell.iac.terraform.constants import EXECUTE_STATUS, DESTROY_STATUS, NONE, TF_WORKING_DIR, ATTRIBUTE_NAMES, \
+    TF_EXE_PATH, TF_VERSION, TF_MODULE_SNAPSHOT_KEY, TF_MODULE_COMMIT_SHA, TF_MODULE_PATH
 from cloudshell.iac.terraform.models.shell_helper import ShellHelperObject
+from cloudshell.iac.terraform.services.module_cache import ModuleSnapshot
 
 
 class SandboxDataHandler(object):
@@ -60,9 +63,40 @@ class SandboxDataHandler(object):
     def get_tf_working_dir(self) -> str:
         return self._get_value_for_key(TF_WORKING_DIR)
 
+    def set_tf_executable(self, tf_exe_path: str, tf_version: str) -> None:
+        self._set_values_for_keys({TF_EXE_PATH: tf_exe_path, TF_VERSION: tf_version})
+
+    def get_tf_exe_path(self) -> str:
+        # entries created by older versions don't have this key
+        return self._check_for_uuid_data().get(TF_EXE_PATH, "")
+
+    def get_tf_version(self) -> str:
+        return self._check_for_uuid_data().get(TF_VERSION, "")
+
+    def set_module_snapshot(self, module_snapshot: Optional[ModuleSnapshot]) -> None:
+        """ None clears the snapshot recorded by a previous execute """
+        module_snapshot = module_snapshot or ModuleSnapshot("", "", "")
+        self._set_values_for_keys({TF_MODULE_SNAPSHOT_KEY: module_snapshot.key,
+                                   TF_MODULE_COMMIT_SHA: module_snapshot.sha,
+                                   TF_MODULE_PATH: module_snapshot.path})
+
+    def get_module_snapshot(self) -> Optional[ModuleSnapshot]:
+        """
+        the commit the working dir was created from, the key is empty when it was not created from the module cache.
+        None if no commit was recorded
+        """
+        uuid_data = self._check_for_uuid_data()
+        if not uuid_data.get(TF_MODULE_COMMIT_SHA):
+            return None
+        return ModuleSnapshot(uuid_data[TF_MODULE_SNAPSHOT_KEY], uuid_data.get(TF_MODULE_COMMIT_SHA, ""),
+                              uuid_data.get(TF_MODULE_PATH, ""))
+
     def _set_value_for_key(self, key: str, new_value: str = ""):
+        self._set_values_for_keys({key: new_value})
+
+    def _set_values_for_keys(self, new_values: dict):
         uuid_sdkv_value = self._check_for_uuid_data()
-        uuid_sdkv_value[key] = new_value
+        uuid_sdkv_value.update(new_values)
         updated_sdkv = SandboxDataKeyValue(self._uuid, json.dumps(uuid_sdkv_value))
         self._driver_helper_obj.api.SetSandboxData(self._driver_helper_obj.sandbox_id, [updated_sdkv])
 
@@ -0,0 +1,39 @@
+import collections
+from subprocess import Popen, PIPE, STDOUT
+from typing import Callable, Dict, List
+
+from cloudshell.iac.terraform.constants import PROCESS_OUTPUT_TAIL_LINES
+
+ProcessResult = collections.namedtuple('ProcessResult', 'return_code tail output')
+
+
+class StreamingProcess(object):
+    """
+    Runs a process with stderr merged into stdout, passing every output line to on_line as soon as it is written.
+    Only the last tail_lines lines are kept in memory (for error messages), unless the whole output is captured,
+    so memory use does not grow with the size of the output.
+    """
+    def __init__(self, cmd: List[str], cwd: str, env: Dict[str, str], tail_lines: int = PROCESS_OUTPUT_TAIL_LINES):
+        self._cmd = cmd
+        self._cwd = cwd
+        self._env = env
+        self._tail_lines = tail_lines
+
+    def run(self, on_line: Callable[[str], None] = None, capture_output: bool = False) -> ProcessResult:
+        tail = collections.deque(maxlen=self._tail_lines)
+        output = []
+        with Popen(self._cmd, cwd=self._cwd, env=self._env, stdout=PIPE, stderr=STDOUT) as process:
+            try:
+                for raw_line in iter(process.stdout.readline, b""):
+                    line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+                    tail.append(line)
+                    if capture_output:
+                        output.append(line)
+                    if on_line:
+                        on_line(line)
+            except BaseException:
+                # nobody reads the output anymore
+                process.kill()
+                raise
+            return_code = process.wait()
+        return ProcessResult(return_code, "\n".join(tail), "\n".join(output))
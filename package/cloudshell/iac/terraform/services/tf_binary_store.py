@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import time
+from typing import List
+from zipfile import ZipFile
+
+from cloudshell.iac.terraform.constants import TF_BINARY_STORE_DIR, TERRAFORM_EXE_NAME, TF_LATEST_VERSION_FILE
+from cloudshell.iac.terraform.services.file_utils import read_json, atomic_write_json
+
+
+class TfBinaryStore(object):
+    """
+    Versioned store of terraform executables shared by all runs on the execution server.
+    Layout: <cache_root>/terraform/<version>/<os_type>/terraform.exe
+    An entry is published only after its zip was verified, so an existing entry can be used as is.
+    Executables are published read-only and are run in place from the store.
+    With a shared cache dir (network mount shared by execution servers) executables are published to the shared
+    store, or only read from it when it is read-only for this server, in which case missing versions are added locally.
+    """
+    def __init__(self, cache_root_dir: str, shared_cache_dir: str = None, shared_cache_read_only: bool = False):
+        publish_root_dir = shared_cache_dir if shared_cache_dir and not shared_cache_read_only else cache_root_dir
+        self._store_dir = os.path.join(publish_root_dir, TF_BINARY_STORE_DIR)
+        self._read_only_store_dir = os.path.join(shared_cache_dir, TF_BINARY_STORE_DIR) \
+            if shared_cache_dir and shared_cache_read_only else ""
+
+    def get_binary_path(self, version: str, os_type: str) -> str:
+        if self._read_only_store_dir:
+            read_only_path = os.path.join(self._read_only_store_dir, version, os_type, TERRAFORM_EXE_NAME)
+            if os.path.isfile(read_only_path):
+                return read_only_path
+        return self._get_store_binary_path(version, os_type)
+
+    def has_binary(self, version: str, os_type: str) -> bool:
+        return os.path.isfile(self.get_binary_path(version, os_type))
+
+    def list_versions(self, os_type: str) -> List[str]:
+        versions = set()
+        for store_dir in [self._store_dir, self._read_only_store_dir]:
+            if store_dir and os.path.isdir(store_dir):
+                versions.update(x for x in os.listdir(store_dir) if not x.startswith("."))
+        return [x for x in versions if self.has_binary(x, os_type)]
+
+    def get_cached_latest_version(self, ttl: int) -> str:
+        """ return the last resolved 'latest' version if it was resolved less than ttl seconds ago """
+        latest_data = read_json(os.path.join(self._store_dir, TF_LATEST_VERSION_FILE))
+        if time.time() - latest_data.get("resolved_at", 0) > ttl:
+            return ""
+        return latest_data.get("version", "")
+
+    def set_cached_latest_version(self, version: str) -> None:
+        atomic_write_json(os.path.join(self._store_dir, TF_LATEST_VERSION_FILE),
+                          {"version": version, "resolved_at": time.time()})
+
+    def add_binary_from_zip(self, version: str, os_type: str, zip_path: str) -> str:
+        """
+        extract a verified terraform zip into a staging dir and publish it with a single rename,
+        so concurrent drivers never see a partially written executable
+        """
+        binary_path = self._get_store_binary_path(version, os_type)
+        entry_dir = os.path.dirname(binary_path)
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+
+        staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=os.path.dirname(entry_dir))
+        try:
+            with ZipFile(zip_path, 'r') as zip_file:
+                zip_file.extractall(staging_dir)
+
+            # Linux systems do not add .exe but windows does, adding .exe so commands will be the same on all OS's
+            if os.path.exists(os.path.join(staging_dir, "terraform")):
+                os.rename(os.path.join(staging_dir, "terraform"), os.path.join(staging_dir, TERRAFORM_EXE_NAME))
+            os.chmod(os.path.join(staging_dir, TERRAFORM_EXE_NAME), 0o555)
+
+            try:
+                os.rename(staging_dir, entry_dir)
+            except OSError:
+                # another driver published the same version first
+                if not os.path.isfile(binary_path):
+                    raise
+        finally:
+            if os.path.isdir(staging_dir):
+                shutil.rmtree(staging_dir, ignore_errors=True)
+
+        return binary_path
+
+    def _get_store_binary_path(self, version: str, os_type: str) -> str:
+        return os.path.join(self._store_dir, version, os_type, TERRAFORM_EXE_NAME)
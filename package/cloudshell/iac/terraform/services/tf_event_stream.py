@@ -0,0 +1,66 @@
+import collections
+import json
+from logging import Logger
+from typing import Callable, Dict, List
+
+from cloudshell.iac.terraform.constants import TF_EVENT_DIAGNOSTIC, TF_EVENT_UNPARSED, TF_EVENT_MAX_ERRORS
+
+
+class TfEventStream(object):
+    """
+    Events of a terraform command run with -json (machine readable UI), published to the subscribers as they arrive.
+    Every output line is an event, the 'type' of the event selects its payload ('hook' of apply_start,
+    apply_progress, apply_complete, 'changes' of change_summary, 'diagnostic', 'outputs' ...).
+    Lines that are not json (e.g. crash output) are published as 'unparsed' events with the line as '@message'.
+    A failing subscriber is logged and does not stop the command.
+    """
+    def __init__(self, logger: Logger, max_errors: int = TF_EVENT_MAX_ERRORS):
+        self._logger = logger
+        self._subscribers = []
+        self._errors = collections.deque(maxlen=max_errors)
+
+    def subscribe(self, callback: Callable[[Dict], None], event_type: str = None) -> None:
+        """ callback(event) is called for every event of event_type, or for all events when event_type is None """
+        self._subscribers.append((event_type, callback))
+
+    def publish_line(self, line: str) -> None:
+        if not line.strip():
+            return
+        try:
+            event = json.loads(line)
+        except ValueError:
+            event = None
+        if not isinstance(event, dict):
+            event = {"type": TF_EVENT_UNPARSED, "@level": "info", "@message": line}
+
+        if event.get("type") == TF_EVENT_DIAGNOSTIC and event.get("diagnostic", {}).get("severity") == "error":
+            self._errors.append(self.format_event(event))
+
+        for event_type, callback in self._subscribers:
+            if event_type and event_type != event.get("type"):
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                self._logger.warning(f"Failed to handle terraform '{event.get('type')}' event -> {str(e)}")
+
+    def get_errors(self) -> List[str]:
+        """ the last error diagnostics, formatted as terraform prints them """
+        return list(self._errors)
+
+    @staticmethod
+    def format_event(event: Dict) -> str:
+        """ human readable text of the event, diagnostics include their detail """
+        if event.get("type") != TF_EVENT_DIAGNOSTIC:
+            return event.get("@message", "")
+        diagnostic = event.get("diagnostic", {})
+        text = f"{diagnostic.get('severity', '').capitalize()}: {diagnostic.get('summary', '')}"
+        if diagnostic.get("range"):
+            diagnostic_range = diagnostic["range"]
+            text += f"\n\n  on {diagnostic_range.get('filename')} line {diagnostic_range.get('start', {}).get('line')}"
+            if diagnostic.get("snippet", {}).get("context"):
+                text += f", in {diagnostic['snippet']['context']}"
+            text += ":"
+        if diagnostic.get("detail"):
+            text += f"\n\n{diagnostic['detail']}"
+        return text
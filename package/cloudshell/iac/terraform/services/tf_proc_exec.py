@@ -1,31 +1,57 @@
 import json
 import os
+import sys
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 from distutils.util import strtobool
-from subprocess import check_output, STDOUT, CalledProcessError
 from cloudshell.logging.qs_logger import _create_logger
 
 from cloudshell.iac.terraform.constants import ERROR_LOG_LEVEL, INFO_LOG_LEVEL, EXECUTE_STATUS, APPLY_PASSED, \
     PLAN_FAILED, INIT_FAILED, \
     DESTROY_STATUS, DESTROY_FAILED, APPLY_FAILED, DESTROY_PASSED, INIT, DESTROY, PLAN, OUTPUT, APPLY, \
-    ALLOWED_LOGGING_CMDS, ATTRIBUTE_NAMES
+    ALLOWED_LOGGING_CMDS, ATTRIBUTE_NAMES, TERRAFORM_EXE_NAME, MIRROR_PROVIDERS, OS_TYPES, TF_JSON_OUTPUT_MIN_VERSION, \
+    TF_EVENT_CHANGE_SUMMARY, TF_EVENT_OUTPUTS
 from cloudshell.iac.terraform.models.shell_helper import ShellHelperObject
 from cloudshell.iac.terraform.models.exceptions import TerraformExecutionError
 from cloudshell.iac.terraform.services.backend_handler import BackendHandler
+from cloudshell.iac.terraform.services.init_fingerprint import InitFingerprint
 from cloudshell.iac.terraform.services.input_output_service import InputOutputService
+from cloudshell.iac.terraform.services.plugin_cache import PluginCache
+from cloudshell.iac.terraform.services.provider_mirror import ProviderMirror
+from cloudshell.iac.terraform.services.resource_progress import ResourceProgress
 from cloudshell.iac.terraform.services.sandox_data import SandboxDataHandler
+from cloudshell.iac.terraform.services.streaming_process import StreamingProcess
 from cloudshell.iac.terraform.services.string_cleaner import StringCleaner
+from cloudshell.iac.terraform.services.tf_event_stream import TfEventStream
+from cloudshell.iac.terraform.services.tf_version_selector import TfVersionSelector
 from cloudshell.iac.terraform.tagging.tag_terraform_resources import start_tagging_terraform_resources
 
 
 class TfProcExec(object):
     def __init__(self, shell_helper: ShellHelperObject, sb_data_handler: SandboxDataHandler,
-                 backend_handler: BackendHandler, input_output_service: InputOutputService):
+                 backend_handler: BackendHandler, input_output_service: InputOutputService,
+                 plugin_cache: PluginCache = None, provider_mirror: ProviderMirror = None,
+                 use_json_output: bool = False, skip_unchanged_init: bool = False):
         self._shell_helper = shell_helper
         self._sb_data_handler = sb_data_handler
         self._backend_handler = backend_handler
         self._input_output_service = input_output_service
+        self._plugin_cache = plugin_cache
+        self._provider_mirror = provider_mirror
+        self._tf_env = {}
+        if plugin_cache:
+            self._tf_env.update(plugin_cache.get_env())
+        if provider_mirror:
+            self._tf_env.update(provider_mirror.get_env())
         self._tf_working_dir = sb_data_handler.get_tf_working_dir()
+        # working dirs prepared by older versions have their own copy of the executable
+        self._tf_exe_path = sb_data_handler.get_tf_exe_path() or \
+            os.path.join(self._tf_working_dir, TERRAFORM_EXE_NAME)
+        self._skip_unchanged_init = skip_unchanged_init
+        self._use_json_output = use_json_output and self._is_json_output_supported(sb_data_handler.get_tf_version())
+        self._plan_summary = ""
+        self._planned_changes = 0
+        self._apply_outputs = None
 
         dt = datetime.now().strftime("%d_%m_%y-%H_%M_%S")
         self._exec_output_log = _create_logger(
@@ -39,13 +65,37 @@ class TfProcExec(object):
         self._backend_handler.generate_backend_cfg_file()
         backend_config_vars = self._backend_handler.get_backend_secret_vars()
 
-        vars = ["init", "-no-color"]
-        if backend_config_vars:
+        init_fingerprint = InitFingerprint(self._tf_working_dir, self._sb_data_handler.get_tf_version(),
+                                           backend_config_vars, self._tf_exe_path)
+        dependencies_match, backend_match = init_fingerprint.compare() if self._skip_unchanged_init else (False, False)
+        if dependencies_match and backend_match:
+            self._shell_helper.logger.info("Working dir is initialized already, skipping Terraform Init")
+            if self._plugin_cache:
+                with self._plugin_cache.lock():
+                    self._plugin_cache.mark_used(self._tf_working_dir)
+            self._set_service_status("Progress 20", "Init Passed")
+            return
+
+        # modules are installed by 'terraform get' before init, so init only holds the lock for the backend and
+        # provider installation, and the module downloads of services on the server run concurrently
+        vars = ["init", "-no-color", "-get=false"]
+        if backend_match:
+            vars.append("-backend=false")
+        elif backend_config_vars:
             for key in backend_config_vars.keys():
                 vars.append(f'-backend-config={key}={backend_config_vars[key]}')
         try:
             self._set_service_status("Progress 10", "Executing Terraform Init...")
-            self._run_tf_proc_with_command(vars, INIT)
+            init_fingerprint.clear()
+            if not dependencies_match:
+                self._run_tf_proc_with_command(["get", "-no-color"], INIT)
+            with self._init_lock():
+                self._run_tf_proc_with_command(vars, INIT)
+                if self._plugin_cache:
+                    self._plugin_cache.mark_used(self._tf_working_dir)
+                    self._plugin_cache.evict()
+            init_fingerprint.record()
+            self._update_provider_mirror()
             self._set_service_status("Progress 20", "Init Passed")
         except Exception as e:
             self._set_service_status("Offline", "Init Failed")
@@ -56,7 +106,8 @@ class TfProcExec(object):
     def destroy_terraform(self):
         self._shell_helper.logger.info("Performing Terraform Destroy")
         self._shell_helper.sandbox_messages.write_message("running Terraform Destroy...")
-        cmd = ["destroy", "-auto-approve", "-no-color"]
+        event_stream = self._create_event_stream()
+        cmd = ["destroy", "-auto-approve", "-json" if event_stream else "-no-color"]
 
         tf_vars = self._input_output_service.get_all_terrafrom_variables()
 
@@ -67,7 +118,9 @@ class TfProcExec(object):
 
         try:
             self._set_service_status("Progress 50", "Executing Terraform Destroy...")
-            self._run_tf_proc_with_command(cmd, DESTROY)
+            if event_stream:
+                self._subscribe_resource_progress(event_stream, 50, "Destroying")
+            self._run_tf_proc_with_command(cmd, DESTROY, event_stream=event_stream)
             self._sb_data_handler.set_status(DESTROY_STATUS, DESTROY_PASSED)
             self._set_service_status("Offline", "Destroy Passed")
             self._backend_handler.delete_backend_tf_state_file()
@@ -115,10 +168,13 @@ class TfProcExec(object):
             self._shell_helper.logger.info(self._tf_working_dir)
             self._shell_helper.logger.info(tags_dict)
 
-            terraform_version = self._shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.TERRAFORM_VERSION)
+            # the resolved version is known when the executable came from the binary store ('latest', 'auto')
+            terraform_version = self._sb_data_handler.get_tf_version() or \
+                self._shell_helper.attr_handler.get_attribute(ATTRIBUTE_NAMES.TERRAFORM_VERSION)
 
             start_tagging_terraform_resources(self._tf_working_dir, self._shell_helper.logger, tags_dict, inputs_dict,
-                                              terraform_version)
+                                              terraform_version, self._tf_exe_path, self._tf_env,
+                                              self._init_lock, self._use_json_output)
             self._set_service_status("Progress 40", "Tagging Passed")
         except Exception:
             self._set_service_status("Offline", "Tagging Failed")
@@ -129,7 +185,8 @@ class TfProcExec(object):
         self._shell_helper.logger.info("Running Terraform Plan")
         self._shell_helper.sandbox_messages.write_message("generating Terraform Plan...")
 
-        cmd = ["plan", "-out", "planfile", "-input=false", "-no-color"]
+        event_stream = self._create_event_stream()
+        cmd = ["plan", "-out", "planfile", "-input=false", "-json" if event_stream else "-no-color"]
 
         tf_vars = self._input_output_service.get_all_terrafrom_variables()
 
@@ -140,8 +197,10 @@ class TfProcExec(object):
 
         try:
             self._set_service_status("Progress 50", "Executing Terraform Plan...")
-            self._run_tf_proc_with_command(cmd, PLAN)
-            self._set_service_status("Progress 60", "Plan Passed")
+            if event_stream:
+                event_stream.subscribe(self._save_plan_summary, TF_EVENT_CHANGE_SUMMARY)
+            self._run_tf_proc_with_command(cmd, PLAN, event_stream=event_stream)
+            self._set_service_status("Progress 60", f"Plan Passed{self._plan_summary}")
         except Exception:
             self._set_service_status("Offline", "Plan Failed")
             self._sb_data_handler.set_status(EXECUTE_STATUS, PLAN_FAILED)
@@ -151,11 +210,15 @@ class TfProcExec(object):
     def apply_terraform(self):
         self._shell_helper.logger.info("Running Terraform Apply")
         self._shell_helper.sandbox_messages.write_message("executing Terraform Apply...")
-        cmd = ["apply", "--auto-approve", "-no-color", "planfile"]
+        event_stream = self._create_event_stream()
+        cmd = ["apply", "--auto-approve", "-json" if event_stream else "-no-color", "planfile"]
 
         try:
             self._set_service_status("Progress 70", "Executing Terraform Apply...")
-            self._run_tf_proc_with_command(cmd, APPLY)
+            if event_stream:
+                self._subscribe_resource_progress(event_stream, 70, "Applying", self._planned_changes)
+                event_stream.subscribe(self._save_apply_outputs, TF_EVENT_OUTPUTS)
+            self._run_tf_proc_with_command(cmd, APPLY, event_stream=event_stream)
             self._sb_data_handler.set_status(EXECUTE_STATUS, APPLY_PASSED)
             self._set_service_status("Online", "Apply Passed")
             self._shell_helper.sandbox_messages.write_message("Terraform Apply completed")
@@ -167,12 +230,17 @@ class TfProcExec(object):
 
     def save_terraform_outputs(self):
         try:
-            self._shell_helper.logger.info("Running 'terraform output -json'")
+            # the outputs event of apply has the outputs, but without the values of sensitive outputs
+            if self._apply_outputs is not None and all("value" in output for output in self._apply_outputs.values()):
+                self._shell_helper.logger.info("Taking terraform outputs from the apply outputs event")
+                unparsed_output_json = self._apply_outputs
+            else:
+                self._shell_helper.logger.info("Running 'terraform output -json'")
 
-            # get all TF outputs in json format
-            cmd = ["output", "-json"]
-            tf_exec_output = self._run_tf_proc_with_command(cmd, OUTPUT, write_to_log=False)
-            unparsed_output_json = json.loads(tf_exec_output)
+                # get all TF outputs in json format
+                cmd = ["output", "-json"]
+                tf_exec_output = self._run_tf_proc_with_command(cmd, OUTPUT, write_to_log=False, capture_output=True)
+                unparsed_output_json = json.loads(tf_exec_output)
 
             self._input_output_service.parse_and_save_outputs(unparsed_output_json)
 
@@ -193,50 +261,132 @@ class TfProcExec(object):
             return False
         return True
 
-    def _run_tf_proc_with_command(self, cmd: list, command: str, write_to_log: bool = True) -> str:
-        tform_command = [f"{os.path.join(self._tf_working_dir, 'terraform.exe')}"]
+    def _run_tf_proc_with_command(self, cmd: list, command: str, write_to_log: bool = True,
+                                  capture_output: bool = False, event_stream: TfEventStream = None) -> str:
+        """
+        the output is written to the exec log line by line while the command runs, only the end of the output
+        is kept for the error message. returns the whole output when capture_output is set.
+        the output of commands run with -json is published to event_stream, the exec log gets the event messages
+        """
+        tform_command = [self._tf_exe_path]
         tform_command.extend(cmd)
 
-        try:
-            output = check_output(tform_command, cwd=self._tf_working_dir, stderr=STDOUT).decode('utf-8')
-
-            clean_output = StringCleaner.get_clean_string(output)
+        on_line = self._write_line_to_exec_log if write_to_log else None
+        if event_stream:
             if write_to_log:
-                self._write_to_exec_log(command, clean_output, INFO_LOG_LEVEL)
-            return output
+                event_stream.subscribe(self._write_event_to_exec_log)
+            on_line = event_stream.publish_line
 
-        except CalledProcessError as e:
-            clean_output = StringCleaner.get_clean_string(e.output.decode('utf-8'))
-            self._shell_helper.logger.error(
-                f"Error occurred while trying to execute Terraform | Output = {clean_output}"
+        try:
+            if write_to_log:
+                self._write_exec_log_marker(command, "START", INFO_LOG_LEVEL)
+            result = StreamingProcess(tform_command, self._tf_working_dir, dict(os.environ, **self._tf_env)).run(
+                on_line, capture_output
             )
-            if command in ALLOWED_LOGGING_CMDS:
-                self._write_to_exec_log(command, clean_output, ERROR_LOG_LEVEL)
-            raise TerraformExecutionError(f"Error during Terraform {command}. "
-                                          f"For more information please look at the logs.",
-                                          clean_output)
         except Exception as e:
             clean_output = StringCleaner.get_clean_string(str(e))
             self._shell_helper.logger.error(f"Error Running Terraform {command} {clean_output}")
             raise TerraformExecutionError("Error during Terraform Plan. For more information please look at the logs.")
 
-    def _write_to_exec_log(self, command: str, log_data: str, log_level: int) -> None:
-        clean_output = StringCleaner.get_clean_string(log_data)
-        self._exec_output_log.log(
-            log_level,
-            f"-------------------------------------------------=< {command} START "
-            f">=-------------------------------------------------\n"
-        )
-        self._exec_output_log.log(log_level, clean_output)
-        self._exec_output_log.log(
-            log_level,
-            f"-------------------------------------------------=< {command} END "
-            f">=---------------------------------------------------\n"
-        )
+        if result.return_code == 0:
+            if write_to_log:
+                self._write_exec_log_marker(command, "END", INFO_LOG_LEVEL)
+            return result.output
 
-    def _set_service_status(self, status: str, description: str):
+        errors = event_stream.get_errors() if event_stream else []
+        clean_output = StringCleaner.get_clean_string("\n\n".join(errors) if errors else result.tail)
+        self._shell_helper.logger.error(
+            f"Error occurred while trying to execute Terraform | Output = {clean_output}"
+        )
+        if write_to_log:
+            self._write_exec_log_marker(command, "END", ERROR_LOG_LEVEL)
+        elif command in ALLOWED_LOGGING_CMDS:
+            self._write_exec_log_marker(command, "START", ERROR_LOG_LEVEL)
+            self._exec_output_log.log(ERROR_LOG_LEVEL, clean_output)
+            self._write_exec_log_marker(command, "END", ERROR_LOG_LEVEL)
+        raise TerraformExecutionError(f"Error during Terraform {command}. "
+                                      f"For more information please look at the logs.",
+                                      clean_output)
+
+    @contextmanager
+    def _init_lock(self):
+        """
+        locks the shared plugin cache and provider mirror while init installs providers from them.
+        terraform has no separate provider install command, so the whole init is locked (backend init included)
+        and the inits on the server run one at a time, modules are installed before by 'terraform get'
+        """
+        with ExitStack() as init_lock:
+            if self._plugin_cache:
+                init_lock.enter_context(self._plugin_cache.lock())
+            if self._provider_mirror:
+                init_lock.enter_context(self._provider_mirror.lock(shared=True))
+            yield
+
+    def _update_provider_mirror(self) -> None:
+        """ add providers that init installed from their registry to the local mirror """
+        if not self._provider_mirror or self._provider_mirror.offline or self._provider_mirror.read_only:
+            return
+        try:
+            missing_providers = self._provider_mirror.get_missing_providers(self._tf_working_dir)
+            if not missing_providers:
+                return
+            self._shell_helper.logger.info(f"Adding providers to local mirror: {missing_providers}")
+            with self._provider_mirror.lock():
+                self._run_tf_proc_with_command(
+                    ["providers", "mirror", f"-platform={OS_TYPES[sys.platform]}", self._provider_mirror.mirror_dir],
+                    MIRROR_PROVIDERS, write_to_log=False
+                )
+        except Exception as e:
+            # the deployment doesn't depend on the mirror, it will be updated by the next init
+            self._shell_helper.logger.warning(f"Failed to update local provider mirror -> {str(e)}")
+
+    def _write_exec_log_marker(self, command: str, marker: str, log_level: int) -> None:
+        padding = "-" * (49 if marker == "START" else 51)
+        self._exec_output_log.log(log_level, f"-------------------------------------------------=< {command} {marker} "
+                                             f">={padding}\n")
+
+    def _write_line_to_exec_log(self, line: str) -> None:
+        self._exec_output_log.log(INFO_LOG_LEVEL, StringCleaner.get_clean_string(line))
+
+    def _write_event_to_exec_log(self, event: dict) -> None:
+        log_level = ERROR_LOG_LEVEL if event.get("@level") == "error" else INFO_LOG_LEVEL
+        self._exec_output_log.log(log_level, StringCleaner.get_clean_string(TfEventStream.format_event(event)))
+
+    def _create_event_stream(self) -> TfEventStream:
+        """ event stream of a command run with -json, None when the human readable output is used """
+        return TfEventStream(self._shell_helper.logger) if self._use_json_output else None
+
+    def _save_plan_summary(self, event: dict) -> None:
+        changes = event.get("changes", {})
+        self._planned_changes = changes.get("add", 0) + changes.get("change", 0) + changes.get("remove", 0)
+        self._plan_summary = f" ({changes.get('add', 0)} to add, {changes.get('change', 0)} to change, " \
+                             f"{changes.get('remove', 0)} to destroy)"
+
+    def _save_apply_outputs(self, event: dict) -> None:
+        self._apply_outputs = event.get("outputs", {})
+
+    def _subscribe_resource_progress(self, event_stream: TfEventStream, start_progress: int, action: str,
+                                     planned_changes: int = 0) -> None:
+        """ live status progress goes from start_progress to 99 as the resource changes complete """
+        def set_progress(completed: int, planned: int) -> None:
+            progress = start_progress + (99 - start_progress) * completed // planned
+            self._set_service_status(f"Progress {progress}", f"{action} resources: {completed}/{planned}",
+                                     throttle=True)
+
+        ResourceProgress(set_progress, planned_changes).subscribe(event_stream)
+
+    def _is_json_output_supported(self, tf_version: str) -> bool:
+        parsed_version = TfVersionSelector.parse_version(tf_version or "")
+        if parsed_version and parsed_version >= TF_JSON_OUTPUT_MIN_VERSION:
+            return True
+        self._shell_helper.logger.info(f"Terraform '{tf_version}' has no machine readable output, "
+                                       f"using the human readable output")
+        return False
+
+    def _set_service_status(self, status: str, description: str, throttle: bool = False):
         self._shell_helper.live_status_updater.set_service_live_status(
             self._shell_helper.tf_service.name,
             status,
-            description
+            description,
+            throttle
         )
@@ -0,0 +1,80 @@
+import os
+import re
+from logging import Logger
+from typing import Iterable, List, Optional, Tuple
+
+from cloudshell.iac.terraform.tagging.tag_terraform_resources import Hcl2Parser, LoggerHelper
+
+VERSION_PATTERN = re.compile(r"^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?$")
+CONSTRAINT_PATTERN = re.compile(r"^(=|!=|>=|<=|>|<|~>)?\s*(\S+)$")
+
+
+class TfVersionSelector(object):
+    """
+    Selects a terraform version from the 'required_version' constraints of a module.
+    Supports the terraform constraint syntax: =, !=, >, >=, <, <=, ~> (comma separated).
+    Pre-release versions are never selected.
+    """
+
+    @staticmethod
+    def get_required_version_constraints(module_dir: str, logger: Logger) -> List[str]:
+        """ collect 'required_version' from the terraform blocks of all tf files in the root module dir """
+        LoggerHelper.init_logging(logger)
+        constraints = []
+        for file_name in sorted(os.listdir(module_dir)):
+            if not file_name.endswith(".tf"):
+                continue
+            tf_as_dict = Hcl2Parser.get_tf_file_as_dict(os.path.join(module_dir, file_name))
+            for terraform_block in tf_as_dict.get("terraform", []):
+                required_version = terraform_block.get("required_version")
+                if required_version:
+                    constraints.extend(x.strip() for x in required_version.split(",") if x.strip())
+        return constraints
+
+    @staticmethod
+    def parse_version(version: str) -> Optional[Tuple[int, int, int]]:
+        match = VERSION_PATTERN.match(version.strip())
+        if not match:
+            return None
+        return tuple(int(x) if x else 0 for x in match.groups())
+
+    @staticmethod
+    def is_version_allowed(version: str, constraints: List[str]) -> bool:
+        parsed_version = TfVersionSelector.parse_version(version)
+        if not parsed_version:
+            return False
+        return all(TfVersionSelector._check_constraint(parsed_version, constraint) for constraint in constraints)
+
+    @staticmethod
+    def select_newest_version(versions: Iterable[str], constraints: List[str]) -> str:
+        allowed_versions = [x for x in versions if TfVersionSelector.is_version_allowed(x, constraints)]
+        if not allowed_versions:
+            return ""
+        return max(allowed_versions, key=TfVersionSelector.parse_version)
+
+    @staticmethod
+    def _check_constraint(version: Tuple[int, int, int], constraint: str) -> bool:
+        match = CONSTRAINT_PATTERN.match(constraint.strip())
+        required_version = TfVersionSelector.parse_version(match.group(2)) if match else None
+        if not required_version:
+            raise ValueError(f"Invalid terraform version constraint '{constraint}'")
+
+        operator = match.group(1) or "="
+        if operator == "=":
+            return version == required_version
+        if operator == "!=":
+            return version != required_version
+        if operator == ">":
+            return version > required_version
+        if operator == ">=":
+            return version >= required_version
+        if operator == "<":
+            return version < required_version
+        if operator == "<=":
+            return version <= required_version
+
+        # '~>' allows only the right-most specified segment to grow: '~> 1.2' is '>= 1.2, < 2.0'
+        # and '~> 1.2.3' is '>= 1.2.3, < 1.3.0'
+        segments_count = len([x for x in VERSION_PATTERN.match(match.group(2)).groups() if x is not None])
+        prefix_length = max(segments_count - 1, 1)
+        return version >= required_version and version[:prefix_length] == required_version[:prefix_length]
@@ -0,0 +1,73 @@
+import os
+import shutil
+import time
+from logging import Logger
+from typing import Dict
+
+from cloudshell.iac.terraform.constants import WARM_WORKING_DIRS_FILE
+from cloudshell.iac.terraform.services.file_lock import FileLock
+from cloudshell.iac.terraform.services.file_utils import read_json, atomic_write_json, get_dir_size
+from cloudshell.iac.terraform.services.local_dir_service import LocalDir, handle_remove_readonly
+
+
+class WarmWorkingDirs(object):
+    """
+    Working dirs retained after execute when remote state is used (with .terraform, providers, modules and the
+    lock file), so destroy runs in a ready working dir instead of downloading the module and running a cold init.
+    Retained dirs are shared by all driver processes on the execution server and are evicted least recently
+    retained first once their total size is bigger than max_size_mb.
+    A service claims its dir before using it, claimed dirs are owned by the service and are never evicted.
+    """
+    def __init__(self, cache_root_dir: str, max_size_mb: int, logger: Logger):
+        self._index_path = os.path.join(cache_root_dir, WARM_WORKING_DIRS_FILE)
+        self._max_size = max_size_mb * 1024 * 1024
+        self._logger = logger
+
+    def retain(self, tf_working_dir: str) -> bool:
+        """ keep the working dir for the next run of the service, returns False if it does not fit the quota """
+        temp_dir = LocalDir.get_local_temp_dir(tf_working_dir)
+        size = get_dir_size(temp_dir)
+        with FileLock(f"{self._index_path}.lock"):
+            index = self._read()
+            index[temp_dir] = {"last_used": time.time(), "size": size}
+            self._evict(index)
+            self._write(index)
+        if temp_dir not in index:
+            return False
+        self._logger.info(f"Retained working dir '{tf_working_dir}' for the next run")
+        return True
+
+    def claim(self, tf_working_dir: str) -> bool:
+        """ take the working dir out of the retained dirs, returns False if it was evicted already """
+        if not tf_working_dir or not os.path.isdir(tf_working_dir):
+            return False
+        temp_dir = LocalDir.get_local_temp_dir(tf_working_dir)
+        with FileLock(f"{self._index_path}.lock"):
+            index = self._read()
+            if index.pop(temp_dir, None) is not None:
+                self._write(index)
+            # evicted dirs are moved away under the lock, so the dir is either complete or gone
+            return os.path.isdir(tf_working_dir)
+
+    def _evict(self, index: Dict[str, dict]) -> None:
+        """ delete least recently retained dirs until the retained dirs fit max size, must be called under lock """
+        total_size = sum(entry["size"] for entry in index.values())
+        for temp_dir, entry in sorted(index.items(), key=lambda x: x[1]["last_used"]):
+            if total_size <= self._max_size:
+                break
+            self._logger.info(f"Evicting retained working dir '{temp_dir}'")
+            del index[temp_dir]
+            total_size -= entry["size"]
+            evicted_dir = f"{temp_dir}.evicted"
+            try:
+                os.rename(temp_dir, evicted_dir)
+            except OSError:
+                # deleted by someone else
+                continue
+            shutil.rmtree(evicted_dir, onerror=handle_remove_readonly)
+
+    def _read(self) -> Dict[str, dict]:
+        return read_json(self._index_path)
+
+    def _write(self, index: Dict[str, dict]) -> None:
+        atomic_write_json(self._index_path, index)
@@ -0,0 +1,100 @@
+import errno
+import fnmatch
+import os
+import shutil
+import stat
+import sys
+from logging import Logger
+
+if sys.platform.startswith("linux"):
+    import fcntl
+
+# ioctl request that clones the extents of a file (btrfs, xfs, ...), defined in linux/fs.h
+FICLONE = 0x40049409
+
+# files written in the working dir by init/plan/apply, tagging and the backend handler are never linked to the
+# snapshot, so changes to them can not leak into other working dirs
+PRIVATE_FILE_PATTERNS = ["*_override.tf", "backend.tf", "planfile", ".terraform*", "*.tfstate", "*.tfstate.*",
+                         "override_log"]
+
+REFLINK = "reflink"
+HARDLINK = "hardlink"
+COPY = "copy"
+
+
+class WorkingDirMaterializer(object):
+    """
+    Builds a working dir from a read-only module snapshot without copying file contents where possible.
+    Files are reflinked where the filesystem supports it, otherwise hardlinked (POSIX only, on Windows a hardlink
+    shares the read-only attribute, so files are copied). Dirs and private files are always real, writable copies.
+    """
+    def __init__(self, logger: Logger):
+        self._logger = logger
+        self._methods = [COPY]
+        if os.name != "nt":
+            self._methods.insert(0, HARDLINK)
+        if sys.platform.startswith("linux"):
+            self._methods.insert(0, REFLINK)
+
+    @staticmethod
+    def is_private_file(file_name: str) -> bool:
+        return any(fnmatch.fnmatch(file_name, pattern) for pattern in PRIVATE_FILE_PATTERNS)
+
+    def materialize(self, source_dir: str, dest_dir: str) -> None:
+        for root, dir_names, file_names in os.walk(source_dir):
+            dest_root = os.path.join(dest_dir, os.path.relpath(root, source_dir))
+            os.makedirs(dest_root, exist_ok=True)
+            os.chmod(dest_root, stat.S_IMODE(os.stat(root).st_mode) | stat.S_IWUSR)
+
+            for name in dir_names + file_names:
+                source_path = os.path.join(root, name)
+                dest_path = os.path.join(dest_root, name)
+                if os.path.islink(source_path):
+                    os.symlink(os.readlink(source_path), dest_path)
+                elif name in file_names:
+                    self._materialize_file(source_path, dest_path)
+
+            # symlinked dirs were recreated as links, do not walk into them
+            dir_names[:] = [x for x in dir_names if not os.path.islink(os.path.join(root, x))]
+
+        self._logger.info(f"Materialized '{dest_dir}' using {self._methods[0]}")
+
+    def _materialize_file(self, source_path: str, dest_path: str) -> None:
+        if self.is_private_file(os.path.basename(source_path)):
+            self._copy(source_path, dest_path)
+            return
+
+        while True:
+            method = self._methods[0]
+            try:
+                if method == REFLINK:
+                    self._reflink(source_path, dest_path)
+                elif method == HARDLINK:
+                    os.link(source_path, dest_path)
+                else:
+                    self._copy(source_path, dest_path)
+                return
+            except OSError as e:
+                if method == COPY or e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV,
+                                                     errno.EPERM, errno.EMLINK, errno.ENOSYS):
+                    raise
+                # not supported between these dirs, fall back for the rest of the files
+                self._logger.debug(f"{method} not supported ({e}), falling back")
+                self._methods.pop(0)
+
+    @staticmethod
+    def _reflink(source_path: str, dest_path: str) -> None:
+        try:
+            with open(source_path, "rb") as source_file, open(dest_path, "wb") as dest_file:
+                fcntl.ioctl(dest_file.fileno(), FICLONE, source_file.fileno())
+        except OSError:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            raise
+        # a reflink is an independent file, so it can be private and writable
+        os.chmod(dest_path, stat.S_IMODE(os.stat(source_path).st_mode) | stat.S_IWUSR)
+
+    @staticmethod
+    def _copy(source_path: str, dest_path: str) -> None:
+        shutil.copy2(source_path, dest_path)
+        os.chmod(dest_path, stat.S_IMODE(os.stat(dest_path).st_mode) | stat.S_IWUSR)
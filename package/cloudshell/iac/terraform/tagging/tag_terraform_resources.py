@@ -14,9 +14,11 @@
 # - start_tagging_terraform_resources
 # - _perform_terraform_init_plan
 # - OverrideTagsTemplatesCreator
+# - _get_plan_errors_from_json_output (added)
 
 import argparse
 import re
+from contextlib import nullcontext
 import enum
 import traceback
 from typing import List
@@ -30,6 +32,7 @@ import json
 
 ### Added
 from cloudshell.iac.terraform.models.exceptions import TerraformAutoTagsError
+from cloudshell.iac.terraform.services.tf_event_stream import TfEventStream
 
 
 # =====================================================================================================================
@@ -566,29 +569,48 @@ class ResourcesTagger:
 
 
 # modified
-def _perform_terraform_init_plan(main_tf_dir_path: str, inputs_dict: dict):
+def _perform_terraform_init_plan(main_tf_dir_path: str, inputs_dict: dict, terraform_exe_path: str = None,
+                                 terraform_env: dict = None, init_lock=None, use_json: bool = False):
     inputs = []
     for input_key, input_value in inputs_dict.items():
         inputs.extend(['-var', f'{input_key}={input_value}'])
 
-    terraform_exe_path = f'{os.path.join(main_tf_dir_path, "terraform.exe")}'
+    if not terraform_exe_path:
+        terraform_exe_path = f'{os.path.join(main_tf_dir_path, "terraform.exe")}'
     init_command = [terraform_exe_path, 'init', '-no-color']
-    plan_command = [terraform_exe_path, 'plan', '-no-color', '-input=false']
+    plan_command = [terraform_exe_path, 'plan', '-json' if use_json else '-no-color', '-input=false']
     plan_command.extend(inputs)
 
-    init = subprocess.Popen(init_command, cwd=main_tf_dir_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    init_stdout, init_stderr = init.communicate()
+    env = dict(os.environ, **(terraform_env or {}))
+    # init_lock protects the shared plugin cache while init populates it
+    with init_lock() if init_lock else nullcontext():
+        init = subprocess.Popen(init_command, cwd=main_tf_dir_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                env=env)
+        init_stdout, init_stderr = init.communicate()
 
     if init_stderr:
         return init_stdout, init_stderr, init.returncode
 
     # Save the output to a var proc_stdout
-    plan = subprocess.Popen(plan_command, cwd=main_tf_dir_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    plan = subprocess.Popen(plan_command, cwd=main_tf_dir_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            env=env)
     plan_stdout, plan_stderr = plan.communicate()
+    if use_json:
+        plan_stderr = _get_plan_errors_from_json_output(plan_stdout.decode(errors="replace"),
+                                                        plan_stderr.decode(errors="replace"))
     plan_stdout = ""
     return plan_stdout, plan_stderr, plan.returncode
 
 
+def _get_plan_errors_from_json_output(stdout: str, stderr: str) -> str:
+    # with -json the errors are diagnostic events in stdout, render them the way terraform prints them to stderr so
+    # the untaggable resources patterns match
+    event_stream = TfEventStream(LoggerHelper.log_instance)
+    for line in stdout.splitlines():
+        event_stream.publish_line(line)
+    return "\n\n".join(event_stream.get_errors() + ([stderr] if stderr.strip() else []))
+
+
 def _get_untaggable_resources_types_from_plan_output(text: str) -> List[str]:
     untaggable_resources = RegexHelper.\
         get_all_group_match_from_regex_result(text=text,
@@ -599,7 +621,8 @@ def _get_untaggable_resources_types_from_plan_output(text: str) -> List[str]:
 
 # modified
 def start_tagging_terraform_resources(main_dir_path: str, logger, tags_dict: dict, inputs_dict: dict = None,
-                                      terraform_version: str = ""):
+                                      terraform_version: str = "", terraform_exe_path: str = None,
+                                      terraform_env: dict = None, init_lock=None, use_json: bool = False):
     if not os.path.exists(main_dir_path):
         raise TerraformAutoTagsError(f"Path {main_dir_path} does not exist")
     tfs_folder_path = main_dir_path
@@ -610,7 +633,8 @@ def start_tagging_terraform_resources(main_dir_path: str, logger, tags_dict: dic
 
     LoggerHelper.write_info(f"Trying to preform terraform init & plan in the directory '{tfs_folder_path}'"
                             " in order to check for any validation errors in tf files")
-    stdout, stderr, return_code = _perform_terraform_init_plan(tfs_folder_path, inputs_dict)  # modified
+    stdout, stderr, return_code = _perform_terraform_init_plan(tfs_folder_path, inputs_dict, terraform_exe_path,
+                                                               terraform_env, init_lock, use_json)  # modified
     if return_code != 0 or stderr:
         LoggerHelper.write_error("Exit before the override procedure began because the init/plan failed."
                                  f" (Return_code is {return_code})"
@@ -646,7 +670,8 @@ def start_tagging_terraform_resources(main_dir_path: str, logger, tags_dict: dic
     # modified
     # Check (by analyzing the terraform plan output) to see if any of the override files
     # has a "tags/labels" that was assigned to untaggable resources
-    stdout, stderr, return_code = _perform_terraform_init_plan(tfs_folder_path, inputs_dict)
+    stdout, stderr, return_code = _perform_terraform_init_plan(tfs_folder_path, inputs_dict, terraform_exe_path,
+                                                               terraform_env, init_lock, use_json)
 
     # Analyzing any errors (if exist) from the terraform plan output
     LoggerHelper.write_info(f"Checking for any errors in plan output")
@@ -680,7 +705,8 @@ def start_tagging_terraform_resources(main_dir_path: str, logger, tags_dict: dic
             LoggerHelper.write_info(f"Trying to preform one final terraform init & plan in the directory '{tfs_folder_path}'"
                 " in order to check for any validation errors in the new override files")
             # modified
-            stdout, stderr, return_code = _perform_terraform_init_plan(tfs_folder_path, inputs_dict)
+            stdout, stderr, return_code = _perform_terraform_init_plan(tfs_folder_path, inputs_dict, terraform_exe_path,
+                                                                       terraform_env, init_lock, use_json)
             if return_code != 0 or stderr:
                 LoggerHelper.write_error("Errors were found in the last validation check:"
                                          f" (Return_code is {return_code})"
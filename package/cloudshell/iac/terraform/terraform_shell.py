@@ -1,15 +1,21 @@
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, Future
 from contextlib import nullcontext
+from typing import Tuple
 
 from cloudshell.shell.core.driver_context import ResourceCommandContext
 from cloudshell.shell.core.session.logging_session import LoggingSessionContext
 from cloudshell.iac.terraform import TerraformShellConfig
-from cloudshell.iac.terraform.constants import DESTROY_STATUS, DESTROY_PASSED, ATTRIBUTE_NAMES
+from cloudshell.iac.terraform.constants import DESTROY_STATUS, DESTROY_PASSED, ATTRIBUTE_NAMES, PREPARATION_WORKERS, \
+    EXECUTE_STATUS, APPLY_PASSED
 from cloudshell.iac.terraform.models.shell_helper import ShellHelperObject
+from cloudshell.iac.terraform.services.backend_handler import BackendHandler
 from cloudshell.iac.terraform.services.local_dir_service import LocalDir
 from cloudshell.iac.terraform.services.provider_handler import ProviderHandler
 from cloudshell.iac.terraform.services.sandox_data import SandboxDataHandler
 from cloudshell.iac.terraform.services.object_factory import ObjectFactory
+from cloudshell.iac.terraform.services.warm_working_dirs import WarmWorkingDirs
 
 
 class TerraformShell:
@@ -27,17 +33,47 @@ class TerraformShell:
         with nullcontext(self._logger) if self._logger else LoggingSessionContext(self._context) as logger:
             shell_helper = ObjectFactory.create_shell_helper(self._tf_service, self._context, self._config, logger)
             sandbox_data_handler = SandboxDataHandler(shell_helper)
-            tf_working_dir = LocalDir.prepare_tf_working_dir(logger, sandbox_data_handler, shell_helper)
+            self._discard_warm_working_dir(sandbox_data_handler, shell_helper)
+            with ThreadPoolExecutor(max_workers=PREPARATION_WORKERS) as executor:
+                provider_future, backend_future = self._start_preparation(executor, sandbox_data_handler,
+                                                                          shell_helper)
+                tf_working_dir = LocalDir.prepare_tf_working_dir(logger, sandbox_data_handler, shell_helper,
+                                                                 self._config)
 
-            self._execute_procedure(sandbox_data_handler, shell_helper, tf_working_dir)
+            self._execute_procedure(sandbox_data_handler, shell_helper, tf_working_dir, provider_future,
+                                    backend_future)
+
+    def _start_preparation(self, executor: ThreadPoolExecutor, sandbox_data_handler: SandboxDataHandler,
+                           shell_helper: ShellHelperObject) -> Tuple[Future, Future]:
+        """
+        start the cloud provider and backend lookups, they run while the working dir is prepared.
+        errors are raised when the results are used, the same place the lookups used to run.
+        the provider env vars are set by _set_provider_env_vars on the main thread
+        """
+        provider_future = executor.submit(self._provider_handler.get_provider_env_vars, shell_helper)
+        backend_future = executor.submit(self._prepare_backend_handler, sandbox_data_handler, shell_helper)
+        return provider_future, backend_future
+
+    @staticmethod
+    def _set_provider_env_vars(provider_future: Future) -> None:
+        # the working dir preparation reads os.environ (git, requests proxies), it is only changed after it is done
+        os.environ.update(provider_future.result())
+
+    @staticmethod
+    def _prepare_backend_handler(sandbox_data_handler: SandboxDataHandler,
+                                 shell_helper: ShellHelperObject) -> BackendHandler:
+        backend_handler = ObjectFactory.create_backend_handler(shell_helper, sandbox_data_handler)
+        backend_handler.fetch_backend_data()
+        return backend_handler
 
     def _execute_procedure(self, sandbox_data_handler: SandboxDataHandler, shell_helper: ShellHelperObject,
-                           tf_working_dir: str):
+                           tf_working_dir: str, provider_future: Future, backend_future: Future):
         try:
             tf_proc_executer = ObjectFactory.create_tf_proc_executer(self._config, sandbox_data_handler,
-                                                                     shell_helper, tf_working_dir)
+                                                                     shell_helper, tf_working_dir,
+                                                                     backend_future.result())
             if tf_proc_executer.can_execute_run():
-                self._provider_handler.initialize_provider(shell_helper)
+                self._set_provider_env_vars(provider_future)
                 tf_proc_executer.init_terraform()
                 tf_proc_executer.tag_terraform()
                 tf_proc_executer.plan_terraform()
@@ -49,7 +85,43 @@ class TerraformShell:
                                                         "execute again.")
         finally:
             if self._using_remote_state(shell_helper):
-                LocalDir.delete_local_temp_dir(sandbox_data_handler, tf_working_dir)
+                self._release_working_dir(sandbox_data_handler, shell_helper, tf_working_dir)
+
+    def _create_warm_working_dirs(self, logger: logging.Logger) -> WarmWorkingDirs:
+        return WarmWorkingDirs(self._config.cache_root_dir, self._config.warm_working_dirs_max_size_mb, logger)
+
+    def _discard_warm_working_dir(self, sandbox_data_handler: SandboxDataHandler, shell_helper: ShellHelperObject):
+        """
+        execute always downloads the module again (the branch may have moved), with remote state a working dir
+        kept for destroy by an earlier execute is deleted instead of reused
+        """
+        tf_working_dir = sandbox_data_handler.get_tf_working_dir()
+        if not self._using_remote_state(shell_helper) or not tf_working_dir:
+            return
+        if self._create_warm_working_dirs(shell_helper.logger).claim(tf_working_dir):
+            shell_helper.logger.info(f"Deleting working dir '{tf_working_dir}' kept from the previous run")
+            LocalDir.delete_local_temp_dir(sandbox_data_handler, tf_working_dir)
+        else:
+            sandbox_data_handler.set_tf_working_dir("")
+
+    def _claim_warm_working_dir(self, sandbox_data_handler: SandboxDataHandler, logger: logging.Logger):
+        """ a working dir kept by execute is owned by destroy, so it is not evicted while used """
+        self._create_warm_working_dirs(logger).claim(sandbox_data_handler.get_tf_working_dir())
+
+    def _release_working_dir(self, sandbox_data_handler: SandboxDataHandler, shell_helper: ShellHelperObject,
+                             tf_working_dir: str):
+        """ the state is remote, so the working dir is deleted unless the apply passed and it is kept for destroy """
+        if self._config.keep_warm_working_dir and sandbox_data_handler.get_status(EXECUTE_STATUS) == APPLY_PASSED:
+            try:
+                if self._create_warm_working_dirs(shell_helper.logger).retain(tf_working_dir):
+                    return
+            except Exception as e:
+                shell_helper.logger.warning(f"Failed to retain working dir -> {str(e)}")
+            if not LocalDir.does_working_dir_exists(tf_working_dir):
+                # evicted to fit the quota
+                sandbox_data_handler.set_tf_working_dir("")
+                return
+        LocalDir.delete_local_temp_dir(sandbox_data_handler, tf_working_dir)
 
     def destroy_terraform(self):
         # initialize a logger if logger wasn't passed during init
@@ -58,19 +130,29 @@ class TerraformShell:
             shell_helper = ObjectFactory.create_shell_helper(self._tf_service, self._context, self._config, logger)
             sandbox_data_handler = SandboxDataHandler(shell_helper)
             self._validate_remote_backend_or_existing_working_dir(sandbox_data_handler, shell_helper)
+            if self._using_remote_state(shell_helper):
+                self._claim_warm_working_dir(sandbox_data_handler, logger)
+
+            with ThreadPoolExecutor(max_workers=PREPARATION_WORKERS) as executor:
+                provider_future, backend_future = self._start_preparation(executor, sandbox_data_handler,
+                                                                          shell_helper)
+                # destroy the commit that was applied, not the current head of the branch
+                tf_working_dir = LocalDir.prepare_tf_working_dir(logger, sandbox_data_handler, shell_helper,
+                                                                 self._config, reuse_module_snapshot=True)
 
-            tf_working_dir = LocalDir.prepare_tf_working_dir(logger, sandbox_data_handler, shell_helper)
-            self._destroy_procedure(sandbox_data_handler, shell_helper, tf_working_dir)
+            self._destroy_procedure(sandbox_data_handler, shell_helper, tf_working_dir, provider_future,
+                                    backend_future)
 
     def _destroy_procedure(self, sandbox_data_handler: SandboxDataHandler, shell_helper: ShellHelperObject,
-                           tf_working_dir: str):
+                           tf_working_dir: str, provider_future: Future, backend_future: Future):
         if not tf_working_dir:
             self._handle_error_output(shell_helper, "Destroy failed due to missing local directory")
 
         try:
-            self._provider_handler.initialize_provider(shell_helper)
+            self._set_provider_env_vars(provider_future)
             tf_proc_executer = ObjectFactory.create_tf_proc_executer(self._config, sandbox_data_handler,
-                                                                     shell_helper, tf_working_dir)
+                                                                     shell_helper, tf_working_dir,
+                                                                     backend_future.result())
             if tf_proc_executer.can_destroy_run():
                 tf_proc_executer.init_terraform()
                 tf_proc_executer.destroy_terraform()
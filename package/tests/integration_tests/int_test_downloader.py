@@ -68,8 +68,7 @@ class TestTerraformDownloader(TestCase):
 
     def test_download_terraform_executable(self):
         downloader = Downloader(self._driver_helper)
-        tf_workingdir = downloader.download_terraform_module()
-        downloader.download_terraform_executable(tf_workingdir)
+        tf_exe_path, _ = downloader.download_terraform_executable()
 
-        self.assertTrue(os.path.exists(os.path.join(tf_workingdir, TERRAFORM_EXEC_FILE)))
-        self.assertTrue(os.access(os.path.join(tf_workingdir, TERRAFORM_EXEC_FILE), os.X_OK))
+        self.assertEqual(os.path.basename(tf_exe_path), TERRAFORM_EXEC_FILE)
+        self.assertTrue(os.access(tf_exe_path, os.X_OK))
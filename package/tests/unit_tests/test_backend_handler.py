@@ -0,0 +1,48 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock
+
+from cloudshell.iac.terraform.services.backend_handler import BackendHandler
+
+
+class TestBackendHandler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.working_dir = tempfile.mkdtemp()
+        self.shell_helper = Mock()
+        self.shell_helper.attr_handler.get_attribute.return_value = "backend resource"
+        self.shell_helper.api.ExecuteCommand.return_value.Output = json.dumps({
+            "backend_data": {"tf_state_file_string": 'terraform {\n  backend "s3" {}\n}\n'},
+            "backend_secret_vars": {"access_key": "secret"}
+        })
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.working_dir)
+
+    def test_generate_backend_cfg_file_uses_fetched_data(self):
+        # arrange
+        backend_handler = BackendHandler(self.shell_helper, "", "uuid")
+        backend_handler.fetch_backend_data()
+        backend_handler.set_working_dir(self.working_dir)
+
+        # act
+        backend_handler.generate_backend_cfg_file()
+
+        # assert
+        self.shell_helper.api.ExecuteCommand.assert_called_once()
+        self.assertTrue(os.path.isfile(os.path.join(self.working_dir, "backend.tf")))
+        self.assertEqual(backend_handler.get_backend_secret_vars(), {"access_key": "secret"})
+
+    def test_fetch_backend_data_no_backend(self):
+        # arrange
+        self.shell_helper.attr_handler.get_attribute.return_value = ""
+        backend_handler = BackendHandler(self.shell_helper, self.working_dir, "uuid")
+
+        # act
+        backend_handler.fetch_backend_data()
+
+        # assert
+        self.shell_helper.api.ExecuteCommand.assert_not_called()
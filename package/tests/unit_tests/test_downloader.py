@@ -0,0 +1,45 @@
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock, patch
+
+from cloudshell.iac.terraform import TerraformShellConfig
+from cloudshell.iac.terraform.constants import ATTRIBUTE_NAMES
+from cloudshell.iac.terraform.downloaders.downloader import Downloader
+from cloudshell.iac.terraform.services.module_cache import ModuleSnapshot
+
+
+class TestDownloader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_root = tempfile.mkdtemp()
+        self.shell_helper = Mock()
+        attributes = {ATTRIBUTE_NAMES.GIT_TERRAFORM_MODULE_URL: "https://github.com/account/repo/tree/main/live",
+                      ATTRIBUTE_NAMES.BRANCH: "main", ATTRIBUTE_NAMES.GIT_PROVIDER: "github"}
+        self.shell_helper.attr_handler.get_attribute.side_effect = lambda name: attributes.get(name, "")
+        self.shell_helper.api.DecryptPassword.return_value = Mock(Value="token")
+        self.downloader = Downloader(self.shell_helper, TerraformShellConfig(cache_root_dir=self.cache_root))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_root)
+
+    @patch.object(Downloader, "_downloader_factory")
+    def test_download_recorded_commit_of_evicted_snapshot(self, downloader_factory):
+        # arrange
+        module_snapshot = ModuleSnapshot("evicted-key", "a" * 40, "live")
+
+        # act
+        self.downloader.download_terraform_module(module_snapshot)
+
+        # assert
+        downloader_factory.return_value.download_repo.assert_called_once_with(
+            "https://github.com/account/repo/tree/main/live", "token", "a" * 40)
+
+    @patch.object(Downloader, "_downloader_factory")
+    def test_download_head_of_branch(self, downloader_factory):
+        # act
+        self.downloader.download_terraform_module()
+
+        # assert
+        downloader_factory.return_value.download_repo.assert_called_once_with(
+            "https://github.com/account/repo/tree/main/live", "token", "main")
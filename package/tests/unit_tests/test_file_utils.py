@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+
+from cloudshell.iac.terraform.services.file_utils import read_json, atomic_write_json, get_dir_size
+
+
+class TestFileUtils(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "state", "state.json")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_atomic_write_json(self):
+        # act
+        atomic_write_json(self.file_path, {"version": "1.0.0"})
+
+        # assert
+        self.assertEqual(read_json(self.file_path), {"version": "1.0.0"})
+        self.assertEqual(os.listdir(os.path.dirname(self.file_path)), ["state.json"])
+
+    def test_atomic_write_json_failure_removes_temp_file(self):
+        # arrange
+        atomic_write_json(self.file_path, {"version": "1.0.0"})
+
+        # act
+        with patch("cloudshell.iac.terraform.services.file_utils.os.replace", side_effect=OSError("busy")):
+            self.assertRaises(OSError, atomic_write_json, self.file_path, {"version": "1.0.1"})
+
+        # assert
+        self.assertEqual(read_json(self.file_path), {"version": "1.0.0"})
+        self.assertEqual(os.listdir(os.path.dirname(self.file_path)), ["state.json"])
+
+    def test_read_json_missing_or_invalid(self):
+        # arrange
+        os.makedirs(os.path.dirname(self.file_path))
+        invalid_path = os.path.join(self.temp_dir, "invalid.json")
+        with open(invalid_path, "w") as invalid_file:
+            invalid_file.write("{")
+
+        # act & assert
+        self.assertEqual(read_json(self.file_path), {})
+        self.assertEqual(read_json(invalid_path), {})
+
+    def test_get_dir_size_ignores_symlinks(self):
+        # arrange
+        os.makedirs(os.path.join(self.temp_dir, "sub"))
+        with open(os.path.join(self.temp_dir, "sub", "provider"), "wb") as provider_file:
+            provider_file.write(b"0" * 10)
+        os.symlink(os.path.join(self.temp_dir, "sub", "provider"), os.path.join(self.temp_dir, "link"))
+
+        # act & assert
+        self.assertEqual(get_dir_size(self.temp_dir), 10)
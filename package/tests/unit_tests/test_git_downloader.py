@@ -0,0 +1,158 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from mock import Mock
+
+from cloudshell.iac.terraform.downloaders.git_downloader import GitProtocolScriptDownloader, extract_data_from_git_url
+from cloudshell.iac.terraform.services.local_dir_service import handle_remove_readonly
+from cloudshell.iac.terraform.services.module_cache import ModuleCache
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class TestGitProtocolScriptDownloader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_root = os.path.join(self.temp_dir, "cache")
+        self.work_repo = os.path.join(self.temp_dir, "work")
+        self.bare_repo = os.path.join(self.temp_dir, "repo.git")
+        self._git(["init", "--quiet", "-b", "main", self.work_repo], self.temp_dir)
+        self._commit_file("live/prod/main.tf", 'module "vpc" {\n  source = "../../modules/vpc"\n}\n')
+        self._commit_file("modules/vpc/main.tf", 'resource "null_resource" "vpc" {}\n')
+        self._commit_file("other/main.tf", 'resource "null_resource" "other" {}\n')
+        self._git(["clone", "--quiet", "--bare", self.work_repo, self.bare_repo], self.temp_dir)
+        self._git(["remote", "add", "origin", self.bare_repo], self.work_repo)
+        self.url = f"git::file://{self.bare_repo}//live/prod"
+        self.working_dirs = []
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir, onerror=handle_remove_readonly)
+        for working_dir in self.working_dirs:
+            shutil.rmtree(working_dir.split("REPO")[0], ignore_errors=True)
+
+    @staticmethod
+    def _git(args: list, cwd: str) -> str:
+        env = dict(os.environ, GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+                   GIT_COMMITTER_NAME="test", GIT_COMMITTER_EMAIL="test@example.com")
+        return subprocess.run(["git"] + args, cwd=cwd, env=env, check=True, stdout=subprocess.PIPE,
+                              universal_newlines=True).stdout.strip()
+
+    def _commit_file(self, file_path: str, content: str) -> str:
+        full_path = os.path.join(self.work_repo, *file_path.split("/"))
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as tf_file:
+            tf_file.write(content)
+        self._git(["add", file_path], self.work_repo)
+        self._git(["commit", "--quiet", "-m", f"update {file_path}"], self.work_repo)
+        return self._git(["rev-parse", "HEAD"], self.work_repo)
+
+    def _download(self, downloader: GitProtocolScriptDownloader, url: str, branch: str = "") -> str:
+        working_dir = downloader.download_repo(url, "", branch)
+        self.working_dirs.append(working_dir)
+        return working_dir
+
+    def test_download_repo_extracts_module_path(self):
+        # arrange
+        downloader = GitProtocolScriptDownloader(Mock(), None, self.cache_root)
+
+        # act
+        working_dir = self._download(downloader, self.url)
+
+        # assert
+        self.assertEqual(working_dir.split(os.sep)[-3:], ["REPO", "live", "prod"])
+        repo_dir = os.path.dirname(os.path.dirname(working_dir))
+        self.assertTrue(os.path.isfile(os.path.join(working_dir, "main.tf")))
+        self.assertTrue(os.path.isfile(os.path.join(repo_dir, "modules", "vpc", "main.tf")))
+        self.assertFalse(os.path.exists(os.path.join(repo_dir, "other")))
+
+    def test_download_repo_fetches_new_commits_into_mirror(self):
+        # arrange
+        downloader = GitProtocolScriptDownloader(Mock(), ModuleCache(self.cache_root, Mock()), self.cache_root)
+        self._download(downloader, self.url)
+        self._commit_file("live/prod/outputs.tf", 'output "x" {\n  value = 1\n}\n')
+        self._git(["push", "--quiet", "origin", "main"], self.work_repo)
+
+        # act
+        working_dir = self._download(downloader, self.url)
+
+        # assert
+        self.assertTrue(os.path.isfile(os.path.join(working_dir, "outputs.tf")))
+
+    def test_download_repo_records_module_snapshot(self):
+        # arrange
+        sha = self._git(["rev-parse", "HEAD"], self.work_repo)
+        module_cache = ModuleCache(self.cache_root, Mock())
+        downloader = GitProtocolScriptDownloader(Mock(), module_cache, self.cache_root)
+
+        # act
+        self._download(downloader, self.url)
+
+        # assert
+        self.assertEqual(downloader.module_snapshot.sha, sha)
+        self.assertEqual(downloader.module_snapshot.path, "live/prod")
+        self.assertTrue(module_cache.has_snapshot(downloader.module_snapshot.key))
+
+    def test_download_repo_without_module_cache_records_commit(self):
+        # arrange
+        sha = self._git(["rev-parse", "HEAD"], self.work_repo)
+        downloader = GitProtocolScriptDownloader(Mock(), None, self.cache_root)
+
+        # act
+        self._download(downloader, self.url)
+
+        # assert
+        self.assertEqual(downloader.module_snapshot.key, "")
+        self.assertEqual(downloader.module_snapshot.sha, sha)
+        self.assertEqual(downloader.module_snapshot.path, "live/prod")
+
+    def test_download_repo_at_commit(self):
+        # arrange
+        first_sha = self._git(["rev-list", "--max-parents=0", "HEAD"], self.work_repo)
+        downloader = GitProtocolScriptDownloader(Mock(), None, self.cache_root)
+
+        # act
+        working_dir = self._download(downloader, self.url, branch=first_sha)
+
+        # assert
+        repo_dir = os.path.dirname(os.path.dirname(working_dir))
+        self.assertTrue(os.path.isfile(os.path.join(working_dir, "main.tf")))
+        self.assertFalse(os.path.exists(os.path.join(repo_dir, "modules")))
+
+    def test_download_repo_partial_clone(self):
+        # arrange
+        self._git(["config", "uploadpack.allowFilter", "true"], self.bare_repo)
+        self._git(["config", "uploadpack.allowAnySHA1InWant", "true"], self.bare_repo)
+        downloader = GitProtocolScriptDownloader(Mock(), None, self.cache_root)
+
+        # act
+        working_dir = self._download(downloader, self.url)
+
+        # assert
+        with open(os.path.join(working_dir, "main.tf")) as tf_file:
+            self.assertIn("modules/vpc", tf_file.read())
+
+    def test_download_repo_missing_path(self):
+        downloader = GitProtocolScriptDownloader(Mock(), None, self.cache_root)
+        with self.assertRaises(ValueError):
+            downloader.download_repo(f"file://{self.bare_repo}//missing", "")
+
+
+class TestGitUrlExtractor(unittest.TestCase):
+    def test_extract_data_from_git_url(self):
+        url_data = extract_data_from_git_url("git::https://git.example.com/infra/modules.git//live/prod?ref=v1.2.0")
+        self.assertEqual(url_data.repo_url, "https://git.example.com/infra/modules.git")
+        self.assertEqual(url_data.path, "live/prod")
+        self.assertEqual(url_data.ref, "v1.2.0")
+
+    def test_extract_data_from_git_url_without_path(self):
+        url_data = extract_data_from_git_url("git@github.com:infra/modules.git")
+        self.assertEqual(url_data.repo_url, "git@github.com:infra/modules.git")
+        self.assertEqual(url_data.path, "")
+        self.assertEqual(url_data.ref, "")
+
+    def test_extract_data_from_file_url(self):
+        url_data = extract_data_from_git_url("file:///srv/git/modules.git//vpc")
+        self.assertEqual(url_data.repo_url, "file:///srv/git/modules.git")
+        self.assertEqual(url_data.path, "vpc")
@@ -0,0 +1,57 @@
+import shutil
+import tempfile
+import time
+import unittest
+
+from mock import Mock, patch
+
+from cloudshell.iac.terraform.services.github_api_client import GitHubApiClient, GitHubRateLimitError
+
+
+class TestGitHubApiClient(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_root = tempfile.mkdtemp()
+        self.client = GitHubApiClient("token", self.cache_root, Mock(), max_wait=1)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_root)
+
+    @staticmethod
+    def _response(status_code: int, remaining: int, reset: float) -> Mock:
+        return Mock(status_code=status_code,
+                    headers={"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(int(reset))})
+
+    @patch("cloudshell.iac.terraform.services.github_api_client.HttpTransport")
+    def test_get_tracks_budget_shared_by_token(self, requests_mock):
+        # arrange
+        requests_mock.get.return_value = self._response(200, 100, time.time() + 600)
+
+        # act
+        self.client.get("https://api.github.com/repos/account/repo")
+
+        # assert
+        other_client = GitHubApiClient("token", self.cache_root, Mock())
+        self.assertEqual(other_client.get_remaining_budget(), 100)
+        self.assertEqual(GitHubApiClient("other", self.cache_root, Mock()).get_remaining_budget(), -1)
+        self.assertEqual(requests_mock.get.call_args[1]["headers"]["Authorization"], "token token")
+
+    @patch("cloudshell.iac.terraform.services.github_api_client.HttpTransport")
+    def test_get_budget_used_up_raises_without_request(self, requests_mock):
+        # arrange
+        requests_mock.get.return_value = self._response(200, 1, time.time() + 600)
+        self.client.get("https://api.github.com/repos/account/repo")
+        requests_mock.get.reset_mock()
+
+        # act & assert
+        with self.assertRaises(GitHubRateLimitError):
+            self.client.get("https://api.github.com/repos/account/repo")
+        requests_mock.get.assert_not_called()
+
+    @patch("cloudshell.iac.terraform.services.github_api_client.HttpTransport")
+    def test_get_rate_limited_response_raises(self, requests_mock):
+        # arrange
+        requests_mock.get.return_value = self._response(403, 0, time.time() + 600)
+
+        # act & assert
+        with self.assertRaises(GitHubRateLimitError):
+            self.client.get("https://api.github.com/repos/account/repo")
@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+from zipfile import ZipFile
+
+from mock import Mock, MagicMock, patch
+
+from cloudshell.iac.terraform.services.github_api_client import GitHubRateLimitError
+from cloudshell.iac.terraform.services.resumable_download import ResumableDownload
+
+from cloudshell.iac.terraform.downloaders.github_downloader import GitHubScriptDownloader
+
+REPO_FILES = {
+    "live/prod/main.tf": 'module "vpc" {\n  source = "../../modules/vpc"\n}\n',
+    "modules/vpc/main.tf": 'module "subnet" {\n  source = "./subnet"\n}\n',
+    "modules/vpc/subnet/main.tf": 'resource "null_resource" "subnet" {}\n',
+    "other/main.tf": 'resource "null_resource" "other" {}\n',
+}
+
+
+class TestGitHubScriptDownloader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.zip_path = os.path.join(self.temp_dir, "repo.zip")
+        with ZipFile(self.zip_path, "w") as zip_file:
+            zip_file.writestr("account-repo-abc123/", "")
+            for file_path, content in REPO_FILES.items():
+                zip_file.writestr(f"account-repo-abc123/{file_path}", content)
+        self.dest_dir = os.path.join(self.temp_dir, "REPO")
+        self.downloader = GitHubScriptDownloader(Mock())
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_extract_repo_extracts_module_and_local_module_calls(self):
+        # act
+        module_path = self.downloader._extract_repo(self.zip_path, self.dest_dir, "live/prod")
+
+        # assert
+        self.assertEqual(module_path, "live/prod")
+        self.assertTrue(os.path.isfile(os.path.join(self.dest_dir, "live", "prod", "main.tf")))
+        self.assertTrue(os.path.isfile(os.path.join(self.dest_dir, "modules", "vpc", "subnet", "main.tf")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "other")))
+
+    def test_extract_repo_of_module_reading_parent_dir(self):
+        # arrange
+        with ZipFile(self.zip_path, "a") as zip_file:
+            zip_file.writestr("account-repo-abc123/other/policy.tf",
+                              'locals {\n  policy = file("${path.module}/../policies/read.json")\n}\n')
+            zip_file.writestr("account-repo-abc123/policies/read.json", "{}")
+
+        # act
+        module_path = self.downloader._extract_repo(self.zip_path, self.dest_dir, "other")
+
+        # assert
+        self.assertEqual(module_path, "other")
+        self.assertTrue(os.path.isfile(os.path.join(self.dest_dir, "policies", "read.json")))
+        self.assertTrue(os.path.isfile(os.path.join(self.dest_dir, "live", "prod", "main.tf")))
+
+    def test_extract_repo_path_of_file(self):
+        # act
+        module_path = self.downloader._extract_repo(self.zip_path, self.dest_dir, "other/main.tf")
+
+        # assert
+        self.assertEqual(module_path, "other")
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "live")))
+
+    def test_extract_repo_missing_path(self):
+        with self.assertRaises(Exception):
+            self.downloader._extract_repo(self.zip_path, self.dest_dir, "missing")
+
+    def test_download_repo_zip_streams_to_file(self):
+        # arrange
+        github_client = MagicMock()
+        with open(self.zip_path, "rb") as zip_file:
+            zip_bytes = zip_file.read()
+        response = MagicMock(status_code=200, headers={})
+        response.iter_content.return_value = [zip_bytes[:10], zip_bytes[10:]]
+        github_client.get.return_value.__enter__.return_value = response
+        url_data = self.downloader._extract_data_from_url("https://github.com/account/repo/tree/main/live/prod")
+        download_path = os.path.join(self.temp_dir, "download.zip")
+        self.downloader.resumable_download = ResumableDownload(os.path.join(self.temp_dir, "downloads"), Mock())
+
+        # act
+        self.downloader._download_repo_zip(url_data, github_client, download_path)
+
+        # assert
+        self.assertEqual(github_client.get.call_args[1]["stream"], True)
+        with open(download_path, "rb") as download_file:
+            self.assertEqual(download_file.read(), zip_bytes)
+
+    @patch.object(GitHubScriptDownloader, "_resolve_commit_sha", side_effect=GitHubRateLimitError("rate limit"))
+    def test_download_repo_rate_limited_uses_cached_module(self, resolve_commit_sha):
+        # arrange
+        module_cache = Mock()
+        module_cache.get_cached_ref_sha.return_value = "a" * 40
+        module_cache.has_snapshot.return_value = True
+        module_cache.get_or_add_snapshot.return_value = self.temp_dir
+        downloader = GitHubScriptDownloader(Mock(), module_cache, self.temp_dir)
+
+        # act
+        downloader.download_repo("https://github.com/account/repo/tree/main/live/prod", "token")
+
+        # assert
+        module_cache.get_cached_ref_sha.assert_called_once_with("github.com/account/repo", "main")
+        module_cache.get_key.assert_called_with("github.com/account/repo", "a" * 40, "live/prod")
+        module_cache.create_working_dir.assert_called_once()
+
+    @patch.object(GitHubScriptDownloader, "_resolve_commit_sha", side_effect=GitHubRateLimitError("rate limit"))
+    def test_download_repo_rate_limited_without_cached_module(self, resolve_commit_sha):
+        # arrange
+        module_cache = Mock()
+        module_cache.get_cached_ref_sha.return_value = ""
+        downloader = GitHubScriptDownloader(Mock(), module_cache, self.temp_dir)
+
+        # act & assert
+        with self.assertRaises(GitHubRateLimitError):
+            downloader.download_repo("https://github.com/account/repo/tree/main/live/prod", "token")
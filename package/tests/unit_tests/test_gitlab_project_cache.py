@@ -0,0 +1,75 @@
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock, patch
+
+from cloudshell.iac.terraform.downloaders.gitlab_downloader import GitLabScriptDownloader
+from cloudshell.iac.terraform.services.gitlab_api_handler import GitlabApiHttpError
+from cloudshell.iac.terraform.services.gitlab_project_cache import GitlabProjectCache
+
+BROWSER_URL = "http://192.168.85.26/quali_natti/terraformstuff/-/tree/test-branch/rds/project1"
+
+
+class TestGitlabProjectCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_root = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_root)
+
+    def test_project_id_is_shared(self):
+        # act
+        GitlabProjectCache(self.cache_root).set_project_id("gitlab.example.com", "group/project", 42)
+
+        # assert
+        project_cache = GitlabProjectCache(self.cache_root)
+        self.assertEqual(project_cache.get_project_id("gitlab.example.com", "group/project"), 42)
+        self.assertIsNone(project_cache.get_project_id("other.example.com", "group/project"))
+
+    def test_remove_project_id(self):
+        # arrange
+        project_cache = GitlabProjectCache(self.cache_root)
+        project_cache.set_project_id("gitlab.example.com", "group/project", 42)
+
+        # act
+        project_cache.remove_project_id("gitlab.example.com", "group/project")
+
+        # assert
+        self.assertIsNone(project_cache.get_project_id("gitlab.example.com", "group/project"))
+
+    @patch("cloudshell.iac.terraform.downloaders.gitlab_downloader.GitlabApiHandler")
+    def test_download_repo_looks_up_project_once(self, api_handler_class):
+        # arrange
+        api_handler = api_handler_class.return_value
+        api_handler.get_project_id_from_path.return_value = 7
+        api_handler.get_commit_sha.return_value = "A" * 40
+        downloader = GitLabScriptDownloader(Mock(), None, self.cache_root)
+
+        # act
+        downloader.download_repo(BROWSER_URL, "token")
+        downloader.download_repo(BROWSER_URL, "token")
+
+        # assert
+        api_handler.get_project_id_from_path.assert_called_once_with("quali_natti/terraformstuff")
+        api_handler.get_project_data.assert_not_called()
+        api_handler.get_commit_sha.assert_called_with(7, "test-branch")
+        api_handler.download_archive_to_temp_dir.assert_called_with(project_id=7, path="rds/project1", sha="A" * 40)
+        self.assertEqual(downloader.module_snapshot.sha, "a" * 40)
+
+    @patch("cloudshell.iac.terraform.downloaders.gitlab_downloader.GitlabApiHandler")
+    def test_download_repo_stale_cached_project_id(self, api_handler_class):
+        # arrange
+        GitlabProjectCache(self.cache_root).set_project_id("192.168.85.26", "quali_natti/terraformstuff", 3)
+        api_handler = api_handler_class.return_value
+        api_handler.get_project_id_from_path.return_value = 7
+        api_handler.download_archive_to_temp_dir.side_effect = [GitlabApiHttpError("404"), "/tmp/REPO/rds/project1"]
+        downloader = GitLabScriptDownloader(Mock(), None, self.cache_root)
+
+        # act
+        working_dir = downloader.download_repo(BROWSER_URL, "token")
+
+        # assert
+        self.assertEqual(working_dir, "/tmp/REPO/rds/project1")
+        self.assertEqual(GitlabProjectCache(self.cache_root).get_project_id("192.168.85.26",
+                                                                            "quali_natti/terraformstuff"), 7)
@@ -0,0 +1,26 @@
+import unittest
+
+from mock import patch
+
+from cloudshell.iac.terraform.constants import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+from cloudshell.iac.terraform.services.http_transport import HttpTransport
+
+
+class TestHttpTransport(unittest.TestCase):
+    def test_get_session_is_shared(self):
+        self.assertIs(HttpTransport.get_session(), HttpTransport.get_session())
+
+    def test_session_pools_connections(self):
+        adapter = HttpTransport.get_session().get_adapter("https://api.github.com")
+        self.assertGreater(adapter.max_retries.total, 0)
+
+    @patch.object(HttpTransport, "get_session")
+    def test_get_default_timeout(self, get_session):
+        # act
+        HttpTransport.get("https://releases.hashicorp.com/terraform/index.json")
+        HttpTransport.get("https://releases.hashicorp.com/terraform/index.json", timeout=5)
+
+        # assert
+        self.assertEqual(get_session.return_value.get.call_args_list[0][1]["timeout"],
+                         (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        self.assertEqual(get_session.return_value.get.call_args_list[1][1]["timeout"], 5)
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from cloudshell.iac.terraform.services.init_fingerprint import InitFingerprint
+
+
+class TestInitFingerprint(unittest.TestCase):
+    def setUp(self) -> None:
+        self.working_dir = tempfile.mkdtemp()
+        self._write_file("main.tf", 'module "vpc" {\n  source = "./vpc"\n}\n')
+        self._write_file(os.path.join("vpc", "main.tf"), 'resource "aws_vpc" "vpc" {}\n')
+        self._write_file("backend.tf", 'terraform {\n  backend "s3" {}\n}\n')
+        self._write_file(".terraform.lock.hcl", 'provider "registry.terraform.io/hashicorp/aws" {}\n')
+        self.backend_config_vars = {"access_key": "key"}
+        self.tf_exe_path = os.path.join(self.working_dir, "terraform")
+        self._write_file("terraform", "1.1.0")
+        InitFingerprint(self.working_dir, "1.1.0", self.backend_config_vars).record()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.working_dir)
+
+    def _write_file(self, rel_path: str, content: str) -> None:
+        os.makedirs(os.path.dirname(os.path.join(self.working_dir, rel_path)), exist_ok=True)
+        with open(os.path.join(self.working_dir, rel_path), "w") as tf_file:
+            tf_file.write(content)
+
+    def test_compare_unchanged(self):
+        # arrange
+        self._write_file("main_override.tf", 'resource "aws_vpc" "vpc" {\n  tags = {}\n}\n')
+
+        # act
+        result = InitFingerprint(self.working_dir, "1.1.0", {"access_key": "key"}).compare()
+
+        # assert
+        self.assertEqual(result, (True, True))
+
+    def test_compare_changed_module_file(self):
+        # arrange
+        self._write_file(os.path.join("vpc", "main.tf"), "")
+
+        # act
+        result = InitFingerprint(self.working_dir, "1.1.0", self.backend_config_vars).compare()
+
+        # assert
+        self.assertEqual(result, (False, True))
+
+    def test_compare_changed_lock_file(self):
+        # arrange
+        self._write_file(".terraform.lock.hcl", "")
+
+        # act
+        result = InitFingerprint(self.working_dir, "1.1.0", self.backend_config_vars).compare()
+
+        # assert
+        self.assertEqual(result, (False, True))
+
+    def test_compare_changed_terraform_version(self):
+        # act
+        result = InitFingerprint(self.working_dir, "1.2.0", self.backend_config_vars).compare()
+
+        # assert
+        self.assertEqual(result, (False, True))
+
+    def test_compare_changed_backend(self):
+        # act
+        result = InitFingerprint(self.working_dir, "1.1.0", {"access_key": "rotated"}).compare()
+
+        # assert
+        self.assertEqual(result, (True, False))
+
+    def test_compare_evicted_provider(self):
+        # arrange
+        providers_dir = os.path.join(self.working_dir, ".terraform", "providers", "registry.terraform.io")
+        os.makedirs(providers_dir)
+        os.symlink(os.path.join(self.working_dir, "evicted"), os.path.join(providers_dir, "aws"))
+
+        # act
+        result = InitFingerprint(self.working_dir, "1.1.0", self.backend_config_vars).compare()
+
+        # assert
+        self.assertEqual(result, (False, True))
+
+    def test_compare_cleared(self):
+        # arrange
+        fingerprint = InitFingerprint(self.working_dir, "1.1.0", self.backend_config_vars)
+
+        # act
+        fingerprint.clear()
+
+        # assert
+        self.assertEqual(fingerprint.compare(), (False, False))
+
+    def test_compare_replaced_local_executable(self):
+        # arrange
+        InitFingerprint(self.working_dir, "", self.backend_config_vars, self.tf_exe_path).record()
+        self._write_file("terraform", "1.2.0-local")
+
+        # act
+        result = InitFingerprint(self.working_dir, "", self.backend_config_vars, self.tf_exe_path).compare()
+
+        # assert
+        self.assertEqual(result, (False, True))
@@ -1,6 +1,6 @@
 import unittest
 
-from mock import Mock
+from mock import Mock, patch
 
 from cloudshell.iac.terraform.services.live_status_updater import LiveStatusUpdater
 
@@ -28,3 +28,41 @@ class TestLiveStatusUpdater(unittest.TestCase):
 
         # assert
         api.SetServiceLiveStatus.assert_called_with(sandbox_id, "service name", "Online", "description...")
+
+    @patch("cloudshell.iac.terraform.services.live_status_updater.time")
+    def test_throttled_updates_are_coalesced(self, time_mock):
+        # arrange
+        api = Mock()
+        updater = LiveStatusUpdater(api, Mock(), True, min_interval=10)
+        clock = [100]
+        time_mock.monotonic.side_effect = lambda: clock[0]
+
+        # act
+        updater.set_service_live_status("service name", "Progress 70", "1/4", throttle=True)
+        clock[0] = 103
+        updater.set_service_live_status("service name", "Progress 77", "2/4", throttle=True)
+        clock[0] = 105
+        updater.set_service_live_status("service name", "Progress 84", "3/4", throttle=True)
+        clock[0] = 109
+        updater.flush()
+        clock[0] = 110
+        updater.flush()
+
+        # assert
+        self.assertEqual([c.args[3] for c in api.SetServiceLiveStatus.call_args_list], ["1/4", "3/4"])
+
+    @patch("cloudshell.iac.terraform.services.live_status_updater.time")
+    def test_pending_update_is_sent_before_milestone(self, time_mock):
+        # arrange
+        api = Mock()
+        updater = LiveStatusUpdater(api, Mock(), True, min_interval=10)
+        time_mock.monotonic.return_value = 100
+
+        # act
+        updater.set_service_live_status("service name", "Progress 70", "1/2", throttle=True)
+        updater.set_service_live_status("service name", "Progress 84", "2/2", throttle=True)
+        updater.set_service_live_status("service name", "Online", "Apply Passed")
+
+        # assert
+        self.assertEqual([c.args[3] for c in api.SetServiceLiveStatus.call_args_list],
+                         ["1/2", "2/2", "Apply Passed"])
@@ -0,0 +1,85 @@
+import unittest
+
+from mock import Mock, patch
+
+from cloudshell.iac.terraform.constants import ATTRIBUTE_NAMES
+from cloudshell.iac.terraform.downloaders.tf_exec_downloader import TerraformExecutable
+from cloudshell.iac.terraform.services.local_dir_service import LocalDir
+from cloudshell.iac.terraform.services.module_cache import ModuleSnapshot
+
+
+class TestLocalDir(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sandbox_data_handler = Mock()
+        self.sandbox_data_handler.get_tf_working_dir.return_value = ""
+        self.shell_helper = Mock()
+
+    @patch("cloudshell.iac.terraform.services.local_dir_service.validate_tf_exe")
+    @patch("cloudshell.iac.terraform.services.local_dir_service.Downloader")
+    def test_prepare_tf_working_dir_uses_local_terraform_in_place(self, downloader_class, validate_tf_exe):
+        # arrange
+        downloader_class.return_value.download_terraform_module.return_value = "/tmp/module"
+        self.shell_helper.attr_handler.get_attribute.side_effect = \
+            lambda name: "/opt/terraform/terraform.exe" if name == ATTRIBUTE_NAMES.LOCAL_TERRAFORM else ""
+
+        # act
+        result = LocalDir.prepare_tf_working_dir(Mock(), self.sandbox_data_handler, self.shell_helper)
+
+        # assert
+        self.assertEqual(result, "/tmp/module")
+        downloader_class.return_value.download_terraform_executable.assert_not_called()
+        self.sandbox_data_handler.set_tf_executable.assert_called_once_with("/opt/terraform/terraform.exe", "")
+
+    @patch("cloudshell.iac.terraform.services.local_dir_service.Downloader")
+    def test_prepare_tf_working_dir_uses_binary_store(self, downloader_class):
+        # arrange
+        downloader_class.return_value.download_terraform_module.return_value = "/tmp/module"
+        downloader_class.return_value.download_terraform_executable.return_value = \
+            TerraformExecutable("/cache/terraform.exe", "1.0.0")
+        downloader_class.return_value.is_executable_version_from_module.return_value = True
+        self.shell_helper.attr_handler.get_attribute.return_value = ""
+
+        # act
+        LocalDir.prepare_tf_working_dir(Mock(), self.sandbox_data_handler, self.shell_helper)
+
+        # assert
+        self.sandbox_data_handler.set_tf_working_dir.assert_called_once_with("/tmp/module")
+        self.sandbox_data_handler.set_tf_executable.assert_called_once_with("/cache/terraform.exe", "1.0.0")
+        downloader_class.return_value.download_terraform_executable.assert_called_once_with("/tmp/module")
+
+    @patch("cloudshell.iac.terraform.services.local_dir_service.Downloader")
+    def test_prepare_tf_working_dir_downloads_executable_with_module(self, downloader_class):
+        # arrange
+        downloader_class.return_value.download_terraform_module.return_value = "/tmp/module"
+        downloader_class.return_value.download_terraform_executable.return_value = \
+            TerraformExecutable("/cache/terraform.exe", "1.0.0")
+        downloader_class.return_value.is_executable_version_from_module.return_value = False
+        self.shell_helper.attr_handler.get_attribute.return_value = ""
+
+        # act
+        LocalDir.prepare_tf_working_dir(Mock(), self.sandbox_data_handler, self.shell_helper)
+
+        # assert
+        self.sandbox_data_handler.set_tf_executable.assert_called_once_with("/cache/terraform.exe", "1.0.0")
+        downloader_class.return_value.download_terraform_executable.assert_called_once_with()
+
+    @patch("cloudshell.iac.terraform.services.local_dir_service.Downloader")
+    def test_prepare_tf_working_dir_reuses_module_snapshot(self, downloader_class):
+        # arrange
+        module_snapshot = ModuleSnapshot("key", "sha", "live/prod")
+        self.sandbox_data_handler.get_module_snapshot.return_value = module_snapshot
+        self.sandbox_data_handler.get_tf_exe_path.return_value = __file__
+        self.sandbox_data_handler.get_tf_version.return_value = "1.0.0"
+        downloader_class.return_value.download_terraform_module.return_value = "/tmp/module"
+        downloader_class.return_value.module_snapshot = module_snapshot
+        self.shell_helper.attr_handler.get_attribute.return_value = ""
+
+        # act
+        LocalDir.prepare_tf_working_dir(Mock(), self.sandbox_data_handler, self.shell_helper,
+                                        reuse_module_snapshot=True)
+
+        # assert
+        downloader_class.return_value.download_terraform_module.assert_called_once_with(module_snapshot)
+        downloader_class.return_value.download_terraform_executable.assert_not_called()
+        self.sandbox_data_handler.set_tf_executable.assert_called_once_with(__file__, "1.0.0")
+        self.sandbox_data_handler.set_module_snapshot.assert_called_once_with(module_snapshot)
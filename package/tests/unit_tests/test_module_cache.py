@@ -0,0 +1,222 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import unittest
+
+from mock import Mock
+
+from cloudshell.iac.terraform.services.local_dir_service import handle_remove_readonly
+from cloudshell.iac.terraform.services.module_cache import ModuleCache
+
+
+class TestModuleCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_root = tempfile.mkdtemp()
+        self.module_cache = ModuleCache(self.cache_root, Mock())
+        self.key = ModuleCache.get_key("github.com/account/repo", "a" * 40, "modules/vpc")
+        self.fetch_count = 0
+        self.working_dirs = []
+
+    def tearDown(self) -> None:
+        for working_dir in self.working_dirs:
+            shutil.rmtree(working_dir)
+        shutil.rmtree(self.cache_root, onerror=handle_remove_readonly)
+
+    def _fetch(self, dest_dir: str) -> None:
+        self.fetch_count += 1
+        time.sleep(0.1)
+        os.makedirs(os.path.join(dest_dir, "modules", "vpc"))
+        with open(os.path.join(dest_dir, "modules", "vpc", "main.tf"), "w") as tf_file:
+            tf_file.write('resource "null_resource" "x" {}')
+
+    def test_get_key_ignores_path_slashes(self):
+        self.assertEqual(ModuleCache.get_key("repo", "sha", "/modules/vpc/"),
+                         ModuleCache.get_key("repo", "sha", "modules/vpc"))
+
+    def test_get_or_add_snapshot_coalesces_concurrent_requests(self):
+        # arrange
+        threads = [threading.Thread(target=self.module_cache.get_or_add_snapshot, args=(self.key, self._fetch))
+                   for _ in range(5)]
+
+        # act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # assert
+        self.assertEqual(self.fetch_count, 1)
+        self.assertTrue(self.module_cache.has_snapshot(self.key))
+
+    def test_get_or_add_snapshot_failed_fetch_is_not_published(self):
+        # arrange
+        fetch = Mock(side_effect=Exception("download failed"))
+
+        # act
+        with self.assertRaises(Exception):
+            self.module_cache.get_or_add_snapshot(self.key, fetch)
+
+        # assert
+        self.assertFalse(self.module_cache.has_snapshot(self.key))
+
+    def test_snapshot_is_read_only(self):
+        # act
+        snapshot_dir = self.module_cache.get_or_add_snapshot(self.key, self._fetch)
+
+        # assert
+        for path in [snapshot_dir, os.path.join(snapshot_dir, "modules", "vpc", "main.tf")]:
+            self.assertFalse(os.stat(path).st_mode & stat.S_IWUSR)
+
+    def test_create_working_dir(self):
+        # arrange
+        self.module_cache.get_or_add_snapshot(self.key, self._fetch)
+
+        # act
+        working_dir = self.module_cache.create_working_dir(self.key, "modules/vpc")
+        self.working_dirs.append(os.path.dirname(os.path.dirname(os.path.dirname(working_dir))))
+
+        # assert
+        self.assertEqual(working_dir.split(os.sep)[-3:], ["REPO", "modules", "vpc"])
+        with open(os.path.join(working_dir, "backend.tf"), "w") as backend_file:
+            backend_file.write("")
+        self.assertFalse(os.path.exists(os.path.join(self.module_cache.get_snapshot_dir(self.key),
+                                                     "modules", "vpc", "backend.tf")))
+
+    def test_create_working_dir_if_cached(self):
+        # act
+        missing_working_dir = self.module_cache.create_working_dir_if_cached(self.key, "modules/vpc")
+        self.module_cache.get_or_add_snapshot(self.key, self._fetch)
+        working_dir = self.module_cache.create_working_dir_if_cached(self.key, "modules/vpc")
+        self.working_dirs.append(os.path.dirname(os.path.dirname(os.path.dirname(working_dir))))
+
+        # assert
+        self.assertEqual(missing_working_dir, "")
+        self.assertTrue(os.path.isfile(os.path.join(working_dir, "main.tf")))
+
+    def test_shared_cache_snapshot_is_published_to_shared_dir(self):
+        # arrange
+        shared_cache_dir = os.path.join(self.cache_root, "shared")
+        publisher = ModuleCache(os.path.join(self.cache_root, "publisher"), Mock(), shared_cache_dir)
+        consumer = ModuleCache(os.path.join(self.cache_root, "consumer"), Mock(), shared_cache_dir, True)
+
+        # act
+        snapshot_dir = publisher.get_or_add_snapshot(self.key, self._fetch)
+
+        # assert
+        self.assertTrue(snapshot_dir.startswith(shared_cache_dir))
+        self.assertEqual(consumer.get_or_add_snapshot(self.key, self._fetch), snapshot_dir)
+        self.assertEqual(self.fetch_count, 1)
+
+    def test_read_only_shared_cache_miss_is_added_locally(self):
+        # arrange
+        local_cache_dir = os.path.join(self.cache_root, "consumer")
+        consumer = ModuleCache(local_cache_dir, Mock(), os.path.join(self.cache_root, "shared"), True)
+
+        # act
+        snapshot_dir = consumer.get_or_add_snapshot(self.key, self._fetch)
+
+        # assert
+        self.assertTrue(snapshot_dir.startswith(local_cache_dir))
+        self.assertFalse(os.path.exists(os.path.join(self.cache_root, "shared")))
+
+    def test_resolve_ref_not_modified_returns_cached_sha(self):
+        # arrange
+        ok_response = Mock(status_code=200, headers={"ETag": '"etag1"'}, text="b" * 40)
+        not_modified_response = Mock(status_code=304, headers={})
+        request = Mock(side_effect=[ok_response, not_modified_response])
+        get_sha = Mock(side_effect=lambda response: response.text)
+
+        # act
+        first_sha = self.module_cache.resolve_ref("github.com/account/repo", "main", request, get_sha)
+        second_sha = self.module_cache.resolve_ref("github.com/account/repo", "main", request, get_sha)
+
+        # assert
+        self.assertEqual(first_sha, "b" * 40)
+        self.assertEqual(second_sha, "b" * 40)
+        request.assert_called_with({"If-None-Match": '"etag1"'})
+        get_sha.assert_called_once_with(ok_response)
+
+    def test_resolve_ref_first_request_is_unconditional(self):
+        # arrange
+        request = Mock(return_value=Mock(status_code=200, headers={}, text="c" * 40))
+
+        # act
+        self.module_cache.resolve_ref("github.com/account/repo", "dev", request, lambda response: response.text)
+
+        # assert
+        request.assert_called_once_with({})
+
+    def _add_snapshot(self, name: str, size: int, last_used: float) -> str:
+        key = ModuleCache.get_key("github.com/account/repo", name, "")
+        snapshot_dir = self.module_cache.get_or_add_snapshot(key, lambda dest_dir: self._write_module(dest_dir, size))
+        os.utime(snapshot_dir, (last_used, last_used))
+        return snapshot_dir
+
+    @staticmethod
+    def _write_module(dest_dir: str, size: int) -> None:
+        os.makedirs(dest_dir)
+        with open(os.path.join(dest_dir, "main.tf"), "wb") as tf_file:
+            tf_file.write(b"0" * size)
+
+    def test_evict_least_recently_used(self):
+        # arrange
+        self.module_cache = ModuleCache(self.cache_root, Mock(), max_size_mb=1)
+        month_ago = time.time() - 30 * 24 * 3600
+        oldest = self._add_snapshot("a" * 40, 600 * 1024, month_ago)
+        newer = self._add_snapshot("b" * 40, 600 * 1024, month_ago + 60)
+
+        # act
+        self.module_cache.evict()
+
+        # assert
+        self.assertFalse(os.path.exists(oldest))
+        self.assertFalse(os.path.exists(f"{oldest}.lock"))
+        self.assertFalse(os.path.exists(f"{oldest}.evicted"))
+        self.assertTrue(os.path.isdir(newer))
+
+    def test_evict_keeps_recently_used(self):
+        # arrange
+        self.module_cache = ModuleCache(self.cache_root, Mock(), max_size_mb=1)
+        snapshot_dirs = [self._add_snapshot(name * 40, 600 * 1024, time.time()) for name in "ab"]
+
+        # act
+        self.module_cache.evict()
+
+        # assert
+        self.assertTrue(all(os.path.isdir(snapshot_dir) for snapshot_dir in snapshot_dirs))
+
+    def test_materialize_marks_snapshot_used(self):
+        # arrange
+        snapshot_dir = self._add_snapshot("a" * 40, 1, time.time() - 3600)
+        key = os.path.basename(snapshot_dir)
+
+        # act
+        self.module_cache.materialize_snapshot(key, os.path.join(self.cache_root, "working_dir"))
+
+        # assert
+        self.assertGreater(os.path.getmtime(snapshot_dir), time.time() - 60)
+
+    def test_evict_deletes_stale_entries(self):
+        # arrange
+        self._add_snapshot("a" * 40, 1, time.time())
+        month_ago = time.time() - 30 * 24 * 3600
+        stale_mirror = os.path.join(self.cache_root, "git_mirrors", "stale.git")
+        used_mirror = os.path.join(self.cache_root, "git_mirrors", "used.git")
+        stale_part = os.path.join(self.cache_root, "downloads", "stale.part")
+        for dir_path in [stale_mirror, used_mirror, os.path.dirname(stale_part)]:
+            os.makedirs(dir_path)
+        with open(stale_part, "w"):
+            pass
+        for path in [stale_mirror, stale_part]:
+            os.utime(path, (month_ago, month_ago))
+
+        # act
+        self.module_cache.evict()
+
+        # assert
+        self.assertFalse(os.path.exists(stale_mirror))
+        self.assertFalse(os.path.exists(stale_part))
+        self.assertTrue(os.path.isdir(used_mirror))
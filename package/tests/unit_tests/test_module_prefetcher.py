@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from mock import Mock
+
+from cloudshell.iac.terraform.services.local_dir_service import handle_remove_readonly
+from cloudshell.iac.terraform.services.module_prefetcher import ModulePrefetcher
+
+
+class TestModulePrefetcherSources(unittest.TestCase):
+    def test_normalize_git_source_github_shorthand(self):
+        # act
+        source = ModulePrefetcher.normalize_git_source("github.com/org/modules//vpc?ref=v1.0.0")
+
+        # assert
+        self.assertEqual(source, "git::https://github.com/org/modules.git//vpc?ref=v1.0.0")
+
+    def test_normalize_git_source_scp_like(self):
+        # act
+        source = ModulePrefetcher.normalize_git_source("git@github.com:org/modules.git")
+
+        # assert
+        self.assertEqual(source, "git::ssh://git@github.com/org/modules.git")
+
+    def test_normalize_git_source_not_git(self):
+        # act
+        source = ModulePrefetcher.normalize_git_source("s3::https://s3.amazonaws.com/bucket/vpc.zip")
+
+        # assert
+        self.assertEqual(source, "")
+
+    def test_get_registry_source_address(self):
+        # act
+        match = ModulePrefetcher.get_registry_source_match("terraform-aws-modules/vpc/aws//modules/vpc-endpoints")
+
+        # assert
+        self.assertEqual(ModulePrefetcher.get_registry_source_address(match),
+                         "registry.terraform.io/terraform-aws-modules/vpc/aws//modules/vpc-endpoints")
+
+    def test_get_registry_source_match_ignores_git_shorthand(self):
+        # act
+        match = ModulePrefetcher.get_registry_source_match("github.com/org/modules")
+
+        # assert
+        self.assertIsNone(match)
+
+    def test_split_subdir(self):
+        # act
+        package, subdir = ModulePrefetcher.split_subdir("git::https://example.com/modules.git//vpc/?ref=main")
+
+        # assert
+        self.assertEqual(package, "git::https://example.com/modules.git?ref=main")
+        self.assertEqual(subdir, "vpc")
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class TestModulePrefetcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_root = os.path.join(self.temp_dir, "cache")
+        work_repo = os.path.join(self.temp_dir, "work")
+        self.bare_repo = os.path.join(self.temp_dir, "modules.git")
+        os.makedirs(os.path.join(work_repo, "modules", "vpc"))
+        os.makedirs(os.path.join(work_repo, "modules", "subnet"))
+        with open(os.path.join(work_repo, "modules", "vpc", "main.tf"), "w") as tf_file:
+            tf_file.write('module "subnet" {\n  source = "../subnet"\n}\n')
+        with open(os.path.join(work_repo, "modules", "subnet", "main.tf"), "w") as tf_file:
+            tf_file.write('resource "null_resource" "subnet" {}\n')
+        self._git(["init", "--quiet", "-b", "main", work_repo], self.temp_dir)
+        self._git(["add", "."], work_repo)
+        self._git(["commit", "--quiet", "-m", "modules"], work_repo)
+        self._git(["clone", "--quiet", "--bare", work_repo, self.bare_repo], self.temp_dir)
+
+        self.tf_working_dir = os.path.join(self.temp_dir, "root")
+        os.makedirs(self.tf_working_dir)
+        self.source = f"git::file://{self.bare_repo}//modules/vpc?ref=main"
+        with open(os.path.join(self.tf_working_dir, "main.tf"), "w") as tf_file:
+            tf_file.write(f'module "vpc" {{\n  source = "{self.source}"\n}}\n')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir, onerror=handle_remove_readonly)
+
+    @staticmethod
+    def _git(args: list, cwd: str) -> None:
+        env = dict(os.environ, GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+                   GIT_COMMITTER_NAME="test", GIT_COMMITTER_EMAIL="test@example.com")
+        subprocess.run(["git"] + args, cwd=cwd, env=env, check=True, stdout=subprocess.PIPE)
+
+    def _read_manifest(self) -> dict:
+        with open(os.path.join(self.tf_working_dir, ".terraform", "modules", "modules.json")) as manifest_file:
+            return {x["Key"]: x for x in json.load(manifest_file)["Modules"]}
+
+    def test_prefetch_installs_git_module_and_nested_local_module(self):
+        # arrange
+        prefetcher = ModulePrefetcher(self.cache_root, Mock())
+
+        # act
+        prefetcher.prefetch(self.tf_working_dir)
+
+        # assert
+        modules = self._read_manifest()
+        self.assertEqual(modules["vpc"]["Source"], self.source)
+        self.assertEqual(modules["vpc"]["Dir"], os.path.join(".terraform", "modules", "vpc", "modules", "vpc"))
+        self.assertEqual(modules["vpc.subnet"]["Source"], "../subnet")
+        self.assertEqual(modules["vpc.subnet"]["Dir"], os.path.join(".terraform", "modules", "vpc", "modules", "subnet"))
+        self.assertTrue(os.path.isfile(os.path.join(self.tf_working_dir, modules["vpc.subnet"]["Dir"], "main.tf")))
+
+    def test_prefetch_skips_failed_module(self):
+        # arrange
+        shutil.rmtree(self.bare_repo)
+        logger = Mock()
+        prefetcher = ModulePrefetcher(self.cache_root, logger)
+
+        # act
+        prefetcher.prefetch(self.tf_working_dir)
+
+        # assert
+        self.assertFalse(os.path.exists(os.path.join(self.tf_working_dir, ".terraform", "modules", "modules.json")))
+        logger.warning.assert_called_once()
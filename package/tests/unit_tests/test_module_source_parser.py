@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from cloudshell.iac.terraform.services.module_source_parser import ModuleSourceParser
+
+
+class TestModuleSourceParser(unittest.TestCase):
+    def test_is_local_source(self):
+        self.assertTrue(ModuleSourceParser.is_local_source("./modules/vpc"))
+        self.assertTrue(ModuleSourceParser.is_local_source("../vpc"))
+        self.assertFalse(ModuleSourceParser.is_local_source("git::https://example.com/vpc.git"))
+        self.assertFalse(ModuleSourceParser.is_local_source("hashicorp/consul/aws"))
+
+    def test_get_local_source_path(self):
+        self.assertEqual(ModuleSourceParser.get_local_source_path("live/prod", "../../modules/vpc"), "modules/vpc")
+        self.assertEqual(ModuleSourceParser.get_local_source_path("live", "./vpc"), "live/vpc")
+        self.assertEqual(ModuleSourceParser.get_local_source_path("live", ".."), "")
+        self.assertIsNone(ModuleSourceParser.get_local_source_path("live", "../../vpc"))
+
+    def test_refers_to_parent_dir(self):
+        # arrange
+        module_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, module_dir)
+        with open(os.path.join(module_dir, "main.tf"), "w") as tf_file:
+            tf_file.write('module "vpc" {\n  source = "../vpc"\n}\n'
+                          'locals {\n  script = file("${path.module}/scripts/init.sh")\n}\n')
+
+        # act
+        refers_before = ModuleSourceParser.refers_to_parent_dir(module_dir)
+        with open(os.path.join(module_dir, "policy.tf"), "w") as tf_file:
+            tf_file.write('locals {\n  policy = templatefile("${path.module}/../policies/read.json", {})\n}\n')
+        refers_after = ModuleSourceParser.refers_to_parent_dir(module_dir)
+
+        # assert
+        self.assertFalse(refers_before)
+        self.assertTrue(refers_after)
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from mock import Mock
+
+from cloudshell.iac.terraform.services.plugin_cache import PluginCache
+
+
+class TestPluginCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_root = tempfile.mkdtemp()
+        self.plugins_dir = os.path.join(self.cache_root, "plugins")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_root)
+
+    def _add_provider(self, provider_type: str, version: str, size: int, last_used: float) -> str:
+        version_dir = os.path.join(self.plugins_dir, "registry.terraform.io", "hashicorp", provider_type, version)
+        os_arch_dir = os.path.join(version_dir, "linux_amd64")
+        os.makedirs(os_arch_dir)
+        with open(os.path.join(os_arch_dir, f"terraform-provider-{provider_type}"), "wb") as provider_file:
+            provider_file.write(b"0" * size)
+        os.utime(version_dir, (last_used, last_used))
+        return version_dir
+
+    def test_get_env(self):
+        # arrange
+        plugin_cache = PluginCache(self.cache_root, 1, Mock())
+
+        # act
+        env = plugin_cache.get_env()
+
+        # assert
+        self.assertEqual(env["TF_PLUGIN_CACHE_DIR"], self.plugins_dir)
+        self.assertTrue(os.path.isdir(self.plugins_dir))
+        self.assertNotIn("TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE", env)
+
+    def test_get_env_may_break_dependency_lock_file(self):
+        # arrange
+        plugin_cache = PluginCache(self.cache_root, 1, Mock(), may_break_dependency_lock_file=True)
+
+        # act
+        env = plugin_cache.get_env()
+
+        # assert
+        self.assertEqual(env["TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE"], "true")
+
+    def test_evict_least_recently_used(self):
+        # arrange
+        month_ago = time.time() - 30 * 24 * 3600
+        oldest = self._add_provider("aws", "3.0.0", 600 * 1024, month_ago)
+        newer = self._add_provider("azurerm", "2.0.0", 600 * 1024, month_ago + 60)
+        plugin_cache = PluginCache(self.cache_root, 1, Mock())
+
+        # act
+        with plugin_cache.lock():
+            plugin_cache.evict()
+
+        # assert
+        self.assertFalse(os.path.exists(oldest))
+        self.assertTrue(os.path.exists(newer))
+
+    def test_evict_keeps_recently_used(self):
+        # arrange
+        provider = self._add_provider("aws", "3.0.0", 2 * 1024 * 1024, time.time())
+        plugin_cache = PluginCache(self.cache_root, 1, Mock())
+
+        # act
+        plugin_cache.evict()
+
+        # assert
+        self.assertTrue(os.path.exists(provider))
+
+    @unittest.skipIf(os.name == "nt", "symlinks require privileges on windows")
+    def test_mark_used(self):
+        # arrange
+        month_ago = time.time() - 30 * 24 * 3600
+        provider = self._add_provider("aws", "3.0.0", 1, month_ago)
+        working_dir = os.path.join(self.cache_root, "working_dir")
+        link_parent = os.path.join(working_dir, ".terraform", "providers", "registry.terraform.io", "hashicorp",
+                                   "aws", "3.0.0")
+        os.makedirs(link_parent)
+        os.symlink(os.path.join(provider, "linux_amd64"), os.path.join(link_parent, "linux_amd64"))
+        plugin_cache = PluginCache(self.cache_root, 1, Mock())
+
+        # act
+        plugin_cache.mark_used(working_dir)
+
+        # assert
+        self.assertGreater(os.path.getmtime(provider), month_ago + 60)
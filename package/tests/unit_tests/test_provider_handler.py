@@ -0,0 +1,47 @@
+import os
+import unittest
+
+from mock import Mock, patch
+
+from cloudshell.iac.terraform.constants import AWS2G_MODEL
+from cloudshell.iac.terraform.services.provider_handler import ProviderHandler
+
+
+class TestProviderHandler(unittest.TestCase):
+    def setUp(self):
+        self.shell_helper = Mock()
+        self.shell_helper.attr_handler.get_attribute.return_value = "aws clp"
+        clp_details = Mock(ResourceModelName=AWS2G_MODEL, ResourceFamilyName="Cloud Provider")
+        clp_details.ResourceAttributes = [Mock(Value="eu-west-1"), Mock(Value="enc key"), Mock(Value="enc secret")]
+        for attr, name in zip(clp_details.ResourceAttributes, ["Region", "AWS Access Key ID", "AWS Secret Access Key"]):
+            attr.Name = f"{AWS2G_MODEL}.{name}"
+        self.shell_helper.api.GetResourceDetails.return_value = clp_details
+        self.shell_helper.api.DecryptPassword.side_effect = lambda value: Mock(Value=value.replace("enc ", ""))
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_get_provider_env_vars_does_not_set_env_vars(self):
+        # act
+        env_vars = ProviderHandler(Mock()).get_provider_env_vars(self.shell_helper)
+
+        # assert
+        self.assertEqual(env_vars, {"AWS_DEFAULT_REGION": "eu-west-1", "AWS_ACCESS_KEY_ID": "key",
+                                    "AWS_SECRET_ACCESS_KEY": "secret"})
+        self.assertEqual(dict(os.environ), {})
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_initialize_provider(self):
+        # act
+        ProviderHandler(Mock()).initialize_provider(self.shell_helper)
+
+        # assert
+        self.assertEqual(os.environ["AWS_SECRET_ACCESS_KEY"], "secret")
+
+    def test_get_provider_env_vars_without_cloud_provider(self):
+        # arrange
+        self.shell_helper.attr_handler.get_attribute.return_value = ""
+
+        # act
+        env_vars = ProviderHandler(Mock()).get_provider_env_vars(self.shell_helper)
+
+        # assert
+        self.assertEqual(env_vars, {})
@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from mock import Mock, patch
+
+from cloudshell.iac.terraform.constants import OS_TYPES
+from cloudshell.iac.terraform.services.provider_mirror import ProviderMirror
+
+LOCK_FILE = """
+provider "registry.terraform.io/hashicorp/aws" {
+  version     = "3.74.0"
+  constraints = "~> 3.0"
+}
+
+provider "registry.terraform.io/hashicorp/null" {
+  version = "3.1.0"
+}
+"""
+
+
+class TestProviderMirror(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_root = tempfile.mkdtemp()
+        self.mirror_dir = ProviderMirror.get_default_mirror_dir(self.cache_root)
+        self.working_dir = os.path.join(self.cache_root, "working_dir")
+        os.makedirs(self.working_dir)
+        # the CLI config of the execution server
+        self.user_cli_config_path = os.path.join(self.cache_root, ".terraformrc")
+        self.environ_patcher = patch.dict(os.environ, {"TF_CLI_CONFIG_FILE": self.user_cli_config_path})
+        self.environ_patcher.start()
+
+    def tearDown(self) -> None:
+        self.environ_patcher.stop()
+        shutil.rmtree(self.cache_root)
+
+    def _write_user_cli_config(self, content: str) -> None:
+        with open(self.user_cli_config_path, "w") as cli_config_file:
+            cli_config_file.write(content)
+
+    def test_get_env_online(self):
+        # arrange
+        provider_mirror = ProviderMirror(self.mirror_dir, False, Mock())
+
+        # act
+        env = provider_mirror.get_env()
+
+        # assert
+        with open(env["TF_CLI_CONFIG_FILE"]) as cli_config_file:
+            cli_config = cli_config_file.read()
+        self.assertIn(f'path = "{self.mirror_dir}"', cli_config)
+        self.assertIn("direct {}", cli_config)
+
+    def test_get_env_keeps_user_cli_config(self):
+        # arrange
+        self._write_user_cli_config('credentials "app.terraform.io" {\n  token = "secret"\n}\n')
+        provider_mirror = ProviderMirror(self.mirror_dir, False, Mock())
+
+        # act
+        env = provider_mirror.get_env()
+
+        # assert
+        with open(env["TF_CLI_CONFIG_FILE"]) as cli_config_file:
+            cli_config = cli_config_file.read()
+        self.assertIn('credentials "app.terraform.io"', cli_config)
+        self.assertIn(f'path = "{self.mirror_dir}"', cli_config)
+
+    def test_get_env_keeps_user_json_cli_config(self):
+        # arrange
+        self._write_user_cli_config(json.dumps({"credentials": {"app.terraform.io": {"token": "secret"}}}))
+        provider_mirror = ProviderMirror(self.mirror_dir, True, Mock())
+
+        # act
+        env = provider_mirror.get_env()
+
+        # assert
+        with open(env["TF_CLI_CONFIG_FILE"]) as cli_config_file:
+            cli_config = json.load(cli_config_file)
+        self.assertEqual(cli_config, {"credentials": {"app.terraform.io": {"token": "secret"}},
+                                      "provider_installation": {"filesystem_mirror": {"path": self.mirror_dir}}})
+
+    def test_get_env_user_cli_config_with_provider_installation(self):
+        # arrange
+        self._write_user_cli_config('provider_installation {\n  direct {}\n}\n')
+        provider_mirror = ProviderMirror(self.mirror_dir, False, Mock())
+
+        # act & assert
+        self.assertRaises(ValueError, provider_mirror.get_env)
+
+    def test_get_env_offline(self):
+        # arrange
+        provider_mirror = ProviderMirror(self.mirror_dir, True, Mock())
+
+        # act
+        env = provider_mirror.get_env()
+
+        # assert
+        with open(env["TF_CLI_CONFIG_FILE"]) as cli_config_file:
+            self.assertNotIn("direct", cli_config_file.read())
+
+    def test_get_env_read_only(self):
+        # arrange
+        local_dir = os.path.join(self.cache_root, "local")
+        provider_mirror = ProviderMirror(self.mirror_dir, False, Mock(), True, local_dir)
+
+        # act
+        env = provider_mirror.get_env()
+        with provider_mirror.lock(shared=True):
+            pass
+
+        # assert
+        self.assertEqual(os.path.dirname(env["TF_CLI_CONFIG_FILE"]), local_dir)
+        self.assertFalse(os.path.exists(self.mirror_dir))
+        self.assertFalse(os.path.exists(f"{self.mirror_dir}.lock"))
+
+    def test_get_missing_providers(self):
+        # arrange
+        with open(os.path.join(self.working_dir, ".terraform.lock.hcl"), "w") as lock_file:
+            lock_file.write(LOCK_FILE)
+        aws_dir = os.path.join(self.mirror_dir, "registry.terraform.io", "hashicorp", "aws")
+        os.makedirs(aws_dir)
+        open(os.path.join(aws_dir, f"terraform-provider-aws_3.74.0_{OS_TYPES[sys.platform]}.zip"), "w").close()
+        provider_mirror = ProviderMirror(self.mirror_dir, False, Mock())
+
+        # act
+        result = provider_mirror.get_missing_providers(self.working_dir)
+
+        # assert
+        self.assertEqual(result, ["registry.terraform.io/hashicorp/null"])
+
+    def test_get_missing_providers_no_lock_file(self):
+        provider_mirror = ProviderMirror(self.mirror_dir, False, Mock())
+        self.assertEqual(provider_mirror.get_missing_providers(self.working_dir), [])
@@ -0,0 +1,73 @@
+import json
+import unittest
+from unittest.mock import Mock
+
+from cloudshell.iac.terraform.services.resource_progress import ResourceProgress
+from cloudshell.iac.terraform.services.tf_event_stream import TfEventStream
+
+
+class TestResourceProgress(unittest.TestCase):
+    def setUp(self):
+        self.on_progress = Mock()
+        self.event_stream = TfEventStream(Mock())
+
+    def _publish(self, event: dict):
+        self.event_stream.publish_line(json.dumps(event))
+
+    def test_progress_of_planned_changes(self):
+        # arrange
+        ResourceProgress(self.on_progress, 3).subscribe(self.event_stream)
+
+        # act
+        self._publish({"type": "apply_start", "hook": {}})
+        self._publish({"type": "apply_complete", "hook": {}})
+        self._publish({"type": "apply_errored", "hook": {}})
+
+        # assert
+        self.assertEqual([c.args for c in self.on_progress.call_args_list], [(1, 3), (2, 3)])
+
+    def test_progress_of_counted_changes(self):
+        # arrange
+        ResourceProgress(self.on_progress).subscribe(self.event_stream)
+
+        # act
+        self._publish({"type": "planned_change", "change": {}})
+        self._publish({"type": "planned_change", "change": {}})
+        self._publish({"type": "apply_complete", "hook": {}})
+
+        # assert
+        self.on_progress.assert_called_once_with(1, 2)
+
+    def test_progress_of_plan_change_summary(self):
+        # arrange
+        ResourceProgress(self.on_progress).subscribe(self.event_stream)
+
+        # act
+        self._publish({"type": "change_summary", "changes": {"add": 0, "change": 1, "remove": 4, "operation": "plan"}})
+        self._publish({"type": "apply_complete", "hook": {}})
+        self._publish({"type": "change_summary", "changes": {"remove": 1, "operation": "destroy"}})
+
+        # assert
+        self.on_progress.assert_called_once_with(1, 5)
+
+    def test_progress_without_planned_changes(self):
+        # arrange
+        ResourceProgress(self.on_progress).subscribe(self.event_stream)
+
+        # act
+        self._publish({"type": "apply_complete", "hook": {}})
+
+        # assert
+        self.on_progress.assert_called_once_with(1, 1)
+
+    def test_progress_reported_again_while_change_in_progress(self):
+        # arrange
+        ResourceProgress(self.on_progress, 2).subscribe(self.event_stream)
+
+        # act
+        self._publish({"type": "apply_progress", "hook": {}})
+        self._publish({"type": "apply_complete", "hook": {}})
+        self._publish({"type": "apply_progress", "hook": {}})
+
+        # assert
+        self.assertEqual([c.args for c in self.on_progress.call_args_list], [(1, 2), (1, 2)])
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from zipfile import ZipFile
+
+from mock import Mock, MagicMock
+
+from cloudshell.iac.terraform.services.resumable_download import ResumableDownload, DownloadVerificationError
+
+URL = "https://releases.hashicorp.com/terraform/1.0.0/terraform_1.0.0_linux_amd64.zip"
+CONTENT = b"0123456789" * 10
+
+
+class TestResumableDownload(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.downloads_dir = os.path.join(self.temp_dir, "downloads")
+        self.file_path = os.path.join(self.temp_dir, "terraform.zip")
+        self.resumable_download = ResumableDownload(self.downloads_dir, Mock())
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    @staticmethod
+    def _get(*responses) -> Mock:
+        get = Mock()
+        get.return_value.__enter__ = Mock(side_effect=list(responses))
+        get.return_value.__exit__ = Mock(return_value=False)
+        return get
+
+    @staticmethod
+    def _response(status_code: int, chunks: list, fail: bool = False) -> MagicMock:
+        def iter_content(chunk_size):
+            for chunk in chunks:
+                yield chunk
+            if fail:
+                raise ConnectionError("connection reset")
+
+        response = MagicMock(status_code=status_code, headers={"ETag": '"v1"'})
+        response.iter_content.side_effect = iter_content
+        return response
+
+    def test_download_resumes_part_with_range(self):
+        # arrange
+        get = self._get(self._response(200, [CONTENT[:40]], fail=True), self._response(206, [CONTENT[40:]]))
+        verify = ResumableDownload.verify_sha256(hashlib.sha256(CONTENT).hexdigest())
+
+        # act
+        with self.assertRaises(ConnectionError):
+            self.resumable_download.download(URL, self.file_path, verify, get)
+        self.resumable_download.download(URL, self.file_path, verify, get)
+
+        # assert
+        resume_headers = get.call_args_list[1][1]["headers"]
+        self.assertEqual(resume_headers["Range"], "bytes=40-")
+        self.assertEqual(resume_headers["If-Range"], '"v1"')
+        with open(self.file_path, "rb") as downloaded_file:
+            self.assertEqual(downloaded_file.read(), CONTENT)
+        self.assertFalse([x for x in os.listdir(self.downloads_dir) if not x.endswith(".lock")])
+
+    def test_download_restarts_when_range_is_ignored(self):
+        # arrange
+        get = self._get(self._response(200, [b"stale"], fail=True), self._response(200, [CONTENT]))
+
+        # act
+        with self.assertRaises(ConnectionError):
+            self.resumable_download.download(URL, self.file_path, get=get)
+        self.resumable_download.download(URL, self.file_path, get=get)
+
+        # assert
+        with open(self.file_path, "rb") as downloaded_file:
+            self.assertEqual(downloaded_file.read(), CONTENT)
+
+    def test_download_verification_failure_deletes_part(self):
+        # arrange
+        get = self._get(self._response(200, [CONTENT]))
+
+        # act
+        with self.assertRaises(DownloadVerificationError):
+            self.resumable_download.download(URL, self.file_path, ResumableDownload.verify_sha256("0" * 64), get)
+
+        # assert
+        self.assertFalse(os.path.exists(self.file_path))
+        self.assertFalse([x for x in os.listdir(self.downloads_dir) if not x.endswith(".lock")])
+
+    def test_verify_zip_truncated(self):
+        # arrange
+        with ZipFile(self.file_path, "w") as zip_file:
+            zip_file.writestr("main.tf", "resource \"null_resource\" \"x\" {}\n" * 100)
+        with open(self.file_path, "rb") as zip_file:
+            content = zip_file.read()
+        with open(self.file_path, "wb") as zip_file:
+            zip_file.write(content[:len(content) // 2])
+
+        # act & assert
+        self.assertRaises(DownloadVerificationError, ResumableDownload.verify_zip, self.file_path)
+
+    def test_verify_zip(self):
+        # arrange
+        with ZipFile(self.file_path, "w") as zip_file:
+            zip_file.writestr("main.tf", "resource \"null_resource\" \"x\" {}\n")
+
+        # act
+        ResumableDownload.verify_zip(self.file_path)
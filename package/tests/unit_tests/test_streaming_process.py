@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+from cloudshell.iac.terraform.services.streaming_process import StreamingProcess
+
+SCRIPT = "import sys\nfor i in range(10):\n    print(f'line {i}', flush=True)\nsys.stderr.write('error\\n')\nsys.exit(2)\n"
+
+
+class TestStreamingProcess(unittest.TestCase):
+    def test_run_streams_lines_and_keeps_tail(self):
+        # arrange
+        lines = []
+        process = StreamingProcess([sys.executable, "-c", SCRIPT], os.getcwd(), dict(os.environ), tail_lines=3)
+
+        # act
+        result = process.run(lines.append)
+
+        # assert
+        self.assertEqual(result.return_code, 2)
+        self.assertEqual(len(lines), 11)
+        self.assertEqual(lines[0], "line 0")
+        self.assertEqual(result.tail, "line 8\nline 9\nerror")
+        self.assertEqual(result.output, "")
+
+    def test_run_capture_output(self):
+        # arrange
+        process = StreamingProcess([sys.executable, "-c", "print('{\"a\": 1}')"], os.getcwd(), dict(os.environ))
+
+        # act
+        result = process.run(capture_output=True)
+
+        # assert
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(result.output, '{"a": 1}')
+
+    def test_run_kills_process_when_reader_fails(self):
+        # arrange
+        process = StreamingProcess([sys.executable, "-c", SCRIPT], os.getcwd(), dict(os.environ))
+
+        # act & assert
+        with self.assertRaises(ValueError):
+            process.run(lambda line: int(line))
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock, patch
+
+from cloudshell.iac.terraform import TerraformShellConfig
+from cloudshell.iac.terraform.constants import APPLY_PASSED, APPLY_FAILED
+from cloudshell.iac.terraform.services.warm_working_dirs import WarmWorkingDirs
+from cloudshell.iac.terraform.terraform_shell import TerraformShell
+
+
+class TestTerraformShellWarmWorkingDir(unittest.TestCase):
+    def setUp(self) -> None:
+        self.object_factory_patcher = patch("cloudshell.iac.terraform.terraform_shell.ObjectFactory")
+        self.object_factory_patcher.start()
+        self.root = tempfile.mkdtemp()
+        self.cache_root = os.path.join(self.root, "cache")
+        self.temp_dir = os.path.join(self.root, "service")
+        self.working_dir = os.path.join(self.temp_dir, "REPO", "live")
+        os.makedirs(os.path.join(self.working_dir, ".terraform"))
+        self.terraform_shell = TerraformShell(Mock(), Mock(), TerraformShellConfig(
+            cache_root_dir=self.cache_root, keep_warm_working_dir=True))
+        self.sandbox_data_handler = Mock()
+        self.sandbox_data_handler.get_tf_working_dir.return_value = self.working_dir
+        self.shell_helper = Mock()
+        self.shell_helper.attr_handler.get_attribute.return_value = "remote state provider"
+
+    def tearDown(self) -> None:
+        self.object_factory_patcher.stop()
+        shutil.rmtree(self.root)
+
+    def test_release_keeps_working_dir_of_passed_apply(self):
+        # arrange
+        self.sandbox_data_handler.get_status.return_value = APPLY_PASSED
+
+        # act
+        self.terraform_shell._release_working_dir(self.sandbox_data_handler, self.shell_helper, self.working_dir)
+
+        # assert
+        self.assertTrue(os.path.isdir(self.working_dir))
+        self.sandbox_data_handler.set_tf_working_dir.assert_not_called()
+
+    def test_release_deletes_working_dir_of_failed_apply(self):
+        # arrange
+        self.sandbox_data_handler.get_status.return_value = APPLY_FAILED
+
+        # act
+        self.terraform_shell._release_working_dir(self.sandbox_data_handler, self.shell_helper, self.working_dir)
+
+        # assert
+        self.assertFalse(os.path.exists(self.temp_dir))
+        self.sandbox_data_handler.set_tf_working_dir.assert_called_once_with("")
+
+    def test_execute_deletes_kept_working_dir(self):
+        # arrange
+        WarmWorkingDirs(self.cache_root, 1, Mock()).retain(self.working_dir)
+
+        # act
+        self.terraform_shell._discard_warm_working_dir(self.sandbox_data_handler, self.shell_helper)
+
+        # assert
+        self.assertFalse(os.path.exists(self.temp_dir))
+        self.sandbox_data_handler.set_tf_working_dir.assert_called_once_with("")
+        self.assertEqual(WarmWorkingDirs(self.cache_root, 1, Mock())._read(), {})
+
+    def test_execute_keeps_working_dir_of_local_state(self):
+        # arrange
+        self.shell_helper.attr_handler.get_attribute.return_value = ""
+
+        # act
+        self.terraform_shell._discard_warm_working_dir(self.sandbox_data_handler, self.shell_helper)
+
+        # assert
+        self.assertTrue(os.path.isdir(self.working_dir))
+        self.sandbox_data_handler.set_tf_working_dir.assert_not_called()
@@ -0,0 +1,137 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from zipfile import ZipFile
+
+from mock import patch
+
+from cloudshell.iac.terraform.constants import OS_TYPES, TERRAFORM_EXE_NAME
+from cloudshell.iac.terraform.downloaders.tf_exec_downloader import TfExecDownloader
+from cloudshell.iac.terraform.services.tf_binary_store import TfBinaryStore
+
+
+class TestTfBinaryStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_root = tempfile.mkdtemp()
+        self.zip_path = os.path.join(self.cache_root, "terraform.zip")
+        with ZipFile(self.zip_path, "w") as zip_file:
+            zip_file.writestr("terraform", "#!/bin/sh\n")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_root)
+
+    def test_add_binary_from_zip(self):
+        # arrange
+        store = TfBinaryStore(self.cache_root)
+
+        # act
+        binary_path = store.add_binary_from_zip("1.0.0", "linux_amd64", self.zip_path)
+
+        # assert
+        self.assertTrue(store.has_binary("1.0.0", "linux_amd64"))
+        self.assertEqual(binary_path, os.path.join(self.cache_root, "terraform", "1.0.0", "linux_amd64",
+                                                   "terraform.exe"))
+        self.assertFalse(store.has_binary("1.0.1", "linux_amd64"))
+
+    def test_read_only_shared_store(self):
+        # arrange
+        shared_cache_dir = os.path.join(self.cache_root, "shared")
+        TfBinaryStore(os.path.join(self.cache_root, "publisher"), shared_cache_dir).add_binary_from_zip(
+            "1.0.0", "linux_amd64", self.zip_path)
+        store = TfBinaryStore(os.path.join(self.cache_root, "consumer"), shared_cache_dir, True)
+
+        # act
+        binary_path = store.add_binary_from_zip("1.0.1", "linux_amd64", self.zip_path)
+
+        # assert
+        self.assertTrue(store.get_binary_path("1.0.0", "linux_amd64").startswith(shared_cache_dir))
+        self.assertTrue(binary_path.startswith(os.path.join(self.cache_root, "consumer")))
+        self.assertEqual(sorted(store.list_versions("linux_amd64")), ["1.0.0", "1.0.1"])
+
+    def test_add_existing_binary(self):
+        # arrange
+        store = TfBinaryStore(self.cache_root)
+        store.add_binary_from_zip("1.0.0", "linux_amd64", self.zip_path)
+
+        # act
+        binary_path = store.add_binary_from_zip("1.0.0", "linux_amd64", self.zip_path)
+
+        # assert
+        self.assertTrue(os.path.isfile(binary_path))
+        self.assertEqual(os.listdir(os.path.join(self.cache_root, "terraform", "1.0.0")), ["linux_amd64"])
+
+    def test_cached_latest_version(self):
+        # arrange
+        store = TfBinaryStore(self.cache_root)
+
+        # act
+        store.set_cached_latest_version("1.2.3")
+
+        # assert
+        self.assertEqual(store.get_cached_latest_version(60), "1.2.3")
+
+    def test_cached_latest_version_expired(self):
+        # arrange
+        store = TfBinaryStore(self.cache_root)
+        with patch("cloudshell.iac.terraform.services.tf_binary_store.time.time", return_value=1000):
+            store.set_cached_latest_version("1.2.3")
+
+        # act
+        with patch("cloudshell.iac.terraform.services.tf_binary_store.time.time", return_value=1061):
+            result = store.get_cached_latest_version(60)
+
+        # assert
+        self.assertEqual(result, "")
+
+    def test_cached_latest_version_missing(self):
+        store = TfBinaryStore(self.cache_root)
+        self.assertEqual(store.get_cached_latest_version(60), "")
+
+
+class TestTfExecDownloaderChecksum(unittest.TestCase):
+    SHA256SUMS = "aaa111  terraform_1.0.0_darwin_amd64.zip\nBBB222  terraform_1.0.0_linux_amd64.zip\n"
+
+    def test_get_expected_sha256(self):
+        sha256 = TfExecDownloader.get_expected_sha256(self.SHA256SUMS, "terraform_1.0.0_linux_amd64.zip")
+        self.assertEqual(sha256, "bbb222")
+
+    def test_get_expected_sha256_missing(self):
+        self.assertRaises(ValueError, TfExecDownloader.get_expected_sha256, self.SHA256SUMS,
+                          "terraform_1.0.0_windows_amd64.zip")
+
+
+class TestTfExecDownloader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_root = tempfile.mkdtemp()
+        zip_path = os.path.join(self.cache_root, "terraform.zip")
+        with ZipFile(zip_path, "w") as zip_file:
+            zip_file.writestr("terraform", "#!/bin/sh\n")
+        store = TfBinaryStore(self.cache_root)
+        self.store_exe_path = store.add_binary_from_zip("1.0.0", OS_TYPES[sys.platform], zip_path)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_root)
+
+    def test_download_runs_executable_from_store(self):
+        # act
+        tf_executable = TfExecDownloader.download_terraform_executable(version="1.0.0", cache_root_dir=self.cache_root)
+
+        # assert
+        self.assertEqual(tf_executable.path, self.store_exe_path)
+        self.assertEqual(tf_executable.version, "1.0.0")
+
+    def test_download_to_deprecated_working_dir(self):
+        # arrange
+        tf_workingdir = os.path.join(self.cache_root, "REPO")
+        os.mkdir(tf_workingdir)
+
+        # act
+        with self.assertWarns(DeprecationWarning):
+            tf_executable = TfExecDownloader.download_terraform_executable(tf_workingdir, "1.0.0", self.cache_root)
+
+        # assert
+        self.assertEqual(tf_executable.path, os.path.join(tf_workingdir, TERRAFORM_EXE_NAME))
+        self.assertTrue(os.access(tf_executable.path, os.X_OK))
+        self.assertEqual(tf_executable.version, "1.0.0")
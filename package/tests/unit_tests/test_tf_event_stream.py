@@ -0,0 +1,101 @@
+import json
+import unittest
+from unittest.mock import Mock
+
+from cloudshell.iac.terraform.services.tf_event_stream import TfEventStream
+from cloudshell.iac.terraform.tagging.tag_terraform_resources import _get_plan_errors_from_json_output, \
+    _get_untaggable_resources_types_from_plan_output, LoggerHelper
+
+UNSUPPORTED_TAGS_DIAGNOSTIC = {
+    "@level": "error",
+    "@message": "Error: Unsupported argument",
+    "type": "diagnostic",
+    "diagnostic": {
+        "severity": "error",
+        "summary": "Unsupported argument",
+        "detail": "An argument named \"tags\" is not expected here.",
+        "range": {"filename": "main_override.tf", "start": {"line": 3}},
+        "snippet": {"context": "resource \"aws_api_gateway_account\" \"agc\""}
+    }
+}
+
+
+class TestTfEventStream(unittest.TestCase):
+    def setUp(self):
+        self.logger = Mock()
+        self.event_stream = TfEventStream(self.logger)
+
+    def test_publish_line_calls_subscribers_of_the_event_type(self):
+        # arrange
+        all_events = []
+        summaries = []
+        self.event_stream.subscribe(all_events.append)
+        self.event_stream.subscribe(summaries.append, "change_summary")
+
+        # act
+        self.event_stream.publish_line(json.dumps({"type": "version", "@message": "Terraform 1.1.0"}))
+        self.event_stream.publish_line(json.dumps({"type": "change_summary", "changes": {"add": 2}}))
+
+        # assert
+        self.assertEqual(len(all_events), 2)
+        self.assertEqual(summaries, [{"type": "change_summary", "changes": {"add": 2}}])
+
+    def test_publish_line_not_json(self):
+        # arrange
+        events = []
+        self.event_stream.subscribe(events.append)
+
+        # act
+        self.event_stream.publish_line("panic: runtime error")
+        self.event_stream.publish_line("  ")
+
+        # assert
+        self.assertEqual(events, [{"type": "unparsed", "@level": "info", "@message": "panic: runtime error"}])
+
+    def test_publish_line_failing_subscriber(self):
+        # arrange
+        events = []
+        self.event_stream.subscribe(Mock(side_effect=Exception("boom")))
+        self.event_stream.subscribe(events.append)
+
+        # act
+        self.event_stream.publish_line(json.dumps({"type": "version"}))
+
+        # assert
+        self.logger.warning.assert_called_once()
+        self.assertEqual(len(events), 1)
+
+    def test_get_errors_keeps_last_error_diagnostics(self):
+        # arrange
+        event_stream = TfEventStream(self.logger, max_errors=1)
+        warning = {"type": "diagnostic", "diagnostic": {"severity": "warning", "summary": "Deprecated"}}
+
+        # act
+        event_stream.publish_line(json.dumps({"type": "diagnostic",
+                                              "diagnostic": {"severity": "error", "summary": "first"}}))
+        event_stream.publish_line(json.dumps({"type": "diagnostic",
+                                              "diagnostic": {"severity": "error", "summary": "second"}}))
+        event_stream.publish_line(json.dumps(warning))
+
+        # assert
+        self.assertEqual(event_stream.get_errors(), ["Error: second"])
+
+    def test_format_event_diagnostic(self):
+        # act
+        text = TfEventStream.format_event(UNSUPPORTED_TAGS_DIAGNOSTIC)
+
+        # assert
+        self.assertEqual(text, "Error: Unsupported argument\n\n"
+                               "  on main_override.tf line 3, in resource \"aws_api_gateway_account\" \"agc\":\n\n"
+                               "An argument named \"tags\" is not expected here.")
+
+    def test_untaggable_resources_from_json_plan_output(self):
+        # arrange
+        LoggerHelper.init_logging(self.logger)
+        stdout = "\n".join([json.dumps({"type": "version"}), json.dumps(UNSUPPORTED_TAGS_DIAGNOSTIC)])
+
+        # act
+        errors = _get_plan_errors_from_json_output(stdout, "")
+
+        # assert
+        self.assertEqual(_get_untaggable_resources_types_from_plan_output(errors), ["aws_api_gateway_account"])
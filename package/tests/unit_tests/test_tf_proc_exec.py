@@ -0,0 +1,157 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from cloudshell.iac.terraform.services.plugin_cache import PluginCache
+from cloudshell.iac.terraform.services.streaming_process import ProcessResult
+from cloudshell.iac.terraform.services.tf_proc_exec import TfProcExec
+
+
+class TestTfProcExec(unittest.TestCase):
+    def setUp(self):
+        self.create_logger_patcher = patch("cloudshell.iac.terraform.services.tf_proc_exec._create_logger")
+        self.create_logger_patcher.start()
+        self.streaming_process_patcher = patch("cloudshell.iac.terraform.services.tf_proc_exec.StreamingProcess")
+        self.streaming_process_class = self.streaming_process_patcher.start()
+        self.sb_data_handler = Mock()
+        self.sb_data_handler.get_tf_working_dir.return_value = "/tmp/REPO"
+        self.sb_data_handler.get_tf_exe_path.return_value = "/cache/terraform"
+        self.sb_data_handler.get_tf_version.return_value = "1.1.0"
+        self.input_output_service = Mock()
+        self.tf_proc_exec = TfProcExec(Mock(), self.sb_data_handler, Mock(), self.input_output_service,
+                                       use_json_output=True)
+
+    def tearDown(self):
+        self.create_logger_patcher.stop()
+        self.streaming_process_patcher.stop()
+
+    def _set_process_events(self, events: list, output: str = ""):
+        def run(on_line, capture_output):
+            for event in events:
+                on_line(json.dumps(event))
+            return ProcessResult(0, "", output)
+
+        self.streaming_process_class.return_value.run.side_effect = run
+
+    def test_json_output_not_supported(self):
+        # arrange
+        self.sb_data_handler.get_tf_version.return_value = "0.14.11"
+        tf_proc_exec = TfProcExec(Mock(), self.sb_data_handler, Mock(), Mock(), use_json_output=True)
+        self._set_process_events([])
+
+        # act
+        tf_proc_exec.apply_terraform()
+
+        # assert
+        cmd = self.streaming_process_class.call_args.args[0]
+        self.assertEqual(cmd, ["/cache/terraform", "apply", "--auto-approve", "-no-color", "planfile"])
+
+    def test_save_outputs_from_apply_outputs_event(self):
+        # arrange
+        outputs = {"ip": {"value": "10.0.0.1", "sensitive": False, "type": "string"}}
+        self._set_process_events([{"type": "apply_complete", "hook": {}}, {"type": "outputs", "outputs": outputs}])
+        self.tf_proc_exec.apply_terraform()
+
+        # act
+        self.tf_proc_exec.save_terraform_outputs()
+
+        # assert
+        self.assertEqual(self.streaming_process_class.call_count, 1)
+        self.input_output_service.parse_and_save_outputs.assert_called_once_with(outputs)
+
+    def test_save_outputs_with_sensitive_outputs(self):
+        # arrange
+        self._set_process_events([{"type": "outputs", "outputs": {"password": {"sensitive": True, "type": "string"}}}])
+        self.tf_proc_exec.apply_terraform()
+        outputs = {"password": {"value": "secret", "sensitive": True, "type": "string"}}
+        self._set_process_events([], json.dumps(outputs))
+
+        # act
+        self.tf_proc_exec.save_terraform_outputs()
+
+        # assert
+        cmd = self.streaming_process_class.call_args.args[0]
+        self.assertEqual(cmd, ["/cache/terraform", "output", "-json"])
+        self.input_output_service.parse_and_save_outputs.assert_called_once_with(outputs)
+
+    @patch("cloudshell.iac.terraform.services.tf_proc_exec.InitFingerprint")
+    def test_init_skipped_when_fingerprint_matches(self, init_fingerprint_class):
+        # arrange
+        init_fingerprint_class.return_value.compare.return_value = (True, True)
+        tf_proc_exec = TfProcExec(Mock(), self.sb_data_handler, Mock(), Mock(), skip_unchanged_init=True)
+
+        # act
+        tf_proc_exec.init_terraform()
+
+        # assert
+        self.streaming_process_class.assert_not_called()
+
+    @patch("cloudshell.iac.terraform.services.tf_proc_exec.InitFingerprint")
+    def test_init_of_changed_backend(self, init_fingerprint_class):
+        # arrange
+        init_fingerprint_class.return_value.compare.return_value = (True, False)
+        backend_handler = Mock()
+        backend_handler.get_backend_secret_vars.return_value = {"access_key": "key"}
+        tf_proc_exec = TfProcExec(Mock(), self.sb_data_handler, backend_handler, Mock(), skip_unchanged_init=True)
+        self._set_process_events([])
+
+        # act
+        tf_proc_exec.init_terraform()
+
+        # assert
+        cmd = self.streaming_process_class.call_args.args[0]
+        self.assertEqual(cmd, ["/cache/terraform", "init", "-no-color", "-get=false", "-backend-config=access_key=key"])
+        self.assertEqual(self.streaming_process_class.call_count, 1)
+        init_fingerprint_class.return_value.record.assert_called_once()
+
+    @patch("cloudshell.iac.terraform.services.tf_proc_exec.InitFingerprint")
+    def test_inits_with_plugin_cache_run_one_at_a_time(self, init_fingerprint_class):
+        # arrange
+        init_fingerprint_class.return_value.compare.return_value = (False, False)
+        cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_root)
+        # both 'terraform get' must run at the same time to pass the barrier, they are not locked
+        get_barrier = threading.Barrier(2, timeout=5)
+        running_inits = []
+        max_running_inits = []
+
+        def create_process(cmd, cwd, env):
+            def run(on_line, capture_output):
+                if cmd[1] == "get":
+                    get_barrier.wait()
+                else:
+                    running_inits.append(cmd)
+                    max_running_inits.append(len(running_inits))
+                    time.sleep(0.1)
+                    running_inits.remove(cmd)
+                return ProcessResult(0, "", "")
+            return Mock(run=run)
+
+        self.streaming_process_class.side_effect = create_process
+        backend_handler = Mock()
+        backend_handler.get_backend_secret_vars.return_value = {}
+        tf_proc_execs = [TfProcExec(Mock(), self.sb_data_handler, backend_handler, Mock(),
+                                    PluginCache(cache_root, 1, Mock())) for _ in range(2)]
+        errors = []
+
+        def init(tf_proc_exec):
+            try:
+                tf_proc_exec.init_terraform()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=init, args=(tf_proc_exec,)) for tf_proc_exec in tf_proc_execs]
+
+        # act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # assert
+        self.assertEqual(errors, [])
+        self.assertEqual(max_running_inits, [1, 1])
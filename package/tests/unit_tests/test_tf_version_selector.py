@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock
+
+from cloudshell.iac.terraform.services.tf_version_selector import TfVersionSelector
+
+
+class TestTfVersionSelector(unittest.TestCase):
+    VERSIONS = ["0.12.31", "0.15.5", "1.0.0", "1.0.11", "1.1.9", "1.2.0-beta1"]
+
+    def test_select_newest_version(self):
+        self.assertEqual(TfVersionSelector.select_newest_version(self.VERSIONS, [">= 0.12"]), "1.1.9")
+        self.assertEqual(TfVersionSelector.select_newest_version(self.VERSIONS, [">= 0.12", "< 1.0.0"]), "0.15.5")
+        self.assertEqual(TfVersionSelector.select_newest_version(self.VERSIONS, ["1.0.0"]), "1.0.0")
+        self.assertEqual(TfVersionSelector.select_newest_version(self.VERSIONS, ["!= 1.1.9"]), "1.0.11")
+
+    def test_pessimistic_constraint(self):
+        self.assertEqual(TfVersionSelector.select_newest_version(self.VERSIONS, ["~> 1.0.0"]), "1.0.11")
+        self.assertEqual(TfVersionSelector.select_newest_version(self.VERSIONS, ["~> 1.0"]), "1.1.9")
+        self.assertEqual(TfVersionSelector.select_newest_version(self.VERSIONS, ["~> 0.12"]), "0.15.5")
+
+    def test_no_matching_version(self):
+        self.assertEqual(TfVersionSelector.select_newest_version(self.VERSIONS, [">= 2.0"]), "")
+
+    def test_invalid_constraint(self):
+        self.assertRaises(ValueError, TfVersionSelector.is_version_allowed, "1.0.0", [">= one"])
+
+    def test_get_required_version_constraints(self):
+        # arrange
+        module_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, module_dir)
+        with open(os.path.join(module_dir, "versions.tf"), "w") as tf_file:
+            tf_file.write('terraform {\n  required_version = ">= 0.13, < 2.0.0"\n}\n')
+        with open(os.path.join(module_dir, "main.tf"), "w") as tf_file:
+            tf_file.write('resource "null_resource" "hello" {}\n')
+
+        # act
+        result = TfVersionSelector.get_required_version_constraints(module_dir, Mock())
+
+        # assert
+        self.assertEqual(result, [">= 0.13", "< 2.0.0"])
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock
+
+from cloudshell.iac.terraform.services.warm_working_dirs import WarmWorkingDirs
+
+
+class TestWarmWorkingDirs(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.mkdtemp()
+        self.cache_root = os.path.join(self.root, "cache")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root)
+
+    def _create_working_dir(self, name: str, size: int) -> str:
+        working_dir = os.path.join(self.root, name, "REPO", "live")
+        os.makedirs(os.path.join(working_dir, ".terraform"))
+        with open(os.path.join(working_dir, ".terraform", "provider"), "wb") as provider_file:
+            provider_file.write(b"0" * size)
+        return working_dir
+
+    def test_retain_and_claim(self):
+        # arrange
+        working_dir = self._create_working_dir("service", 1)
+        warm_working_dirs = WarmWorkingDirs(self.cache_root, 1, Mock())
+
+        # act
+        retained = warm_working_dirs.retain(working_dir)
+        claimed = WarmWorkingDirs(self.cache_root, 1, Mock()).claim(working_dir)
+
+        # assert
+        self.assertTrue(retained)
+        self.assertTrue(claimed)
+        self.assertTrue(os.path.isdir(working_dir))
+
+    def test_retain_evicts_least_recently_retained(self):
+        # arrange
+        oldest = self._create_working_dir("oldest", 600 * 1024)
+        newest = self._create_working_dir("newest", 600 * 1024)
+        warm_working_dirs = WarmWorkingDirs(self.cache_root, 1, Mock())
+        warm_working_dirs.retain(oldest)
+
+        # act
+        retained = warm_working_dirs.retain(newest)
+
+        # assert
+        self.assertTrue(retained)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "oldest")))
+        self.assertFalse(warm_working_dirs.claim(oldest))
+        self.assertTrue(warm_working_dirs.claim(newest))
+
+    def test_claimed_dir_is_not_evicted(self):
+        # arrange
+        claimed_dir = self._create_working_dir("claimed", 600 * 1024)
+        other_dir = self._create_working_dir("other", 600 * 1024)
+        warm_working_dirs = WarmWorkingDirs(self.cache_root, 1, Mock())
+        warm_working_dirs.retain(claimed_dir)
+        warm_working_dirs.claim(claimed_dir)
+
+        # act
+        warm_working_dirs.retain(other_dir)
+
+        # assert
+        self.assertTrue(os.path.isdir(claimed_dir))
+        self.assertTrue(os.path.isdir(other_dir))
@@ -0,0 +1,71 @@
+import errno
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock, patch
+
+from cloudshell.iac.terraform.services.working_dir_materializer import WorkingDirMaterializer, HARDLINK, COPY
+
+
+class TestWorkingDirMaterializer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.temp_dir, "snapshot")
+        self.dest_dir = os.path.join(self.temp_dir, "working_dir")
+        os.makedirs(os.path.join(self.source_dir, "modules", "vpc"))
+        for file_name in ["main.tf", "backend.tf", "main_override.tf", os.path.join("modules", "vpc", "vpc.tf")]:
+            with open(os.path.join(self.source_dir, file_name), "w") as tf_file:
+                tf_file.write("# snapshot")
+        self.materializer = WorkingDirMaterializer(Mock())
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def _is_same_file(self, file_name: str) -> bool:
+        return os.path.samefile(os.path.join(self.source_dir, file_name), os.path.join(self.dest_dir, file_name))
+
+    def test_is_private_file(self):
+        self.assertTrue(WorkingDirMaterializer.is_private_file("main_override.tf"))
+        self.assertTrue(WorkingDirMaterializer.is_private_file(".terraform.lock.hcl"))
+        self.assertTrue(WorkingDirMaterializer.is_private_file("terraform.tfstate.backup"))
+        self.assertFalse(WorkingDirMaterializer.is_private_file("main.tf"))
+
+    @unittest.skipIf(os.name == "nt", "hardlinks are not used on windows")
+    def test_materialize_hardlinks_module_files(self):
+        # arrange
+        self.materializer._methods = [HARDLINK, COPY]
+
+        # act
+        self.materializer.materialize(self.source_dir, self.dest_dir)
+
+        # assert
+        self.assertTrue(self._is_same_file("main.tf"))
+        self.assertTrue(self._is_same_file(os.path.join("modules", "vpc", "vpc.tf")))
+        self.assertFalse(self._is_same_file("backend.tf"))
+        self.assertFalse(self._is_same_file("main_override.tf"))
+
+    def test_private_files_do_not_leak_to_snapshot(self):
+        # act
+        self.materializer.materialize(self.source_dir, self.dest_dir)
+        with open(os.path.join(self.dest_dir, "main_override.tf"), "w") as override_file:
+            override_file.write("# tags")
+
+        # assert
+        with open(os.path.join(self.source_dir, "main_override.tf")) as override_file:
+            self.assertEqual(override_file.read(), "# snapshot")
+
+    @unittest.skipIf(os.name == "nt", "hardlinks are not used on windows")
+    def test_materialize_falls_back_to_copy(self):
+        # arrange
+        self.materializer._methods = [HARDLINK, COPY]
+
+        # act
+        with patch("os.link", side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+            self.materializer.materialize(self.source_dir, self.dest_dir)
+
+        # assert
+        self.assertFalse(self._is_same_file("main.tf"))
+        with open(os.path.join(self.dest_dir, "main.tf")) as tf_file:
+            self.assertEqual(tf_file.read(), "# snapshot")